@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+BatchingClient的吞吐量基准测试
+
+启动一个本地的OpenAI兼容替身服务器（流式返回，每个token固定耗时，并发请求同时推进，近似vLLM的连续批处理），
+对比：串行调用OpenAIClient、多线程调用OpenAIClient、多线程调用BatchingClient。
+BatchingClient本身不合并请求，它在一个事件循环和异步连接池上同时保持多个请求，由服务端的连续批处理组批；
+与多线程调用OpenAIClient的差别在于不需要每个调用各占一个连接，并限制同时在途的请求数。
+运行方式：python benchmarks/bench_batching_client.py [请求数] [线程数] [每个回复的token数] [每个token的耗时ms]
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ['DART_LOG_FILE'] = 'false'
+
+from DART.core.base.batching_client import BatchingClient
+from DART.core.base.llm import OpenAIClient
+
+
+def chunk_line(content: str) -> bytes:
+    chunk = {
+        'id': 'bench', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'bench',
+        'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}],
+    }
+    return f'data: {json.dumps(chunk)}\n\n'.encode()
+
+
+class StandInServer:
+    """最小的/chat/completions流式服务，运行在独立进程中，避免与客户端争用GIL"""
+
+    def __init__(self, tokens: int, step: float):
+        self.tokens = tokens
+        self.step = step
+
+    def start(self) -> int:
+        ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=self._serve, args=(ports,), daemon=True)
+        self.process.start()
+        return ports.get()
+
+    def stop(self):
+        self.process.terminate()
+
+    def _serve(self, ports):
+        async def serve():
+            server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+            ports.put(server.sockets[0].getsockname()[1])
+            await server.serve_forever()
+
+        asyncio.run(serve())
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in header.decode().split('\r\n'):
+                    if line.lower().startswith('content-length:'):
+                        length = int(line.split(':', 1)[1])
+                await reader.readexactly(length)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+                             b'Transfer-Encoding: chunked\r\n\r\n')
+                for i in range(self.tokens):
+                    await asyncio.sleep(self.step)
+                    self._write_chunk(writer, chunk_line(f't{i} '))
+                    await writer.drain()
+                self._write_chunk(writer, b'data: [DONE]\n\n')
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+
+
+def ask(llm, i: int) -> str:
+    deltas = llm.create_chat_completion(messages=[{'role': 'user', 'content': f'item {i}'}])
+    return ''.join(delta.content or '' for delta in deltas)
+
+
+def timed(label: str, requests: int, func):
+    start = time.perf_counter()
+    answers = func()
+    elapsed = time.perf_counter() - start
+    assert all(answers), 'empty answer'
+    print(f'{label:<28}{elapsed:7.2f}s  {requests / elapsed:8.1f} req/s')
+    return elapsed
+
+
+def main():
+    for name in ('httpx', 'httpx2', 'openai'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    tokens = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    step = (float(sys.argv[4]) if len(sys.argv) > 4 else 5) / 1000
+
+    server = StandInServer(tokens, step)
+    base_url = f'http://127.0.0.1:{server.start()}/v1'
+    print(f'requests: {requests}, threads: {threads}, tokens: {tokens}, step: {step * 1000:.0f}ms')
+
+    plain = OpenAIClient(api_key='bench', base_url=base_url, models=['bench'], default_model='bench')
+    batching = BatchingClient(api_key='bench', base_url=base_url, models=['bench'], default_model='bench')
+
+    serial = min(requests, 50)
+    serial_time = timed('serial (OpenAIClient)', serial, lambda: [ask(plain, i) for i in range(serial)])
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        threaded_time = timed('threads (OpenAIClient)', requests,
+                              lambda: list(pool.map(lambda i: ask(plain, i), range(requests))))
+        batched_time = timed('threads (BatchingClient)', requests,
+                             lambda: list(pool.map(lambda i: ask(batching, i), range(requests))))
+    print(f'requests sent by BatchingClient: {batching.requests}')
+    print(f'speedup vs serial:  {serial_time / serial / (batched_time / requests):.1f}x')
+    print(f'speedup vs threads: {threaded_time / batched_time:.1f}x')
+    batching.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Choice.merge_delta流式合并的基准测试
+
+模拟100k个token的流式回复（正文和工具调用参数各一份），对比逐块 += 拼接与分片累积的耗时。
+运行方式：python benchmarks/bench_choice_merge.py [token数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ['DART_LOG_FILE'] = 'false'
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from DART.core.types.choice import Choice
+
+
+class ConcatChoice:
+    """旧版merge_delta的做法：在属性上逐块 += 拼接"""
+
+    def __init__(self):
+        self.content = ''
+        self.arguments = ''
+
+    def merge_delta(self, delta: ChoiceDelta):
+        if isinstance(delta.content, str):
+            self.content += delta.content
+        if delta.tool_calls:
+            tool_calls = {tool.index: tool for tool in delta.tool_calls}
+            for tool in tool_calls.values():
+                self.arguments += tool.function.arguments
+
+
+def synthetic_stream(tokens: int):
+    deltas = [ChoiceDelta(role='assistant', content=f'tok{i} ') for i in range(tokens)]
+    deltas.extend(
+        ChoiceDelta(tool_calls=[
+            ChoiceDeltaToolCall(index=0, function=ChoiceDeltaToolCallFunction(arguments=f'"arg{i}", '))
+        ])
+        for i in range(tokens)
+    )
+    return deltas
+
+
+def bench(choice, deltas) -> float:
+    start = time.perf_counter()
+    for delta in deltas:
+        choice.merge_delta(delta)
+    return time.perf_counter() - start
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    deltas = synthetic_stream(tokens)
+
+    concat = ConcatChoice()
+    concat_time = bench(concat, deltas)
+
+    chunked = Choice(content='')
+    chunked_time = bench(chunked, deltas)
+    # 读取时才拼接，计入总耗时
+    start = time.perf_counter()
+    content, arguments = chunked.content, chunked.tool_calls[0].function.arguments
+    chunked_time += time.perf_counter() - start
+
+    assert content == concat.content and arguments == concat.arguments
+    print(f'tokens: {tokens}, content: {len(content)} chars, arguments: {len(arguments)} chars')
+    print(f'+= concat:        {concat_time:.3f}s')
+    print(f'chunked:          {chunked_time:.3f}s')
+    print(f'speedup:          {concat_time / chunked_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
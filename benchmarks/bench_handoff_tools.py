@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+handoff工具的微基准测试
+
+对比基于exec的create_tool与HandoffTool：单次创建的耗时，以及一个带有大量handoff的Agent
+每轮列出工具（tools + update_mapping）的耗时。
+运行方式：python benchmarks/bench_handoff_tools.py [handoff数] [轮数]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ['DART_LOG_FILE'] = 'false'
+
+from DART.core.base.agent import Agent
+from DART.core.tools.handoff import HandoffTool
+from DART.utils.create_tool import create_tool
+
+
+def exec_tool(agent: Agent):
+    """旧版transfer_agent_to_tool的做法"""
+    def return_agent(handoff: Agent):
+        return handoff
+
+    return create_tool(name=agent.name, doc=HandoffTool(agent).__doc__, api=return_agent, args={'handoff': agent})
+
+
+def main():
+    handoffs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    agents = [Agent(name=f'agent_{i}', persona='persona', description='description') for i in range(handoffs)]
+    root = Agent(name='root', persona='persona', description='description', handoffs=agents)
+
+    exec_time = timeit.timeit(lambda: [exec_tool(agent) for agent in agents], number=turns)
+    closure_time = timeit.timeit(lambda: [HandoffTool(agent) for agent in agents], number=turns)
+
+    def per_turn_exec():
+        # 旧路径：每轮tools()和update_mapping()各重新exec一次所有handoff工具
+        [exec_tool(agent) for agent in agents]
+        [exec_tool(agent) for agent in agents]
+
+    def per_turn_cached():
+        root.tools()
+        root.update_mapping()
+
+    per_turn_exec_time = timeit.timeit(per_turn_exec, number=turns)
+    per_turn_cached_time = timeit.timeit(per_turn_cached, number=turns)
+
+    print(f'handoffs: {handoffs}, turns: {turns}')
+    print(f'create (exec):       {exec_time * 1e6 / (handoffs * turns):.1f}us per tool')
+    print(f'create (closure):    {closure_time * 1e6 / (handoffs * turns):.1f}us per tool')
+    print(f'per turn (exec):     {per_turn_exec_time * 1e3 / turns:.3f}ms')
+    print(f'per turn (cached):   {per_turn_cached_time * 1e3 / turns:.3f}ms')
+    print(f'speedup per turn:    {per_turn_exec_time / per_turn_cached_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
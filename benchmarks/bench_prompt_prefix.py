@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+提示词前缀复用的诊断
+
+用预置回复模拟一次多轮工具调用的对话（每轮模型先输出一段分析再调用工具，其中部分调用失败），
+分别以默认布局和只追加布局运行，报告相邻请求共享的前缀占比（本地后端可以跳过的prefill比例）
+和前缀之后需要重新prefill的字符数。
+运行方式：python benchmarks/bench_prompt_prefix.py [轮数] [每隔几轮失败一次]
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ['DART_LOG_FILE'] = 'false'
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from DART.core.art import ART
+from DART.core.base.agent import Agent
+from DART.core.types.conversation import shared_prefix
+from DART.core.types.message import UserMessage
+from DART.core.types.runtime_config import RuntimeConfig
+
+
+FAIL_EVERY = 3
+
+
+def search(query: str):
+    """搜索商品信息"""
+    if int(query[1:]) % FAIL_EVERY == 0:
+        raise ValueError('query is too short')
+    return f'{query}的搜索结果：' + '商品信息。' * 50
+
+
+class ScriptedClient:
+    def __init__(self, turns: int):
+        self.models = ['bench']
+        self.turns = turns
+        self.calls = 0
+        self.requests = []
+
+    def create_chat_completion(self, **kwargs):
+        self.requests.append(json.loads(json.dumps(kwargs['messages'])))
+        self.calls += 1
+        yield ChoiceDelta(role='assistant', content=f'第{self.calls}轮分析：' + '继续检索相关信息。' * 20)
+        if self.calls < self.turns:
+            yield ChoiceDelta(tool_calls=[ChoiceDeltaToolCall(
+                index=0, id=f'call_{self.calls}', type='function',
+                function=ChoiceDeltaToolCallFunction(name='search', arguments=json.dumps({'query': f'q{self.calls}'})),
+            )])
+
+
+def run(append_only_prompt: bool, turns: int):
+    runtime_config = RuntimeConfig(api_key='bench', base_url='http://localhost:1/v1', models=['bench'],
+                                   default_model='bench')
+    art = ART(runtime_config, append_only_prompt=append_only_prompt, prefix_stats=True)
+    art.client = ScriptedClient(turns)
+    agent = Agent(name='agent', persona='persona', description='description', tools=[search])
+    history = [UserMessage(content='历史问题。' * 200).to_message()]
+    list(art.run(agent, messages=history, max_chat_times=turns, stop_if_no_tools=True))
+
+    # 上一个请求中有多少字符在下一个请求里原样复用
+    requests = art.client.requests
+    reused = sum(shared_prefix(previous, current) == len(previous) for previous, current in zip(requests, requests[1:]))
+    return art.status.get_prefix_stats(), reused
+
+
+def main():
+    global FAIL_EVERY
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    FAIL_EVERY = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f'turns: {turns}, a tool call fails every {FAIL_EVERY} turns')
+    for label, append_only_prompt in (('default', False), ('append-only', True)):
+        stats, reused = run(append_only_prompt, turns)
+        print(f'{label:<12} requests: {stats["requests"]:3d}  shared: {stats["shared_chars"]:8d} / '
+              f'{stats["total_chars"]:8d} chars ({stats["shared_ratio"]:.1%})  '
+              f'recomputed: {stats["recomputed_chars"]:6d} chars  '
+              f'previous request fully reused: {reused}/{stats["requests"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+DataClass序列化的基准测试
+
+对比之前的实现（to_dict逐层isinstance判断，to_json经过json.dumps(indent=2)和json.loads往返，
+clone经过to_dict和逐个setattr的dict_to_dataclass）与按类编译的to_dict、不经过文本的to_json和clone，
+以及to_bytes的json、orjson和msgpack编码（未安装的格式会跳过）。
+对象为状态记录中常见的Choice（带两个工具调用）、消息和包含消息列表的普通DataClass。
+运行方式：python benchmarks/bench_serialization.py [每项的重复次数]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ['DART_LOG_FILE'] = 'false'
+
+from DART.core.base import data_class
+from DART.core.base.data_class import DataClass
+from DART.core.types.choice import Choice, ToolCall, ToolCallFunction
+from DART.core.types.message import UserMessage
+from DART.utils.formatter import to_str_format
+
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+
+def legacy_unwrap_list(value: list) -> list:
+    result = []
+    for item in value:
+        if isinstance(item, dict):
+            result.append(legacy_unwrap_dict(item))
+        elif isinstance(item, list):
+            result.append(legacy_unwrap_list(item))
+        elif isinstance(item, DataClass):
+            result.append(legacy_to_dict(item, include_none=True))
+        else:
+            result.append(item)
+    return result
+
+
+def legacy_unwrap_dict(value: dict) -> dict:
+    result = {}
+    for key, item in value.items():
+        if isinstance(item, dict):
+            result[key] = legacy_unwrap_dict(item)
+        elif isinstance(item, list):
+            result[key] = legacy_unwrap_list(item)
+        elif isinstance(item, DataClass):
+            result[key] = legacy_to_dict(item, include_none=True)
+        else:
+            result[key] = item
+    return result
+
+
+def legacy_to_dict(obj: DataClass, include_none: bool = True) -> dict:
+    """之前的DataClass.to_dict，属性改为从_items()读取"""
+    if include_none:
+        attrs = {key: value for key, value in obj._items()}
+    else:
+        attrs = {key: value for key, value in obj._items() if value is not None}
+    result = {}
+    for key, value in attrs.items():
+        if isinstance(value, DataClass):
+            result[key] = legacy_to_dict(value, include_none=include_none)
+        elif isinstance(value, dict):
+            result[key] = legacy_unwrap_dict(value)
+        elif isinstance(value, list):
+            result[key] = legacy_unwrap_list(value)
+        else:
+            result[key] = value
+    return result
+
+
+def legacy_to_json(obj: DataClass):
+    return json.loads(to_str_format(legacy_to_dict(obj)))
+
+
+def legacy_dict_to_dataclass(input_dict: dict) -> DataClass:
+    result = DataClass()
+    for key, value in input_dict.items():
+        if isinstance(value, dict):
+            result.set(key, legacy_dict_to_dataclass(value))
+        elif isinstance(value, list):
+            result.set(key, [legacy_dict_to_dataclass(item) if isinstance(item, dict) else item for item in value])
+        else:
+            result.set(key, value)
+    return result
+
+
+def legacy_clone(obj: DataClass):
+    return legacy_dict_to_dataclass(legacy_to_dict(obj))
+
+
+def make_objects():
+    choice = Choice(role='assistant', content='库存充足，可以下单。' * 4, thinking='先查询库存，再回答。')
+    for i in range(2):
+        choice.tool_calls[f'call_{i}'] = ToolCall(index=i, id=f'call_{i}', type='function',
+                                                  function=ToolCallFunction(name='search',
+                                                                            arguments='{"query": "库存"}'))
+    message = UserMessage(content='帮我查一下这个商品的库存', name='user')
+    record = DataClass()
+    record.set('agent', 'assistant')
+    record.set('messages', [UserMessage(content=f'问题{i}') for i in range(4)])
+    record.set('metadata', {'turn': 3, 'tags': ['库存', '下单'], 'config': {'temperature': 0.2}})
+    return {'Choice': choice, 'UserMessage': message, 'record': record}
+
+
+def timeit(func, obj) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(obj)
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    objects = make_objects()
+    for name, obj in objects.items():
+        assert legacy_to_dict(obj) == obj.to_dict(include_none=True)
+        assert legacy_to_json(obj) == obj.to_json(include_none=True)
+        assert legacy_clone(obj).to_dict() == obj.clone().to_dict()
+
+    print(f'repeat: {REPEAT}, times in microseconds per call')
+    print(f'{"object":<12} {"operation":<16} {"legacy":>8} {"new":>8} {"speedup":>8}')
+    for name, obj in objects.items():
+        for operation, legacy, new in (
+                ('to_dict', lambda o: legacy_to_dict(o), lambda o: o.to_dict(include_none=True)),
+                ('to_json', legacy_to_json, lambda o: o.to_json(include_none=True)),
+                ('clone', legacy_clone, lambda o: o.clone(include_none=True)),
+        ):
+            legacy_us, new_us = timeit(legacy, obj), timeit(new, obj)
+            print(f'{name:<12} {operation:<16} {legacy_us:>8.2f} {new_us:>8.2f} {legacy_us / new_us:>7.1f}x')
+        baseline = timeit(lambda o: to_str_format(legacy_to_dict(o)).encode('utf-8'), obj)
+        for format, module in (('json', json), ('orjson', data_class.orjson), ('msgpack', data_class.msgpack)):
+            if module is None:
+                print(f'{name:<12} {"to_bytes " + format:<16} {"skipped, not installed":>26}')
+                continue
+            new_us = timeit(lambda o: o.to_bytes(include_none=True, format=format), obj)
+            size = len(obj.to_bytes(format=format))
+            print(f'{name:<12} {"to_bytes " + format:<16} {baseline:>8.2f} {new_us:>8.2f} {baseline / new_us:>7.1f}x'
+                  f'  {size} bytes')
+
+
+if __name__ == '__main__':
+    main()
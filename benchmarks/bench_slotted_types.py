@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+热路径数据类型的内存和分配基准测试
+
+模拟10k轮对话：每轮创建用户消息、带一个工具调用的Choice、工具结果、工具消息和助手消息，并全部保留（相当于状态记录），
+用tracemalloc统计保留的内存、内存块数和峰值，以及创建和to_dict的耗时。
+文本内容在各轮之间共享，统计的只是对象本身的开销。
+传入另一份源码目录（例如用git worktree检出的旧版本）可以对比改动前后的结果。
+运行方式：python benchmarks/bench_slotted_types.py [轮数] [src目录]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+TURNS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+SRC = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, SRC)
+os.environ['DART_LOG_FILE'] = 'false'
+
+from DART.core.types.choice import Choice, ToolCall, ToolCallFunction
+from DART.core.types.message import AssistantMessage, ToolMessage, UserMessage
+from DART.core.types.tool_result import ToolResult, ToolResultType
+
+QUESTION = '帮我查一下这个商品的库存'
+ANSWER = '库存充足，可以下单。'
+RESULT = '库存：128件'
+
+
+def turn():
+    user = UserMessage(content=QUESTION, name='user')
+    choice = Choice(role='assistant', content=ANSWER)
+    choice.tool_calls[0] = ToolCall(index=0, id='call_0', type='function',
+                                    function=ToolCallFunction(name='search', arguments='{"query": "库存"}'))
+    result = ToolResult(name='search', description='搜索商品信息', result_value=RESULT,
+                        result_type=ToolResultType.STRING.value, success=True)
+    tool = ToolMessage(content=RESULT, name='search', description='搜索商品信息')
+    assistant = AssistantMessage(content=ANSWER, name='agent')
+    return user, choice, result, tool, assistant
+
+
+def main():
+    turn()  # 预先导入和初始化，不计入统计
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    history = [turn() for _ in range(TURNS)]
+    after, peak = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename'))
+
+    start = time.perf_counter()
+    history = [turn() for _ in range(TURNS)]
+    create_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for objects in history:
+        for obj in objects:
+            obj.to_dict()
+    to_dict_seconds = time.perf_counter() - start
+
+    retained = after - before
+    print(f'source: {os.path.abspath(SRC)}')
+    print(f'turns: {TURNS}, objects per turn: {len(history[0]) + 2}')
+    print(f'retained memory: {retained / 1024 / 1024:.2f} MiB ({retained / TURNS:.0f} bytes per turn)')
+    print(f'peak memory:     {(peak - before) / 1024 / 1024:.2f} MiB')
+    print(f'live blocks:     {blocks} ({blocks / TURNS:.1f} per turn)')
+    print(f'create:          {create_seconds * 1e3:.1f} ms ({create_seconds / TURNS * 1e6:.2f} us per turn)')
+    print(f'to_dict:         {to_dict_seconds * 1e3:.1f} ms ({to_dict_seconds / TURNS * 1e6:.2f} us per turn)')
+
+
+if __name__ == '__main__':
+    main()
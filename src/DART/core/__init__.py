@@ -1,4 +1,5 @@
 from .art import ART
+from .async_art import AsyncART
 from .multi_agent_art import MultiAgentART
-from .dag_scheduler import DAGScheduler
+from .dag_scheduler import DAGScheduler, FailurePolicy
 from .task import Task, TaskStatus
\ No newline at end of file
@@ -0,0 +1,239 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .label_generators import LabelGenerator
+from ...art import ART
+from ...types.message import UserMessage
+from ....utils.formatter import to_str_format
+from ....utils.logger import logger
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_MAX_CONCURRENCY = 16
+
+# 形如“- 属性值1，5”的输出行，兼容中英文逗号
+_LABEL_LINE = re.compile(r'^\s*[-*•]?\s*(?P<value>.+?)\s*[，,]\s*(?P<score>[1-5])\s*$')
+_FINAL_MARK = '最终属性值'
+
+
+def parse_label_values(content: str) -> List[Tuple[str, int]]:
+    """解析LabelGenerator回复中的（属性值，分数）对，有“最终属性值”段落时只解析该段落"""
+    if _FINAL_MARK in content:
+        content = content[content.rindex(_FINAL_MARK) + len(_FINAL_MARK):]
+    pairs = []
+    for line in content.splitlines():
+        match = _LABEL_LINE.match(line)
+        if match:
+            pairs.append((match.group('value'), int(match.group('score'))))
+    return pairs
+
+
+def iter_item_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, skip: int = 0) -> Iterator[List[Dict]]:
+    """按块读取JSONL或Parquet文件中的商品，跳过前skip个"""
+    if path.endswith('.parquet'):
+        chunks = _iter_parquet(path, chunk_size)
+    else:
+        chunks = _iter_jsonl(path, chunk_size)
+    for chunk in chunks:
+        if skip >= len(chunk):
+            skip -= len(chunk)
+            continue
+        yield chunk[skip:]
+        skip = 0
+
+
+def _iter_jsonl(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_parquet(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError('reading parquet files requires pyarrow, install it with "pip install pyarrow"') from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+class BatchLabeler:
+    """
+    离线批量打标：按块读取商品，对每个（商品, 属性类别）并发运行LabelGenerator，解析出的（属性值，分数）
+    以JSONL格式追加写入输出文件。每块写完后记录检查点（已读取的商品数、输出文件长度和打标失败的商品序号），
+    中断后重新运行时截掉未提交的输出并从检查点继续，已完成的商品不会重复运行。
+    回复为空或无法解析时该属性类别记为失败，有失败属性的商品不写入输出，下次运行时会先重试这些商品。
+    每次代理运行使用从art分出的独立运行状态，运行结束后丢弃，art自身的状态不受影响。
+    """
+
+    def __init__(
+            self,
+            art: ART,
+            labels: Dict[str, str],
+            output_path: str,
+            checkpoint_path: Optional[str] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+            id_key: str = 'id',
+            item_to_text: Optional[Callable[[Dict], str]] = None,
+            persona: str = '商品属性提取专家',
+    ):
+        """
+        Args:
+            art: 运行LabelGenerator的Agent Runtime环境
+            labels: 属性类别到属性定义的映射
+            output_path: 输出文件路径，每个商品一行
+            checkpoint_path: 检查点文件路径，默认为output_path加上.ckpt
+            chunk_size: 每块读取的商品数
+            max_concurrency: 最多同时运行的代理数
+            id_key: 商品ID的字段名
+            item_to_text: 将商品转换为用户消息内容的函数，默认转换为JSON文本
+            persona: LabelGenerator的角色定位
+        """
+        self.art = art
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f'{output_path}.ckpt'
+        self.chunk_size = chunk_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.id_key = id_key
+        self.item_to_text = item_to_text or to_str_format
+        self.generators = {}
+        for label, definition in labels.items():
+            generator = LabelGenerator(name=f'label_generator_{len(self.generators)}', persona=persona,
+                                       description='')
+            generator.set_action_policy(label=label, definition=definition)
+            self.generators[label] = generator
+
+    def run(self, input_path: str) -> Dict[str, int]:
+        """运行批量打标，返回本次运行处理的商品数（包括重试的商品）、代理运行数和失败数"""
+        stats = {'items': 0, 'runs': 0, 'failed': 0}
+        checkpoint = self._resume()
+        failed = set(checkpoint.get('failed', ()))
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool, \
+                open(self.output_path, 'ab') as output:
+            # 先重试之前运行中打标失败的商品
+            for chunk in self._iter_failed_chunks(input_path, sorted(failed)):
+                self._commit_chunk(pool, output, chunk, checkpoint, failed, stats)
+            index = checkpoint['items']
+            for items in iter_item_chunks(input_path, self.chunk_size, skip=index):
+                chunk = list(enumerate(items, start=index))
+                index += len(items)
+                checkpoint['items'] = index
+                self._commit_chunk(pool, output, chunk, checkpoint, failed, stats)
+        if failed:
+            logger.warning(f'{len(failed)} items have failed labels, they will be retried on the next run')
+        return stats
+
+    def _commit_chunk(
+            self,
+            pool: ThreadPoolExecutor,
+            output,
+            chunk: List[Tuple[int, Dict]],
+            checkpoint: Dict[str, Any],
+            failed: Set[int],
+            stats: Dict[str, int],
+    ) -> None:
+        """为一块（序号, 商品）打标，写入没有失败属性的商品并提交检查点"""
+        records = self._label_chunk(pool, [item for _, item in chunk], stats)
+        lines = []
+        for (index, _), record in zip(chunk, records):
+            if record.get('failed'):
+                failed.add(index)
+            else:
+                failed.discard(index)
+                lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+        output.write(''.join(lines).encode('utf-8'))
+        output.flush()
+        os.fsync(output.fileno())
+
+        checkpoint['output_size'] = output.tell()
+        checkpoint['failed'] = sorted(failed)
+        self._save_checkpoint(checkpoint)
+        stats['items'] += len(chunk)
+        logger.info(f'labeled {checkpoint["items"]} items, {len(failed)} items failed')
+
+    def _iter_failed_chunks(self, input_path: str, indexes: List[int]) -> Iterator[List[Tuple[int, Dict]]]:
+        """按块读取序号在indexes中的商品"""
+        if not indexes:
+            return
+        wanted = set(indexes)
+        chunk = []
+        index = 0
+        for items in iter_item_chunks(input_path, self.chunk_size):
+            for item in items:
+                if index in wanted:
+                    chunk.append((index, item))
+                    if len(chunk) >= self.chunk_size:
+                        yield chunk
+                        chunk = []
+                index += 1
+            if index > indexes[-1]:
+                break
+        if chunk:
+            yield chunk
+
+    def _label_chunk(self, pool: ThreadPoolExecutor, chunk: List[Dict], stats: Dict[str, int]) -> List[Dict]:
+        futures = [
+            [(label, pool.submit(self._label_item, generator, item)) for label, generator in self.generators.items()]
+            for item in chunk
+        ]
+        records = []
+        for item, item_futures in zip(chunk, futures):
+            record = {self.id_key: item.get(self.id_key), 'labels': {}}
+            for label, future in item_futures:
+                stats['runs'] += 1
+                try:
+                    pairs = future.result()
+                except Exception as e:
+                    logger.error(f'Failed to label item {record[self.id_key]} with {label}: {e}')
+                    stats['failed'] += 1
+                    record.setdefault('failed', []).append(label)
+                    continue
+                record['labels'][label] = [{'value': value, 'score': score} for value, score in pairs]
+            records.append(record)
+        return records
+
+    def _label_item(self, generator: LabelGenerator, item: Dict) -> List[Tuple[str, int]]:
+        # 各线程同时运行，每次运行使用独立的状态，记录不会串到其他代理名下，也不会在art的状态中累积
+        art = self.art._fork()
+        content = ''
+        for chunk in art.run(generator, messages=[UserMessage(content=self.item_to_text(item)).to_message()],
+                             stream=False):
+            if isinstance(chunk.get('content'), str):
+                content += chunk['content']
+        pairs = parse_label_values(content)
+        if not pairs:
+            # 请求出错时客户端只记录日志并返回空回复，这里和无法解析的回复一样记为失败
+            raise ValueError(f'empty or unparseable reply: {content[:100]!r}')
+        return pairs
+
+    def _resume(self) -> Dict[str, Any]:
+        """读取检查点，并截掉检查点之后未提交的输出；没有检查点时从头开始，已有的输出保持不变"""
+        output_size = os.path.getsize(self.output_path) if os.path.exists(self.output_path) else 0
+        if not os.path.exists(self.checkpoint_path):
+            return {'items': 0, 'output_size': output_size, 'failed': []}
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if output_size > checkpoint['output_size']:
+            with open(self.output_path, 'r+b') as f:
+                f.truncate(checkpoint['output_size'])
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        # 先写临时文件再替换，保证检查点文件总是完整的
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
@@ -1,31 +1,52 @@
 import copy
-from typing import List, Dict, Any, Generator, Optional
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Generator, Optional, Tuple
 
 from .base.agent import Agent
 from .base.llm import OpenAIClient
-from .constants.configs import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, DEFAULT_MAX_CHAT_TIMES
+from .cache.completion_cache import CompletionCache
+from .constants.configs import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, DEFAULT_MAX_CHAT_TIMES, \
+    DEFAULT_MAX_HANDOFF_WORKERS
+from .context_window import ContextWindow
 from .types.chat_config import ChatConfig
-from .types.choice import Choice
+from .types.choice import Choice, ThinkTagParser
+from .types.conversation import MessageLog, MessageView
+from .types.memory import Memory
 from .types.message import SystemMessage, AssistantMessage, ToolMessage, UserMessage
 from .types.role import Role
 from .types.runtime_config import RuntimeConfig
 from .types.status import AgentRunTimeStatus
 from .types.tool_result import ToolResult, ToolResultType
+from ..utils.cancellation import CancelToken
 from ..utils.formatter import to_str_format
 from ..utils.logger import logger
-from ..utils.tool_utils import create_tool_desc
 
 
 class ART:
     """Agent Runtime环境，负责执行Agent并管理运行时状态"""
 
-    def __init__(self, runtime_config: RuntimeConfig, chat_config: Optional[ChatConfig] = None):
+    def __init__(
+            self,
+            runtime_config: RuntimeConfig,
+            chat_config: Optional[ChatConfig] = None,
+            cache: Optional[CompletionCache] = None,
+            max_handoff_workers: int = DEFAULT_MAX_HANDOFF_WORKERS,
+            append_only_prompt: bool = False,
+            prefix_stats: bool = False,
+    ):
         """
         初始化Agent Runtime环境
 
         Args:
             runtime_config: 运行时配置
             chat_config: 聊天配置
+            cache: 模型回复缓存，相同的请求直接重放缓存的回复，不再调用模型
+            max_handoff_workers: 同一轮中最多同时运行的handoff代理数量
+            append_only_prompt: 只追加的提示词布局。每轮的回复和工具错误提示都写入消息日志，之后的请求与之前的请求
+                前缀逐字节相同，本地vLLM/Ollama后端可以复用前缀的KV缓存；默认布局中它们只作为临时消息附加在末尾
+            prefix_stats: 记录相邻两次请求共享的前缀（见status.get_prefix_stats）。每轮都要序列化整个提示词，
+                只用于诊断，默认关闭
 
         Raises:
             ValueError: 如果runtime_config不是RuntimeConfig实例
@@ -39,15 +60,26 @@ class ART:
         if not self.chat_config.model:
             self.chat_config.model = self.runtime_config.default_model
 
-        self.client = OpenAIClient(
+        self.cache = cache
+        self.context_windows: Dict[str, ContextWindow] = {}
+        self.max_handoff_workers = max(1, max_handoff_workers)
+        self.append_only_prompt = append_only_prompt
+        self.prefix_stats = prefix_stats
+        self.client = self._create_client(OpenAIClient)
+        self.status = AgentRunTimeStatus(runtime_config=self.runtime_config)
+
+    def _create_client(self, client_class):
+        """根据运行时配置创建LLM客户端"""
+        return client_class(
             api_key=self.runtime_config.api_key,
             base_url=self.runtime_config.base_url,
             models=self.runtime_config.models or [],
             default_model=self.runtime_config.default_model or '',
             max_retries=self.runtime_config.max_retries or DEFAULT_MAX_RETRIES,
             timeout=self.runtime_config.timeout or DEFAULT_TIMEOUT,
+            http_client=self.runtime_config.http_client,
+            cache=self.cache,
         )
-        self.status = AgentRunTimeStatus(runtime_config=self.runtime_config)
 
     def run(
             self,
@@ -84,40 +116,50 @@ class ART:
         if not isinstance(agent, Agent):
             raise ValueError(f"agent must be an instance of Agent, but got {type(agent)}")
         debug = kwargs.get('debug', False)
+        cancel_token = kwargs.get('cancel_token')
         self.status.current_agent = agent
 
-        # 初始化运行时环境
-        history = copy.deepcopy(messages)
+        # 初始化运行时环境，消息日志依次为系统消息、历史消息和工具消息，只追加不复制
         sys_mess = SystemMessage(content=create_system_prompt(agent))
+        log = MessageLog([sys_mess.to_message()])
+        memory, query = self._memory_of(agent, messages)
+        log.extend(memory.select_messages(messages, query) if memory is not None else messages)
+        history_end = len(log)
         assi_mess = AssistantMessage(content='', name=agent.name, persona=agent.persona)
         chat_args = self._prepare_chat_args(agent, chat_config)
-        chat_args['tools'] = [create_tool_desc(tool) for tool in agent.tools() if callable(tool)]
+        chat_args['tools'] = agent.tool_descs()
 
-        tool_messages = []
         tool_err_info = []
         tools_called = []
         chat_times = 0
+        previous_messages = None
 
         yield {'runtime_status': 'start'}
 
         while chat_times < max_chat_times:
+            if cancel_token is not None and cancel_token.cancelled:
+                break
             chat_times += 1
             yield {'agent': f'{agent.name} -- {chat_times}'}
             logger.info(f'agent: {agent.name}\nchat_times: {chat_times}')
 
             # 更新消息和工具
-            chat_args['messages'] = self._update_messages_and_tools(
-                sys_mess, history, tool_messages, tool_err_info, assi_mess
+            chat_args['messages'] = self._fit_context(
+                chat_args, self._update_messages_and_tools(
+                    log, tool_err_info, None if self.append_only_prompt else assi_mess
+                )
             )
+            if self.prefix_stats:
+                self.status.add_prefix_stats(previous_messages, chat_args['messages'])
+                previous_messages = chat_args['messages']
 
             if debug:
                 self._log_debug_info(chat_args, tools_called)
 
             # 生成回复
             choice = Choice(role=Role.ASSISTANT.value, content='')
-            for chunk in self._generate_choice(chat_args, choice):
+            for chunk in self._generate_choice(chat_args, choice, cancel_token=cancel_token):
                 yield chunk
-            choice.split_thinking_from_content()
             yield {'choice': choice}
 
             if debug:
@@ -132,10 +174,10 @@ class ART:
 
             # 保存回复内容
             if choice.content or choice.thinking:
-                if include_think:
-                    assi_mess.content += choice.thinking + '\n' + choice.content
-                else:
-                    assi_mess.content += choice.content
+                reply = choice.thinking + '\n' + choice.content if include_think else choice.content
+                assi_mess.content += reply
+                if self.append_only_prompt and reply:
+                    log.append(AssistantMessage(content=reply, name=agent.name, persona=agent.persona).to_message())
 
             # 运行工具调用
             tools_recalled, tool_results = self._process_tool_calls(agent, choice)
@@ -148,19 +190,32 @@ class ART:
                 break
 
             # 更新工具消息
-            init_len = len(tool_messages)
-            tool_messages, tool_err_info, tools_called = self._messages_from_tool_results(
-                tool_results, tool_messages, tools_called, history, chat_config, max_chat_times,
+            init_len = len(log)
+            tool_err_info = yield from self._messages_from_tool_results(
+                tool_results, log, history_end, tools_called, chat_config, max_chat_times,
                 share_tool_results, stop_if_no_tools, include_think, stream, kwargs
             )
+            self.status.current_agent = agent
 
             # 有新的工具消息，重置回复内容
-            if len(tool_messages) > init_len or len(tool_err_info) > 0:
+            if len(log) > init_len or len(tool_err_info) > 0:
                 assi_mess.content = ''
+            if self.append_only_prompt:
+                log.extend(tool_err_info)
+                tool_err_info = []
 
+        if memory is not None:
+            memory.remember(query, assi_mess.content, log.view(history_end))
         yield {'content': assi_mess.content}
         yield {'runtime_status': 'end'}
 
+    @staticmethod
+    def _memory_of(agent: Agent, messages: List) -> Tuple[Optional[Memory], Optional[str]]:
+        """代理的长期记忆，以及用于召回记忆的问题（最后一条用户消息）"""
+        if not isinstance(agent.memory, Memory):
+            return None, None
+        return agent.memory, Memory.last_user_content(messages)
+
     def _prepare_chat_args(self, agent: Agent, chat_config: Optional[ChatConfig], stream: bool = True):
         """准备聊天参数，优先级如下：API > Agent > ART"""
         chat_args = {}
@@ -175,17 +230,31 @@ class ART:
 
     @staticmethod
     def _update_messages_and_tools(
-            sys_mess: SystemMessage,
-            history: List,
-            tool_messages: List,
+            log: MessageLog,
             tool_err_info: List,
-            assi_mess: AssistantMessage,
-    ):
-        """更新聊天纪录和工具列表"""
-        messages = [sys_mess.to_message()] + history + tool_messages + tool_err_info
-        if assi_mess.content:
-            messages.append(assi_mess.to_message())
-        return messages
+            assi_mess: Optional[AssistantMessage],
+    ) -> List:
+        """生成本轮请求的消息列表，工具错误提示和未完成的回复只作为临时消息附加在末尾"""
+        tail = list(tool_err_info)
+        if assi_mess is not None and assi_mess.content:
+            tail.append(assi_mess.to_message())
+        return log.view(tail=tail).to_list()
+
+    def _context_window(self, model: str) -> Optional[ContextWindow]:
+        """模型的上下文窗口，由runtime_config.context_windows中的上下文长度创建，也可以直接设置context_windows"""
+        window = self.context_windows.get(model)
+        if window is None and self.runtime_config.context_windows.get(model):
+            window = self.context_windows.setdefault(
+                model, ContextWindow(self.runtime_config.context_windows[model])
+            )
+        return window
+
+    def _fit_context(self, chat_args: Dict[str, Any], messages: List) -> List:
+        """按模型的token预算裁剪本轮的消息，没有配置预算时原样返回"""
+        window = self._context_window(chat_args.get('model'))
+        if window is None:
+            return messages
+        return window.fit(messages, chat_args.get('tools'))
 
     @staticmethod
     def _log_debug_info(chat_args: Dict[str, Any], tools_called: List[str]) -> None:
@@ -193,21 +262,35 @@ class ART:
         logger.info(f'tools_called: {tools_called}')
         logger.info(f'Chat Args:\n' + to_str_format(chat_args))
 
-    def _generate_choice(self, chat_args: Dict[str, Any], choice: Choice, stream: bool = True) -> Generator:
-        """生成选择"""
+    def _generate_choice(self, chat_args: Dict[str, Any], choice: Choice, stream: bool = True,
+                         cancel_token: Optional[CancelToken] = None) -> Generator:
+        """
+        生成选择，cancel_token被取消时会关闭正在进行的流式请求。
+        流式输出时，除原始的delta外，还会按到达顺序产出thinking_delta和content_delta事件。
+        <think>直到回复结束都未闭合时，会产出thinking_retracted事件，其文本是之前以thinking_delta输出的内容的末尾部分，
+        应从已显示的思考内容中移除，随后这部分文本以content_delta重新输出
+        """
         if chat_args['model'] not in self.client.models:
             raise ValueError(
                 f'model "{chat_args["model"]}" is not supported, the available models are: {self.client.models}'
             )
+        extra_args = {'cancel_token': cancel_token} if cancel_token is not None else {}
         chat_args['stream'] = stream
         if stream:
-            for delta in self.client.create_chat_completion(**chat_args):
+            for delta in self.client.create_chat_completion(**chat_args, **extra_args):
                 yield {'delta': delta}
-                choice.merge_delta(delta)
+                yield from self._segment_events(choice.merge_delta(delta))
+            yield from self._segment_events(choice.split_thinking_from_content())
         else:
             chat_args['stream'] = True
-            for delta in self.client.create_chat_completion(**chat_args):
+            for delta in self.client.create_chat_completion(**chat_args, **extra_args):
                 choice.merge_delta(delta)
+            choice.split_thinking_from_content()
+
+    @staticmethod
+    def _segment_events(segments: List) -> List[Dict[str, str]]:
+        """将Choice解析出的分片转换为thinking_delta/content_delta/thinking_retracted事件"""
+        return [{kind if kind == ThinkTagParser.RETRACTED else f'{kind}_delta': text} for kind, text in segments]
 
     def _process_tool_calls(self, agent: Agent, choice: Choice) -> List:
         """处理工具调用"""
@@ -220,19 +303,23 @@ class ART:
                     tool_results = agent.run_tools_parallel(tools_recalled)
                 else:
                     tool_results = agent.run_tools(tools_recalled)
-                # 记录工具调用历史
-                for tool_call, result in zip(tools_recalled, tool_results):
-                    self.status.add_tool_calls_history(tool_call, result)
-                    if not result.success:
-                        self.status.add_tool_error_history(tool_call, result)
+                self._record_tool_calls(tools_recalled, tool_results)
         return tools_recalled, tool_results
 
+    def _record_tool_calls(self, tools_recalled: List, tool_results: List[ToolResult]) -> None:
+        """记录工具调用历史"""
+        for tool_call, result in zip(tools_recalled, tool_results):
+            self.status.add_tool_calls_history(tool_call, result)
+            self.status.add_tool_cache_result(result)
+            if not result.success:
+                self.status.add_tool_error_history(tool_call, result)
+
     def _messages_from_tool_results(
             self,
             tool_results: List[ToolResult],
-            tool_messages: List,
+            log: MessageLog,
+            history_end: int,
             tools_called: List[str],
-            history: List,
             chat_config: Optional[ChatConfig],
             max_chat_times: int,
             share_tool_results: bool,
@@ -240,57 +327,69 @@ class ART:
             include_think: bool,
             stream: bool,
             kwargs: Dict
-    ):
-        """更新工具消息"""
-        tool_messages = copy.deepcopy(tool_messages)
-        tools_called = copy.deepcopy(tools_called)
+    ) -> Generator:
+        """
+        将工具结果追加到消息日志中，返回调用失败的工具提示消息。
+        同一轮中的handoff代理并发运行，其事件带上代理名称转发给调用方；
+        handoff代理看到的是本轮普通工具消息追加之后的日志，其工具消息按调用顺序追加在最后
+        """
         tool_err_info = []
+        handoffs = []
         for result in tool_results:
             if result.result_type == ToolResultType.STRING.value:
                 tool_mess = ToolMessage(content=result.result_value, name=result.name, description=result.description)
                 if result.success:
                     tools_called.append(result.name)
-                    tool_messages.append(tool_mess.to_message())
+                    log.append(tool_mess.to_message())
                 else:
                     tool_err_info.append(tool_mess)
             elif result.result_type == ToolResultType.AGENT.value:
                 handoff = result.result_value
                 if not isinstance(handoff, Agent):
                     raise ValueError(f"The returned value should be a Agent, but got {type(handoff)}")
+                handoffs.append(handoff)
+            else:
+                error_msg = f'Unknown result type: {result.result_type}'
+                raise ValueError(error_msg)
 
-                # 运行代理并获取内容
-                content = self._run_handoff_agent(
-                    handoff, history, tool_messages, share_tool_results, stop_if_no_tools, include_think,
-                    chat_config, max_chat_times, stream, kwargs
-                )
-
+        if handoffs:
+            # 运行代理并获取内容
+            contents = yield from self._run_handoff_agents(
+                handoffs, self._handoff_messages(log, history_end, share_tool_results), share_tool_results,
+                stop_if_no_tools, include_think, chat_config, max_chat_times, stream, kwargs
+            )
+            for handoff, content in zip(handoffs, contents):
                 if content:
                     tools_called.append(handoff.name)
-                    tool_messages.append(
+                    log.append(
                         ToolMessage(content=content, name=handoff.name, description=handoff.persona).to_message()
                     )
-            else:
-                error_msg = f'Unknown result type: {result.result_type}'
-                raise ValueError(error_msg)
 
-        if tool_err_info:
-            err_tools = [err_tool.name for err_tool in tool_err_info]
-            tool_err_messages = [err_tool.to_message() for err_tool in tool_err_info]
-            tool_err_messages.append(
-                UserMessage(
-                    content=f'根据上下文的聊天内容以及调用工具时返回的错误信息, 重新修正调用工具时所使用的参数（例如，参数内容和参数格式等），重新调用下面列表中的工具：{err_tools}',
-                ).to_message()
-            )
-        else:
-            tool_err_messages = []
+        return self._tool_err_messages(tool_err_info)
 
-        return tool_messages, tool_err_messages, tools_called
+    @staticmethod
+    def _handoff_messages(log: MessageLog, history_end: int, share_tool_results: bool) -> MessageView:
+        """handoff代理看到的消息：历史消息，以及共享时到目前为止的工具消息（不含系统消息）"""
+        return log.view(1) if share_tool_results else log.view(1, history_end)
 
-    def _run_handoff_agent(
+    @staticmethod
+    def _tool_err_messages(tool_err_info: List[ToolMessage]) -> List:
+        """将调用失败的工具信息转换为提示模型重新调用的消息"""
+        if not tool_err_info:
+            return []
+        err_tools = [err_tool.name for err_tool in tool_err_info]
+        tool_err_messages = [err_tool.to_message() for err_tool in tool_err_info]
+        tool_err_messages.append(
+            UserMessage(
+                content=f'根据上下文的聊天内容以及调用工具时返回的错误信息, 重新修正调用工具时所使用的参数（例如，参数内容和参数格式等），重新调用下面列表中的工具：{err_tools}',
+            ).to_message()
+        )
+        return tool_err_messages
+
+    def _run_handoff_agents(
             self,
-            handoff: Agent,
-            history: List,
-            tool_messages: List,
+            handoffs: List[Agent],
+            inner_mess: MessageView,
             share_tool_results: bool,
             stop_if_no_tools: bool,
             include_think: bool,
@@ -298,12 +397,102 @@ class ART:
             max_chat_times: int,
             stream: bool,
             kwargs: Dict
-    ) -> str:
-        """运行handoff代理"""
-        inner_art = handoff.art if isinstance(handoff.art, ART) else self
-        inner_mess = history + tool_messages if share_tool_results else history
+    ) -> Generator:
+        """
+        并发运行同一轮中的handoff代理，最多同时运行max_handoff_workers个。
+        每个代理在独立运行状态的ART中运行，结束后其记录并入所属ART的状态；各代理的事件按到达顺序转发，
+        返回值为按handoffs顺序排列的回复内容。调用方提前关闭生成器时取消仍在运行的代理，不等待它们结束
+        """
+        contents = [''] * len(handoffs)
+        inner_arts = [self._handoff_art(handoff)._fork() for handoff in handoffs]
+
+        # 只有一个代理时直接在当前线程中运行
+        if len(handoffs) == 1:
+            args = (inner_mess, share_tool_results, stop_if_no_tools, include_think, chat_config, max_chat_times,
+                    stream, kwargs)
+            try:
+                for event in self._run_handoff_agent(inner_arts[0], handoffs[0], *args):
+                    contents[0] += self._handoff_content(event)
+                    yield event
+            finally:
+                self._handoff_art(handoffs[0]).status.merge(inner_arts[0].status)
+            return contents
+
+        # 取消令牌同时关闭各代理进行中的流式请求，调用方的取消令牌也会传递给它，本轮结束后注销
+        token = CancelToken()
+        parent_token = kwargs.get('cancel_token')
+        if parent_token is not None:
+            parent_token.add_callback(token.cancel)
+        args = (inner_mess, share_tool_results, stop_if_no_tools, include_think, chat_config, max_chat_times,
+                stream, {**kwargs, 'cancel_token': token})
+        events = queue.Queue()
+        done = object()
+
+        def _worker(index: int, handoff: Agent):
+            agent_events = self._run_handoff_agent(inner_arts[index], handoff, *args)
+            try:
+                for event in agent_events:
+                    if token.cancelled:
+                        break
+                    events.put((index, event))
+            finally:
+                agent_events.close()
+                events.put((index, done))
+
+        # 每轮使用独立的线程池，嵌套的handoff不会因等待同一个线程池而死锁
+        pool = ThreadPoolExecutor(max_workers=min(self.max_handoff_workers, len(handoffs)),
+                                  thread_name_prefix='handoff')
+        try:
+            futures = [pool.submit(_worker, index, handoff) for index, handoff in enumerate(handoffs)]
+            running = len(handoffs)
+            while running:
+                index, event = events.get()
+                if event is done:
+                    running -= 1
+                    # 代理的状态只在当前线程中并入，不会与其他代理同时修改
+                    self._handoff_art(handoffs[index]).status.merge(inner_arts[index].status)
+                    continue
+                contents[index] += self._handoff_content(event)
+                yield event
+            for future in futures:
+                future.result()
+        finally:
+            if parent_token is not None:
+                parent_token.remove_callback(token.cancel)
+            token.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return contents
+
+    def _handoff_art(self, handoff: Agent) -> 'ART':
+        """运行handoff代理的ART：代理自己的ART，没有时为当前ART"""
+        return handoff.art if isinstance(handoff.art, ART) else self
+
+    def _fork(self) -> 'ART':
+        """与当前ART共享客户端、缓存和配置，但运行状态独立的ART"""
+        art = copy.copy(self)
+        art.status = AgentRunTimeStatus(runtime_config=self.runtime_config)
+        return art
+
+    @staticmethod
+    def _handoff_content(event: Dict) -> str:
+        """handoff代理事件中的回复内容"""
+        content = event['event'].get('content')
+        return content if isinstance(content, str) else ''
 
-        content = ''
+    @staticmethod
+    def _run_handoff_agent(
+            inner_art: 'ART',
+            handoff: Agent,
+            inner_mess: MessageView,
+            share_tool_results: bool,
+            stop_if_no_tools: bool,
+            include_think: bool,
+            chat_config: Optional[ChatConfig],
+            max_chat_times: int,
+            stream: bool,
+            kwargs: Dict
+    ) -> Generator:
+        """在inner_art中运行handoff代理，将其事件包装为{'handoff': 代理名称, 'event': 事件}"""
         for chunk in inner_art.run(
                 agent=handoff,
                 messages=inner_mess,
@@ -315,10 +504,7 @@ class ART:
                 stream=stream,
                 **kwargs
         ):
-            if 'content' in chunk and isinstance(chunk['content'], str):
-                content += chunk['content']
-        return content
-
+            yield {'handoff': handoff.name, 'event': chunk}
 
 def create_system_prompt(agent: Agent) -> str:
     """创建系统提示"""
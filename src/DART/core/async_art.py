@@ -0,0 +1,364 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncGenerator, Optional
+
+from .art import ART, create_system_prompt
+from .base.agent import Agent
+from .base.llm import AsyncOpenAIClient
+from .cache.completion_cache import CompletionCache
+from .constants.configs import DEFAULT_MAX_CHAT_TIMES, DEFAULT_MAX_TOOL_WORKERS, DEFAULT_MAX_HANDOFF_WORKERS
+from .types.chat_config import ChatConfig
+from .types.choice import Choice
+from .types.conversation import MessageLog, MessageView
+from .types.message import SystemMessage, AssistantMessage, ToolMessage
+from .types.role import Role
+from .types.runtime_config import RuntimeConfig
+from .types.tool_result import ToolResult, ToolResultType
+from ..utils.formatter import to_str_format
+from ..utils.logger import logger
+
+
+class AsyncART(ART):
+    """基于asyncio的Agent Runtime环境，单个事件循环即可同时服务大量对话"""
+
+    def __init__(
+            self,
+            runtime_config: RuntimeConfig,
+            chat_config: Optional[ChatConfig] = None,
+            max_tool_workers: int = DEFAULT_MAX_TOOL_WORKERS,
+            cache: Optional[CompletionCache] = None,
+            max_handoff_workers: int = DEFAULT_MAX_HANDOFF_WORKERS,
+            append_only_prompt: bool = False,
+            prefix_stats: bool = False,
+    ):
+        """
+        初始化异步Agent Runtime环境
+
+        Args:
+            runtime_config: 运行时配置
+            chat_config: 聊天配置
+            max_tool_workers: 执行同步工具的线程池大小
+            cache: 模型回复缓存
+            max_handoff_workers: 同一轮中最多同时运行的handoff代理数量
+            append_only_prompt: 只追加的提示词布局，见ART
+            prefix_stats: 记录相邻两次请求共享的前缀，见ART
+
+        Raises:
+            ValueError: 如果runtime_config不是RuntimeConfig实例
+        """
+        super().__init__(runtime_config, chat_config, cache=cache, max_handoff_workers=max_handoff_workers,
+                         append_only_prompt=append_only_prompt, prefix_stats=prefix_stats)
+        self.tool_executor = ThreadPoolExecutor(max_workers=max_tool_workers)
+
+    def _create_client(self, client_class):
+        return super()._create_client(AsyncOpenAIClient)
+
+    async def run(
+            self,
+            agent: Agent,
+            messages: List,
+            chat_config: Optional[ChatConfig] = None,
+            max_chat_times: int = DEFAULT_MAX_CHAT_TIMES,
+            share_tool_results: bool = True,
+            stop_if_no_tools: bool = True,
+            include_think: bool = False,
+            stream: bool = True,
+            **kwargs
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        运行Agent处理消息，产出的事件与ART.run一致
+
+        Args:
+            agent: 要运行的Agent实例
+            messages: 消息列表
+            chat_config: 聊天配置
+            max_chat_times: 最大对话次数
+            share_tool_results: 是否共享工具结果
+            stop_if_no_tools: 如果没有工具可用，是否停止运行
+            include_think: 是否在回复的内容中包含思考过程
+            stream: 是否使用流式输出
+            **kwargs: 额外参数
+
+        Yields:
+            运行状态和结果
+
+        Raises:
+            ValueError: 如果agent不是Agent实例或结果类型不正确
+        """
+        if not isinstance(agent, Agent):
+            raise ValueError(f"agent must be an instance of Agent, but got {type(agent)}")
+        debug = kwargs.get('debug', False)
+        self.status.current_agent = agent
+
+        # 初始化运行时环境
+        sys_mess = SystemMessage(content=create_system_prompt(agent))
+        log = MessageLog([sys_mess.to_message()])
+        memory, query = self._memory_of(agent, messages)
+        if memory is not None:
+            # 向量化可能调用远程模型，放到线程池中执行
+            messages = await asyncio.get_running_loop().run_in_executor(
+                self.tool_executor, memory.select_messages, messages, query
+            )
+        log.extend(messages)
+        history_end = len(log)
+        assi_mess = AssistantMessage(content='', name=agent.name, persona=agent.persona)
+        chat_args = self._prepare_chat_args(agent, chat_config)
+        chat_args['tools'] = agent.tool_descs()
+
+        tool_err_info = []
+        tools_called = []
+        chat_times = 0
+        previous_messages = None
+
+        yield {'runtime_status': 'start'}
+
+        while chat_times < max_chat_times:
+            chat_times += 1
+            yield {'agent': f'{agent.name} -- {chat_times}'}
+            logger.info(f'agent: {agent.name}\nchat_times: {chat_times}')
+
+            # 更新消息和工具
+            chat_args['messages'] = self._fit_context(
+                chat_args, self._update_messages_and_tools(
+                    log, tool_err_info, None if self.append_only_prompt else assi_mess
+                )
+            )
+            if self.prefix_stats:
+                self.status.add_prefix_stats(previous_messages, chat_args['messages'])
+                previous_messages = chat_args['messages']
+
+            if debug:
+                self._log_debug_info(chat_args, tools_called)
+
+            # 生成回复
+            choice = Choice(role=Role.ASSISTANT.value, content='')
+            async for chunk in self._agenerate_choice(chat_args, choice):
+                yield chunk
+            yield {'choice': choice}
+
+            if debug:
+                logger.info('Choice: \n' + to_str_format(choice.to_dict()))
+
+            # 记录执行结果
+            self.status.add_chat_history(chat_args=chat_args, choice=choice)
+
+            # 回复为空，运行结束
+            if choice.is_empty():
+                break
+
+            # 保存回复内容
+            if choice.content or choice.thinking:
+                reply = choice.thinking + '\n' + choice.content if include_think else choice.content
+                assi_mess.content += reply
+                if self.append_only_prompt and reply:
+                    log.append(AssistantMessage(content=reply, name=agent.name, persona=agent.persona).to_message())
+
+            # 运行工具调用
+            tools_recalled, tool_results = await self._aprocess_tool_calls(agent, choice)
+            yield {'tools_recalled': tools_recalled}
+
+            # 不用调用工具，运行结束
+            if stop_if_no_tools and len(tools_recalled) == 0:
+                break
+            if not agent.execute_tools:
+                break
+
+            # 更新工具消息
+            init_len = len(log)
+            tool_err_info = []
+            async for event in self._amessages_from_tool_results(
+                    tool_results, log, history_end, tools_called, tool_err_info, chat_config, max_chat_times,
+                    share_tool_results, stop_if_no_tools, include_think, stream, kwargs
+            ):
+                yield event
+            self.status.current_agent = agent
+
+            # 有新的工具消息，重置回复内容
+            if len(log) > init_len or len(tool_err_info) > 0:
+                assi_mess.content = ''
+            if self.append_only_prompt:
+                log.extend(tool_err_info)
+                tool_err_info = []
+
+        if memory is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self.tool_executor, memory.remember, query, assi_mess.content, log.view(history_end)
+            )
+        yield {'content': assi_mess.content}
+        yield {'runtime_status': 'end'}
+
+    async def _agenerate_choice(self, chat_args: Dict[str, Any], choice: Choice, stream: bool = True):
+        """生成选择"""
+        if chat_args['model'] not in self.client.models:
+            raise ValueError(
+                f'model "{chat_args["model"]}" is not supported, the available models are: {self.client.models}'
+            )
+        chat_args['stream'] = True
+        async for delta in self.client.create_chat_completion(**chat_args):
+            segments = choice.merge_delta(delta)
+            if stream:
+                yield {'delta': delta}
+                for event in self._segment_events(segments):
+                    yield event
+        segments = choice.split_thinking_from_content()
+        if stream:
+            for event in self._segment_events(segments):
+                yield event
+
+    async def _aprocess_tool_calls(self, agent: Agent, choice: Choice):
+        """处理工具调用，协程工具直接await，同步工具交给有界线程池执行"""
+        tools_recalled = []
+        tool_results = []
+        if choice.tool_calls:
+            tools_recalled = list(choice.tool_calls.values())
+            if agent.execute_tools:
+                tool_results = await agent.arun_tools(
+                    tools_recalled, executor=self.tool_executor, parallel=agent.parallel_execute
+                )
+                self._record_tool_calls(tools_recalled, tool_results)
+        return tools_recalled, tool_results
+
+    async def _amessages_from_tool_results(
+            self,
+            tool_results: List[ToolResult],
+            log: MessageLog,
+            history_end: int,
+            tools_called: List[str],
+            tool_err_messages: List,
+            chat_config: Optional[ChatConfig],
+            max_chat_times: int,
+            share_tool_results: bool,
+            stop_if_no_tools: bool,
+            include_think: bool,
+            stream: bool,
+            kwargs: Dict
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        将工具结果追加到消息日志中，调用失败的工具提示消息写入tool_err_messages。
+        同一轮中的handoff代理并发运行，其事件带上代理名称转发给调用方
+        """
+        tool_err_info = []
+        handoffs = []
+        for result in tool_results:
+            if result.result_type == ToolResultType.STRING.value:
+                tool_mess = ToolMessage(content=result.result_value, name=result.name, description=result.description)
+                if result.success:
+                    tools_called.append(result.name)
+                    log.append(tool_mess.to_message())
+                else:
+                    tool_err_info.append(tool_mess)
+            elif result.result_type == ToolResultType.AGENT.value:
+                handoff = result.result_value
+                if not isinstance(handoff, Agent):
+                    raise ValueError(f"The returned value should be a Agent, but got {type(handoff)}")
+                handoffs.append(handoff)
+            else:
+                error_msg = f'Unknown result type: {result.result_type}'
+                raise ValueError(error_msg)
+
+        if handoffs:
+            # 运行代理并获取内容
+            contents = [''] * len(handoffs)
+            async for index, event in self._arun_handoff_agents(
+                    handoffs, self._handoff_messages(log, history_end, share_tool_results), share_tool_results,
+                    stop_if_no_tools, chat_config, max_chat_times, stream, kwargs
+            ):
+                contents[index] += self._handoff_content(event)
+                yield event
+            for handoff, content in zip(handoffs, contents):
+                if content:
+                    tools_called.append(handoff.name)
+                    log.append(
+                        ToolMessage(content=content, name=handoff.name, description=handoff.persona).to_message()
+                    )
+
+        tool_err_messages.extend(self._tool_err_messages(tool_err_info))
+
+    async def _arun_handoff_agents(
+            self,
+            handoffs: List[Agent],
+            inner_mess: MessageView,
+            share_tool_results: bool,
+            stop_if_no_tools: bool,
+            chat_config: Optional[ChatConfig],
+            max_chat_times: int,
+            stream: bool,
+            kwargs: Dict
+    ) -> AsyncGenerator:
+        """
+        并发运行同一轮中的handoff代理，最多同时运行max_handoff_workers个，按到达顺序产出(代理序号, 事件)。
+        每个代理在独立运行状态的AsyncART中运行，结束后其记录并入所属AsyncART的状态
+        """
+        args = (inner_mess, share_tool_results, stop_if_no_tools, chat_config, max_chat_times, stream, kwargs)
+        inner_arts = [self._handoff_art(handoff)._fork() for handoff in handoffs]
+
+        # 只有一个代理时直接运行
+        if len(handoffs) == 1:
+            try:
+                async for event in self._arun_handoff_agent(inner_arts[0], handoffs[0], *args):
+                    yield 0, event
+            finally:
+                self._handoff_art(handoffs[0]).status.merge(inner_arts[0].status)
+            return
+
+        events = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_handoff_workers)
+        done = object()
+
+        async def _worker(index: int, handoff: Agent):
+            try:
+                async with semaphore:
+                    async for event in self._arun_handoff_agent(inner_arts[index], handoff, *args):
+                        await events.put((index, event))
+            finally:
+                # 所有代理都运行在同一个事件循环中，并入状态时不会同时修改
+                self._handoff_art(handoff).status.merge(inner_arts[index].status)
+                events.put_nowait((index, done))
+
+        tasks = [asyncio.create_task(_worker(index, handoff)) for index, handoff in enumerate(handoffs)]
+        try:
+            running = len(tasks)
+            while running:
+                index, event = await events.get()
+                if event is done:
+                    running -= 1
+                    continue
+                yield index, event
+            for task in tasks:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _handoff_art(self, handoff: Agent) -> 'AsyncART':
+        return handoff.art if isinstance(handoff.art, AsyncART) else self
+
+    @staticmethod
+    async def _arun_handoff_agent(
+            inner_art: 'AsyncART',
+            handoff: Agent,
+            inner_mess: MessageView,
+            share_tool_results: bool,
+            stop_if_no_tools: bool,
+            chat_config: Optional[ChatConfig],
+            max_chat_times: int,
+            stream: bool,
+            kwargs: Dict
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """在inner_art中运行handoff代理，将其事件包装为{'handoff': 代理名称, 'event': 事件}"""
+        async for chunk in inner_art.run(
+                agent=handoff,
+                messages=inner_mess,
+                chat_config=chat_config,
+                max_chat_times=max_chat_times,
+                share_tool_results=share_tool_results,
+                stop_if_no_tools=stop_if_no_tools,
+                include_think=False,
+                stream=stream,
+                **kwargs
+        ):
+            yield {'handoff': handoff.name, 'event': chunk}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭执行同步工具的线程池"""
+        self.tool_executor.shutdown(wait=wait)
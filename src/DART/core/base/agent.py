@@ -1,15 +1,20 @@
+import asyncio
+import inspect
 import json
+from concurrent.futures import Executor
 from typing import Dict, Callable, Optional, List, Any
 
 from .data_class import DataClass
+from ..cache.tool_cache import ToolCache
 from ..types.chat_config import ChatConfig
 from ..types.choice import ToolCall
 from ..types.context import Context
 from ..types.dataset import DataSet
 from ..types.memory import Memory
+from ..tools.executor import ToolExecutor, ToolExecutionError, default_tool_executor
+from ..tools.handoff import HandoffTool
+from ..tools.registry import ToolRegistry
 from ..types.tool_result import ToolResult, ToolResultType
-from ...utils.create_tool import create_tool
-from ...utils.multi_processes import multi_process_run
 
 
 class Agent(DataClass):
@@ -29,6 +34,8 @@ class Agent(DataClass):
             ignore_handoffs: bool = False,
             ignore_tools: bool = False,
             art: Any = None,
+            tool_executor: Optional[ToolExecutor] = None,
+            tool_cache: Optional[ToolCache] = None,
             **kwargs
     ):
         super().__init__()
@@ -62,8 +69,19 @@ class Agent(DataClass):
         self.ignore_handoffs = ignore_handoffs
         self.ignore_tools = ignore_tools
         self.art = art
+
+        """The executor for parallel tool calls. The process-wide shared executor is used if None."""
+        self.tool_executor = tool_executor
+
+        """Opt-in memoization of tool results. Share one instance between agents to share cached results."""
+        self.tool_cache = tool_cache
         self.kwargs = kwargs
 
+        # compiled tool payloads and the cached tool form of this agent when used as a handoff
+        self._tool_registry = ToolRegistry()
+        self._handoff_tool = None
+        self._handoff_tool_key = None
+
         # create tools mapping used in run_tool
         self.tools_mapping = {}
         self.handoffs_mapping = {}
@@ -88,19 +106,27 @@ class Agent(DataClass):
             )
         return tools
 
+    def tool_descs(self, excludes: List[str] = None) -> List[dict]:
+        """The tool payload sent to the model, compiled once and reused while the tools are unchanged."""
+        return self._tool_registry.tool_descs(self.tools(excludes))
+
     def set_tools(self, tools: List[Callable]):
         self.__tools__ = [tool for tool in tools if callable(tool)]
+        self._tool_registry.invalidate()
 
     def add_tool(self, tool: Callable):
         if callable(tool):
             self.__tools__.append(tool)
+            self._tool_registry.invalidate()
 
     def set_handoffs(self, handoffs: List['Agent']):
         self.__handoffs__ = [agent for agent in handoffs if isinstance(agent, Agent)]
+        self._tool_registry.invalidate()
 
     def add_handoff(self, handoff: 'Agent'):
         if isinstance(handoff, Agent):
             self.__handoffs__.append(handoff)
+            self._tool_registry.invalidate()
 
     def update_mapping(self):
         self.tools_mapping = {
@@ -116,41 +142,95 @@ class Agent(DataClass):
         return results
 
     def run_tools_parallel(self, tool_calls: List[ToolCall]) -> List[ToolResult]:
+        """
+        Run tool calls concurrently on the agent's tool executor. Handoffs and unknown tools are resolved
+        inline since they do no work; failures and timeouts are returned as ToolResult(success=False).
+        """
         self.update_mapping()
-        tool_results = multi_process_run(
-            self._run_tool_, tool_calls, keep_order=True,
-        )
-        results = []
-        for tool, result in zip(tool_calls, tool_results):
-            if isinstance(result, str) and 'Executor Run Error' in result:
-                result = ToolResult(
-                    name=tool.function.name,
-                    result_value=result,
-                    result_type=ToolResultType.STRING.value,
-                    success=False,
+        executor = self.tool_executor or default_tool_executor()
+        results: List[Optional[ToolResult]] = [None] * len(tool_calls)
+        pending = []
+        for i, tool in enumerate(tool_calls):
+            func_name = tool.function.name
+            func = self.tools_mapping.get(func_name)
+            if func is None:
+                results[i] = self._run_tool_(tool)
+                continue
+            cache_key = self._tool_cache_key_(func_name, tool.function.arguments)
+            cached = self._cached_tool_result_(cache_key, func_name, func.__doc__)
+            if cached is not None:
+                results[i] = cached
+                continue
+            try:
+                kwargs = json.loads(tool.function.arguments)
+            except Exception as e:
+                results[i] = self._tool_result_(func_name, func.__doc__,
+                                                self._tool_error_(func_name, tool.function.arguments, e), False)
+                continue
+            pending.append((i, tool, func, kwargs, cache_key))
+
+        outcomes = executor.run_calls([(tool.function.name, func, kwargs) for _, tool, func, kwargs, _ in pending])
+        for (i, tool, func, _, cache_key), outcome in zip(pending, outcomes):
+            func_name = tool.function.name
+            if isinstance(outcome, ToolExecutionError):
+                outcome = self._tool_error_(func_name, tool.function.arguments, outcome)
+                results[i] = self._tool_result_(func_name, func.__doc__, outcome, False)
+            else:
+                results[i] = self._store_tool_result_(
+                    cache_key, self._tool_result_(func_name, func.__doc__, outcome, True)
                 )
-            results.append(result)
         return results
 
+    async def arun_tools(self, tool_calls: List[ToolCall], executor: Optional[Executor] = None,
+                         parallel: bool = False) -> List[ToolResult]:
+        """
+        Run tool calls on the running event loop. Coroutine tools are awaited natively, while sync tools are
+        offloaded to `executor` (the loop's default executor if None).
+        """
+        self.update_mapping()
+        if parallel:
+            return list(await asyncio.gather(*[self._arun_tool_(tool, executor) for tool in tool_calls]))
+        return [await self._arun_tool_(tool, executor) for tool in tool_calls]
+
+    async def _arun_tool_(self, tool: ToolCall, executor: Optional[Executor] = None):
+        func_name = tool.function.name
+        func = self.tools_mapping.get(func_name)
+        if func is not None and inspect.iscoroutinefunction(func):
+            func_args = tool.function.arguments
+            cache_key = self._tool_cache_key_(func_name, func_args)
+            cached = self._cached_tool_result_(cache_key, func_name, func.__doc__)
+            if cached is not None:
+                return cached
+            try:
+                func_result = await func(**json.loads(func_args))
+                return_status = True
+            except Exception as e:
+                func_result = self._tool_error_(func_name, func_args, e)
+                return_status = False
+            return self._store_tool_result_(
+                cache_key, self._tool_result_(func_name, func.__doc__, func_result, return_status)
+            )
+        return await asyncio.get_running_loop().run_in_executor(executor, self._run_tool_, tool)
+
     def _run_tool_(self, tool: ToolCall):
         func_name = tool.function.name
         if func_name in self.tools_mapping:
             func_args = tool.function.arguments
             func = self.tools_mapping[func_name]
             func_doc = func.__doc__
+            cache_key = self._tool_cache_key_(func_name, func_args)
+            cached = self._cached_tool_result_(cache_key, func_name, func_doc)
+            if cached is not None:
+                return cached
             try:
                 func_result = func(**json.loads(func_args))
                 return_status = True
             except Exception as e:
-                func_result = '\n'.join(
-                    [
-                        "Tool Call Error:",
-                        f"\t**Tool Name**: {func_name}",
-                        f"\t**Arguments Used**: {func_args}",
-                        f"\t**Error Information**: {e}"
-                    ]
-                )
+                func_result = self._tool_error_(func_name, func_args, e)
                 return_status = False
+            return self._store_tool_result_(
+                cache_key, self._tool_result_(func_name, func_doc, func_result, return_status)
+            )
         elif func_name in self.handoffs_mapping:
             func = self.handoffs_mapping[func_name]
             func_doc = func.__doc__
@@ -177,6 +257,43 @@ class Agent(DataClass):
             )
             return_status = False
 
+        return self._tool_result_(func_name, func_doc, func_result, return_status)
+
+    def _tool_cache_key_(self, func_name: str, func_args: str) -> Optional[str]:
+        if self.tool_cache is None or not self.tool_cache.enabled_for(func_name):
+            return None
+        return self.tool_cache.key(func_name, func_args)
+
+    def _cached_tool_result_(self, cache_key: Optional[str], func_name: str, func_doc: str) -> Optional[ToolResult]:
+        if cache_key is None:
+            return None
+        value = self.tool_cache.get(cache_key)
+        if value is None:
+            return None
+        return ToolResult(name=func_name, description=func_doc, result_value=value,
+                          result_type=ToolResultType.STRING.value, success=True, cached=True)
+
+    def _store_tool_result_(self, cache_key: Optional[str], result: ToolResult) -> ToolResult:
+        # only successful string results are cached; handoffs return agents and are never cached
+        if cache_key is not None:
+            result.cached = False
+            if result.success and result.result_type == ToolResultType.STRING.value:
+                self.tool_cache.set(cache_key, result.result_value)
+        return result
+
+    @staticmethod
+    def _tool_error_(func_name: str, func_args: str, error: Exception) -> str:
+        return '\n'.join(
+            [
+                "Tool Call Error:",
+                f"\t**Tool Name**: {func_name}",
+                f"\t**Arguments Used**: {func_args}",
+                f"\t**Error Information**: {error}"
+            ]
+        )
+
+    @staticmethod
+    def _tool_result_(func_name: str, func_doc: str, func_result: Any, return_status: bool) -> ToolResult:
         if isinstance(func_result, str):
             result = ToolResult(name=func_name, description=func_doc, result_value=func_result,
                                 result_type=ToolResultType.STRING.value, success=return_status)
@@ -189,23 +306,15 @@ class Agent(DataClass):
         return result
 
     def to_tool(self) -> Callable:
-        return transfer_agent_to_tool(self)
+        # the tool only depends on these fields, so it is rebuilt only when one of them changes
+        key = (self.name, self.persona, self.description)
+        if self._handoff_tool is None or self._handoff_tool_key != key:
+            self._handoff_tool = transfer_agent_to_tool(self)
+            self._handoff_tool_key = key
+        return self._handoff_tool
 
 
 def transfer_agent_to_tool(agent: Agent) -> Callable:
-    def return_agent(handoff: Agent):
-        return handoff
-
     if not isinstance(agent, Agent):
         raise ValueError(f'agent must be an Agent instance, but got {type(agent)}')
-
-    doc = ''.join(
-        [
-            '调用该工具将返回一个Agent智能体，该智能体对应的角色定位和任务描述如下：\n',
-            f'**角色定位**：\n{agent.persona}\n\n\n',
-            f'**任务描述**：\n{agent.description}',
-        ]
-    )
-    return create_tool(
-        name=agent.name, doc=doc, api=return_agent, args={'handoff': agent},
-    )
+    return HandoffTool(agent)
@@ -0,0 +1,220 @@
+import asyncio
+import queue
+import threading
+from typing import Any, List, Optional
+
+from openai import AsyncOpenAI
+
+from .llm import OpenAIClient
+from ..cache.completion_cache import CompletionCache
+from ..constants.configs import DEFAULT_MAX_IN_FLIGHT, DEFAULT_EMBEDDING_BATCH_SIZE
+from ...utils.logger import logger
+
+_END = object()
+
+
+class _PendingRequest:
+    __slots__ = ('chat_args', 'results', 'task', 'cancelled')
+
+    def __init__(self, chat_args: dict):
+        self.chat_args = chat_args
+        self.results = queue.Queue()
+        self.task = None
+        self.cancelled = False
+
+
+class BatchingClient(OpenAIClient):
+    """
+    A drop-in OpenAIClient for local vLLM/Ollama servers that lets many threads share one dispatcher.
+
+    Requests from any thread are sent as soon as they arrive by a background event loop, over one async
+    connection pool, with at most `max_in_flight` requests open at a time. The client does not merge requests
+    itself: keeping many requests open lets the server's continuous batching fill its batches, without a
+    thread and connection per call. Streamed deltas are routed back to the calling generator.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str,
+            models: List | None = None,
+            default_model: str | None = None,
+            cache: Optional[CompletionCache] = None,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            **kwargs
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.requests = 0
+        self._loop = None
+        self._in_flight = None
+        self._lock = threading.Lock()
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            models=models,
+            default_model=default_model,
+            cache=cache,
+            **kwargs
+        )
+
+    def _create_client(self):
+        # only used on the dispatcher loop, so one async pool serves every calling thread
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            http_client=self.http_client if hasattr(self.http_client, 'aclose') else None,
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                started = threading.Event()
+                self._loop = asyncio.new_event_loop()
+
+                def run():
+                    asyncio.set_event_loop(self._loop)
+                    self._in_flight = asyncio.Semaphore(self.max_in_flight)
+                    started.set()
+                    self._loop.run_forever()
+
+                threading.Thread(target=run, name='batching-client', daemon=True).start()
+                started.wait()
+            return self._loop
+
+    def _start(self, request: _PendingRequest):
+        if request.cancelled:
+            # cancelled before it reached the loop, never sent
+            request.results.put(_END)
+            return
+        self.requests += 1
+        request.task = asyncio.get_running_loop().create_task(self._send(request))
+        # a done callback also runs for a task cancelled before it started, when _send's body never runs
+        request.task.add_done_callback(lambda _: request.results.put(_END))
+
+    async def _send(self, request: _PendingRequest):
+        try:
+            async with self._in_flight:
+                if request.chat_args.get('stream'):
+                    response = await self.client.chat.completions.create(**request.chat_args)
+                    try:
+                        async for chunk in response:
+                            request.results.put(chunk.choices[0].delta)
+                    finally:
+                        await response.close()
+                else:
+                    response = await self.client.chat.completions.create(**request.chat_args)
+                    request.results.put(response.choices[0].message)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            request.results.put(e)
+
+    def _cancel(self, request: _PendingRequest):
+        # a request that has not been started yet is released by _start
+        request.cancelled = True
+        if request.task is not None:
+            request.task.cancel()
+
+    def _llm_response(
+            self,
+            messages: list,
+            model: str,
+            tools=None,
+            max_tokens=None,
+            temperature=None,
+            tool_choice=None,
+            timeout=None,
+            stream=True,
+            cancel_token=None,
+            **kwargs
+    ):
+        if not isinstance(self.client, AsyncOpenAI):
+            raise ValueError("client is not an instance of AsyncOpenAI")
+
+        chat_args = self._build_chat_args(messages, model, tools, max_tokens, temperature, tool_choice, timeout,
+                                          kwargs)
+
+        chat_args['stream'] = stream
+        cache_key = self.cache.key(chat_args) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from cached
+                return None
+
+        loop = self._ensure_loop()
+        request = _PendingRequest(chat_args)
+        loop.call_soon_threadsafe(self._start, request)
+
+        def cancel():
+            loop.call_soon_threadsafe(self._cancel, request)
+
+        if cancel_token is not None:
+            cancel_token.add_callback(cancel)
+
+        items = []
+        finished = False
+        try:
+            while True:
+                item = request.results.get()
+                if item is _END:
+                    finished = True
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f'Error in getting chat completion from openai: {item}')
+                    return None
+                items.append(item)
+                yield item
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(cancel)
+            if not finished:
+                # the caller stopped early, release the connection
+                loop.call_soon_threadsafe(self._cancel, request)
+
+        if cancel_token is not None and cancel_token.cancelled:
+            logger.info('Chat completion is cancelled')
+            return None
+        if cache_key is not None:
+            self.cache.set(cache_key, items, stream=stream)
+
+    def create_embedding(
+            self,
+            input: str | List[str],
+            model: str = None,
+            batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+            **kwargs
+    ) -> List[List[float]]:
+        """Embed texts on the dispatcher loop; the batches are sent concurrently over the shared pool."""
+        model = model or self.default_model
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with self._in_flight:
+                return self._embeddings_of(await self.client.embeddings.create(model=model, input=batch, **kwargs))
+
+        loop = self._ensure_loop()
+        futures = [asyncio.run_coroutine_threadsafe(embed(batch), loop)
+                   for batch in self._embedding_batches(input, batch_size)]
+        return [embedding for future in futures for embedding in future.result()]
+
+    def close(self) -> None:
+        """Cancel the requests in flight and stop the dispatcher loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def cancel_all():
+            # requests submitted before this coroutine have been started, so cancelling their tasks releases
+            # every caller through the tasks' done callbacks
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancel_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        # the async pool belonged to the stopped loop
+        self.client = self._create_client()
@@ -0,0 +1,80 @@
+import threading
+from typing import Optional, Dict, Tuple, Any
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx ships with openai, but keep the registry optional
+    httpx = None
+
+from ..constants.configs import (
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_HTTP2,
+)
+from ...utils.logger import logger
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of keep-alive `httpx.Client` pools keyed by (base_url, api_key). Every OpenAIClient
+    for the same endpoint (one per ART, MultiAgentART and handoff agent) reuses one pool, so connections and
+    TLS sessions survive across agents instead of being re-established per instance.
+    """
+
+    def __init__(
+            self,
+            max_connections: Optional[int] = DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections: Optional[int] = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry: Optional[float] = DEFAULT_KEEPALIVE_EXPIRY,
+            http2: bool = DEFAULT_HTTP2,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, **settings) -> None:
+        """Update pool settings; they apply to pools created afterwards."""
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith('_'):
+                raise ValueError(f'Unknown client registry setting: {name}')
+            setattr(self, name, value)
+
+    def _create_http_client(self):
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        try:
+            return httpx.Client(limits=limits, http2=self.http2, follow_redirects=True)
+        except ImportError as e:
+            # http2 needs the optional `h2` package
+            logger.warning(f'HTTP/2 is not available, falling back to HTTP/1.1: {e}')
+            return httpx.Client(limits=limits, follow_redirects=True)
+
+    def get(self, base_url: str, api_key: str):
+        """Return the shared http client for an endpoint, or None if httpx is not installed."""
+        if httpx is None:
+            return None
+        key = (str(base_url), api_key or '')
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                client = self._clients[key] = self._create_http_client()
+            return client
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+client_registry = ClientRegistry()
@@ -1,9 +1,22 @@
+import functools
 import json
 from dataclasses import dataclass
-from typing import Dict, Any, List, Type
+from typing import Callable, Dict, Any, List, Tuple, Type
 
 from ...utils.formatter import to_str_format
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+SERIALIZATION_FORMATS = ('json', 'orjson', 'msgpack')
+
 
 def valid_value(value: Any, data_type: Type) -> Any:
     return value if isinstance(value, data_type) else data_type()
@@ -27,37 +40,152 @@ def valid_dataclass(value: Any) -> 'DataClass':
 
 simple_types = (str, float, int, bool)
 
+_MISSING = object()
 
-def unwrap_list(value: list) -> list:
-    result = []
-    for item in value:
-        if isinstance(item, dict):
-            result.append(unwrap_dict(item))
-        elif isinstance(item, list):
-            result.append(unwrap_list(item))
-        elif isinstance(item, DataClass):
-            result.append(item.to_dict(include_none=True))
+
+@functools.lru_cache(maxsize=None)
+def slot_fields(cls: Type) -> Tuple[str, ...]:
+    """
+    The public fields a slotted DataClass subclass stores in __slots__, base classes first.
+    A class may list its fields in `_fields` to set their order or to include fields backed by descriptors.
+    """
+    fields = []
+    for klass in reversed(cls.__mro__):
+        if '_fields' in klass.__dict__:
+            names = klass.__dict__['_fields']
         else:
-            result.append(item)
-    return result
+            slots = klass.__dict__.get('__slots__', ())
+            names = (slots,) if isinstance(slots, str) else slots
+        fields.extend(name for name in names if not name.startswith('_') and name not in fields)
+    return tuple(fields)
+
+
+_ATOMIC_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def unwrap_value(value: Any, include_none: bool = True) -> Any:
+    """Convert a DataClass, or the DataClasses nested in a dict or list, to plain dicts."""
+    cls = type(value)
+    if cls in _ATOMIC_TYPES:
+        return value
+    if cls is dict:
+        return unwrap_dict(value)
+    if cls is list:
+        return unwrap_list(value)
+    if isinstance(value, DataClass):
+        return value.to_dict(include_none=include_none)
+    if isinstance(value, dict):
+        return unwrap_dict(value)
+    if isinstance(value, list):
+        return unwrap_list(value)
+    return value
+
+
+def unwrap_list(value: list) -> list:
+    return [item if type(item) in _ATOMIC_TYPES else unwrap_value(item) for item in value]
 
 
 def unwrap_dict(value: dict) -> dict:
-    result = {}
-    for key, value in value.items():
-        if isinstance(value, dict):
-            result[key] = unwrap_dict(value)
-        elif isinstance(value, list):
-            result[key] = unwrap_list(value)
-        elif isinstance(value, DataClass):
-            result[key] = value.to_dict(include_none=True)
-        else:
-            result[key] = value
-    return result
+    return {key: item if type(item) in _ATOMIC_TYPES else unwrap_value(item) for key, item in value.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_to_dict(cls: Type) -> Callable[[Any, bool], Dict]:
+    """
+    Build the to_dict function of a DataClass subclass: the slot fields are read one by one in generated code,
+    followed by the attributes in __dict__ for classes that have one.
+    """
+    lines = ['def to_dict(obj, include_none):', '    result = {}']
+    for name in slot_fields(cls):
+        lines += [
+            f'    value = getattr(obj, {name!r}, _MISSING)',
+            '    if value is not _MISSING and (include_none or value is not None):',
+            f'        result[{name!r}] = value if type(value) in _ATOMIC_TYPES else unwrap_value(value, include_none)',
+        ]
+    if cls.__dictoffset__:
+        lines += [
+            '    for key, value in obj.__dict__.items():',
+            '        if include_none or value is not None:',
+            '            result[key] = value if type(value) in _ATOMIC_TYPES else unwrap_value(value, include_none)',
+        ]
+    lines.append('    return result')
+    namespace = {'_MISSING': _MISSING, '_ATOMIC_TYPES': _ATOMIC_TYPES, 'unwrap_value': unwrap_value}
+    exec('\n'.join(lines), namespace)
+    return namespace['to_dict']
+
+
+def _json_key(key: Any) -> str:
+    # the same conversion json.dumps applies to dict keys
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return json.dumps(key)
+    raise TypeError(f'keys must be str, int, float, bool or None, not {type(key).__name__}')
+
+
+def to_jsonable(value: Any) -> Any:
+    """The value json.loads(json.dumps(value)) would return, built without encoding to text."""
+    cls = type(value)
+    if cls in _ATOMIC_TYPES:
+        return value
+    if isinstance(value, dict):
+        return {_json_key(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, DataClass):
+        return to_jsonable(value.to_dict(include_none=True))
+    for base in (str, int, float):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f'Object of type {cls.__name__} is not JSON serializable')
+
+
+def encode(value: Any, format: str = 'json') -> bytes:
+    """Encode a value made of dicts, lists and scalars as json, orjson or msgpack bytes."""
+    if format == 'json':
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if format == 'orjson':
+        return _require(orjson, 'orjson').dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    if format == 'msgpack':
+        return _require(msgpack, 'msgpack').packb(value, use_bin_type=True)
+    raise ValueError(f'format must be one of {SERIALIZATION_FORMATS}, but got: {format}')
+
+
+def decode(data: bytes, format: str = 'json') -> Any:
+    """Decode the bytes returned by encode."""
+    if format == 'json':
+        return json.loads(data)
+    if format == 'orjson':
+        return _require(orjson, 'orjson').loads(data)
+    if format == 'msgpack':
+        return _require(msgpack, 'msgpack').unpackb(data, raw=False, strict_map_key=False)
+    raise ValueError(f'format must be one of {SERIALIZATION_FORMATS}, but got: {format}')
+
+
+def _require(module: Any, name: str) -> Any:
+    if module is None:
+        raise ImportError(f'the {name} format requires {name}, install it with "pip install {name}"')
+    return module
 
 
 @dataclass
 class DataClass:
+    # Subclasses that declare __slots__ (the hot-path types such as Message and Choice) have no __dict__,
+    # all the others keep their attributes in __dict__ as before.
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        # A bare DataClass() is a free-form record, so it is created as a dict-backed subclass.
+        return super().__new__(_DictDataClass if cls is DataClass else cls)
+
     # id: str = None
     #
     # def __init__(self):
@@ -71,35 +199,35 @@ class DataClass:
     #         return self.id == other.id
     #     return False
 
+    def _items(self) -> List[Tuple[str, Any]]:
+        """The (name, value) pairs of the slot fields that have been set, followed by those in __dict__."""
+        items = []
+        for name in slot_fields(type(self)):
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                items.append((name, value))
+        attrs = getattr(self, '__dict__', None)
+        if attrs:
+            items.extend(attrs.items())
+        return items
+
     def to_dict(self, include_none: bool = True) -> Dict:
-        if include_none:
-            attrs = {key: value for key, value in self.__dict__.items()}
-        else:
-            attrs = {
-                key: value for key, value in self.__dict__.items() if value is not None
-            }
-        result = {}
-        for key, value in attrs.items():
-            if isinstance(value, DataClass):
-                result[key] = value.to_dict(include_none=include_none)
-            elif isinstance(value, dict):
-                result[key] = unwrap_dict(value)
-            elif isinstance(value, list):
-                result[key] = unwrap_list(value)
-            else:
-                result[key] = value
-        return result
+        return compile_to_dict(type(self))(self, include_none)
 
     def to_string(self, include_none: bool = True) -> str:
         return to_str_format(self.to_dict(include_none=include_none))
 
     def to_json(self, include_none: bool = True) -> str:
-        return json.loads(self.to_string(include_none=include_none))
+        return to_jsonable(self.to_dict(include_none=include_none))
+
+    def to_bytes(self, include_none: bool = True, format: str = 'json') -> bytes:
+        """Serialize to_dict() with one of SERIALIZATION_FORMATS; orjson and msgpack are optional dependencies."""
+        return encode(self.to_dict(include_none=include_none), format=format)
 
     def keys(self, include_none: bool = True) -> List:
         if include_none:
-            return [key for key, value in self.__dict__.items()]
-        return [key for key, value in self.__dict__.items() if value is not None]
+            return [key for key, value in self._items()]
+        return [key for key, value in self._items() if value is not None]
 
     def set(self, key: str, value: Any, include_none: bool = True):
         if include_none:
@@ -118,7 +246,7 @@ class DataClass:
         return key in self.keys(include_none=include_none)
 
     def update(self, other: 'DataClass', include_none: bool = False):
-        for key, value in other.__dict__.items():
+        for key, value in other._items():
             if value is None:
                 if include_none:
                     setattr(self, key, value)
@@ -132,7 +260,7 @@ class DataClass:
                 setattr(self, key, value)
 
     def __merge(self, other: 'DataClass'):
-        for key, value in other.__dict__.items():
+        for key, value in other._items():
             if value is None:
                 continue
             elif isinstance(value, (dict, DataClass)):
@@ -162,10 +290,16 @@ class DataClass:
         return self.to_string(include_none=True)
 
 
+class _DictDataClass(DataClass):
+    pass
+
+
 def list_to_dataclass(input_list: List) -> List[DataClass]:
     result = []
     for item in input_list:
-        if isinstance(item, dict):
+        if type(item) in _ATOMIC_TYPES:
+            result.append(item)
+        elif isinstance(item, dict):
             result.append(dict_to_dataclass(item, include_none=True))
         elif isinstance(item, list):
             result.append(list_to_dataclass(item))
@@ -176,14 +310,18 @@ def list_to_dataclass(input_list: List) -> List[DataClass]:
 
 def dict_to_dataclass(input_dict: dict, include_none: bool = True) -> DataClass:
     dc_result = DataClass()
+    # fill __dict__ directly, which also keeps non-string keys such as the indexes of Choice.tool_calls
+    attrs = dc_result.__dict__
     for key, value in input_dict.items():
         if value is None:
             if include_none:
-                dc_result.set(key, value)
+                attrs[key] = value
+        elif type(value) in _ATOMIC_TYPES:
+            attrs[key] = value
         elif isinstance(value, dict):
-            dc_result.set(key, dict_to_dataclass(value, include_none=include_none))
+            attrs[key] = dict_to_dataclass(value, include_none=include_none)
         elif isinstance(value, list):
-            dc_result.set(key, list_to_dataclass(value))
+            attrs[key] = list_to_dataclass(value)
         else:
-            dc_result.set(key, value)
+            attrs[key] = value
     return dc_result
@@ -1,9 +1,13 @@
+import asyncio
+import contextlib
 import copy
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
-from ..constants.configs import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT
+from .client_registry import client_registry
+from ..cache.completion_cache import CompletionCache
+from ..constants.configs import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, DEFAULT_EMBEDDING_BATCH_SIZE
 from ...utils.logger import logger, str_format
 
 
@@ -44,7 +48,7 @@ class LLM:
     def create_no_stream_chat_completion(self, messages: list, model: str, tools=None, **kwargs) -> Any:
         ...
 
-    def create_embedding(self, **kwargs) -> Any:
+    def create_embedding(self, input: str | List[str], model: str = None, **kwargs) -> Any:
         ...
 
 
@@ -55,6 +59,7 @@ class OpenAIClient(LLM):
             base_url: str,
             models: List | None = None,
             default_model: str | None = None,
+            cache: Optional[CompletionCache] = None,
             **kwargs
     ):
         super().__init__(
@@ -64,11 +69,17 @@ class OpenAIClient(LLM):
             default_model=default_model,
             **kwargs
         )
-        self.client = OpenAI(
+        self.cache = cache
+        self.client = self._create_client()
+
+    def _create_client(self):
+        # an explicit http_client wins; otherwise share the pooled client of this endpoint
+        return OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
             timeout=self.timeout,
             max_retries=self.max_retries,
+            http_client=self.http_client or client_registry.get(self.base_url, self.api_key),
         )
 
     def create_stream_chat_completion(
@@ -111,11 +122,83 @@ class OpenAIClient(LLM):
             tool_choice=None,
             timeout=None,
             stream=True,
+            cancel_token=None,
             **kwargs
     ):
         if not isinstance(self.client, OpenAI):
             raise ValueError("client is not an instance of OpenAI")
 
+        chat_args = self._build_chat_args(messages, model, tools, max_tokens, temperature, tool_choice, timeout,
+                                          kwargs)
+
+        chat_args['stream'] = stream
+        cache_key = self.cache.key(chat_args) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from cached
+                return None
+
+        try:
+            if stream:
+                response = self.client.chat.completions.create(**chat_args)
+                # closing the response from another thread unblocks a stalled read
+                if cancel_token is not None:
+                    cancel_token.add_callback(response.close)
+                deltas = []
+                try:
+                    for chunk in response:
+                        delta = chunk.choices[0].delta
+                        deltas.append(delta)
+                        yield delta
+                finally:
+                    # the token may outlive this request, e.g. one token for a whole ART run
+                    if cancel_token is not None:
+                        cancel_token.remove_callback(response.close)
+                    response.close()
+                # only a fully consumed, uncancelled stream is cached
+                if cache_key is not None and not (cancel_token is not None and cancel_token.cancelled):
+                    self.cache.set(cache_key, deltas, stream=True)
+            else:
+                message = self.client.chat.completions.create(**chat_args).choices[0].message
+                if cache_key is not None:
+                    self.cache.set(cache_key, [message], stream=False)
+                yield message
+        except Exception as e:
+            if cancel_token is not None and cancel_token.cancelled:
+                logger.info('Chat completion is cancelled')
+                return None
+            logger.error(f'Error in getting chat completion from openai: {e}')
+            return None
+
+    def create_embedding(
+            self,
+            input: str | List[str],
+            model: str = None,
+            batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+            **kwargs
+    ) -> List[List[float]]:
+        """Embed one text or a list of texts, sending at most `batch_size` texts per request."""
+        model = model or self.default_model
+        embeddings = []
+        for batch in self._embedding_batches(input, batch_size):
+            response = self.client.embeddings.create(model=model, input=batch, **kwargs)
+            embeddings.extend(self._embeddings_of(response))
+        return embeddings
+
+    @staticmethod
+    def _embedding_batches(input: str | List[str], batch_size: int) -> List[List[str]]:
+        texts = [input] if isinstance(input, str) else list(input)
+        batch_size = max(1, batch_size)
+        return [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+    @staticmethod
+    def _embeddings_of(response) -> List[List[float]]:
+        # the API may return the items of a batch out of order
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    @staticmethod
+    def _build_chat_args(messages, model, tools, max_tokens, temperature, tool_choice, timeout, kwargs) -> dict:
         chat_args = copy.deepcopy(kwargs)
         if messages:
             chat_args['messages'] = messages
@@ -135,15 +218,146 @@ class OpenAIClient(LLM):
         debug = chat_args.pop('debug', False)
         if debug:
             logger.info('Chat Parameters: \n' + str_format(chat_args))
+        return chat_args
+
+
+class RequestLimiter:
+    """
+    Bounds the number of in-flight LLM requests, globally and per model. A limiter may be shared by several
+    AsyncOpenAIClient instances so that they draw from the same budget.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, model_concurrency: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency or {}
+        self._loop = None
+        self._global = None
+        self._models = {}
+
+    def _bind_loop(self):
+        # asyncio semaphores are bound to one event loop, so they are (re)created for the running loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+            self._models = {
+                model: asyncio.Semaphore(limit) for model, limit in self.model_concurrency.items() if limit
+            }
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, model: Optional[str] = None):
+        self._bind_loop()
+        async with contextlib.AsyncExitStack() as stack:
+            if self._global is not None:
+                await stack.enter_async_context(self._global)
+            if model in self._models:
+                await stack.enter_async_context(self._models[model])
+            yield
+
+
+class AsyncOpenAIClient(OpenAIClient):
+    """
+    The asyncio counterpart of OpenAIClient. `create_chat_completion` returns an async generator of deltas,
+    so many conversations can share one event loop instead of one OS thread each.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str,
+            models: List | None = None,
+            default_model: str | None = None,
+            limiter: Optional[RequestLimiter] = None,
+            cache: Optional[CompletionCache] = None,
+            **kwargs
+    ):
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            models=models,
+            default_model=default_model,
+            cache=cache,
+            **kwargs
+        )
+        self.limiter = limiter
+
+    def _create_client(self):
+        # async connection pools are bound to an event loop, so only an explicitly passed async client is shared
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            http_client=self.http_client if hasattr(self.http_client, 'aclose') else None,
+        )
+
+    async def _llm_response(
+            self,
+            messages: list,
+            model: str,
+            tools=None,
+            max_tokens=None,
+            temperature=None,
+            tool_choice=None,
+            timeout=None,
+            stream=True,
+            cancel_token=None,
+            **kwargs
+    ):
+        if not isinstance(self.client, AsyncOpenAI):
+            raise ValueError("client is not an instance of AsyncOpenAI")
+
+        chat_args = self._build_chat_args(messages, model, tools, max_tokens, temperature, tool_choice, timeout,
+                                          kwargs)
 
+        chat_args['stream'] = stream
+        cache_key = self.cache.key(chat_args) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                for item in cached:
+                    yield item
+                return
+
+        limiter = self.limiter.acquire(chat_args.get('model')) if self.limiter else contextlib.nullcontext()
         try:
-            if stream:
-                chat_args['stream'] = True
-                for chunk in self.client.chat.completions.create(**chat_args):
-                    yield chunk.choices[0].delta
-            else:
-                chat_args['stream'] = False
-                yield self.client.chat.completions.create(**chat_args).choices[0].message
+            async with limiter:
+                if stream:
+                    response = await self.client.chat.completions.create(**chat_args)
+                    # task cancellation (e.g. a timeout) raises CancelledError here and closes the response
+                    deltas = []
+                    try:
+                        async for chunk in response:
+                            delta = chunk.choices[0].delta
+                            deltas.append(delta)
+                            yield delta
+                    finally:
+                        await response.close()
+                    if cache_key is not None:
+                        self.cache.set(cache_key, deltas, stream=True)
+                else:
+                    response = await self.client.chat.completions.create(**chat_args)
+                    message = response.choices[0].message
+                    if cache_key is not None:
+                        self.cache.set(cache_key, [message], stream=False)
+                    yield message
         except Exception as e:
             logger.error(f'Error in getting chat completion from openai: {e}')
-            return None
+
+    async def create_embedding(
+            self,
+            input: str | List[str],
+            model: str = None,
+            batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+            **kwargs
+    ) -> List[List[float]]:
+        """Embed one text or a list of texts; the batches are sent concurrently within the limiter's budget."""
+        model = model or self.default_model
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            limiter = self.limiter.acquire(model) if self.limiter else contextlib.nullcontext()
+            async with limiter:
+                return self._embeddings_of(await self.client.embeddings.create(model=model, input=batch, **kwargs))
+
+        results = await asyncio.gather(*[embed(batch) for batch in self._embedding_batches(input, batch_size)])
+        return [embedding for result in results for embedding in result]
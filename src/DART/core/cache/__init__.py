@@ -0,0 +1,3 @@
+from .backends import CacheBackend, CacheStats, LRUCacheBackend, SQLiteCacheBackend, MmapCacheBackend
+from .completion_cache import CompletionCache
+from .tool_cache import ToolCache, cached_tool
@@ -0,0 +1,301 @@
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+
+
+class CacheStats:
+    """Hit/miss/eviction counters shared by the cache backends."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+    def to_dict(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+
+class CacheBackend:
+    """
+    A string key/value store with optional TTL (seconds) and size (number of entries) limits. Backends are
+    thread-safe; expired entries count as misses and are dropped on access.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-memory LRU cache."""
+
+    def __init__(self, max_size: Optional[int] = 1024, ttl: Optional[float] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._data: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self._expired(item[1]):
+                del self._data[key]
+                self.stats.evictions += 1
+                item = None
+            if item is None:
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return item[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while self.max_size is not None and len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk cache in a SQLite table; entries survive process restarts and the least recently used are evicted."""
+
+    def __init__(self, path: str, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value, created FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is not None and self._expired(row[1]):
+                self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self._conn.commit()
+                self.stats.evictions += 1
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            self.stats.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)',
+                (key, value, now, now)
+            )
+            if self.max_size is not None:
+                evicted = self._conn.execute(
+                    'DELETE FROM cache WHERE key IN '
+                    '(SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_size,)
+                ).rowcount
+                self.stats.evictions += max(evicted, 0)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM cache')
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MmapCacheBackend(CacheBackend):
+    """
+    Append-only record file read through a memory map. Only the key index lives in memory, so large replay sets
+    are paged in by the OS on demand and can be shared read-only between processes. Evicted or overwritten
+    records stay in the file until `compact` is called. A deletion is appended as a tombstone record so that it
+    survives a reopen.
+    """
+
+    _HEADER = struct.Struct('<IId')
+    # value length of a tombstone record, which has no value and removes the key when the index is loaded
+    _TOMBSTONE = 0xFFFFFFFF
+
+    def __init__(self, path: str, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.path = path
+        self._index: OrderedDict[str, Tuple[int, int, float]] = OrderedDict()
+        self._file = open(path, 'a+b')
+        self._map: Optional[mmap.mmap] = None
+        self._load_index()
+
+    def _remap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+    def _load_index(self) -> None:
+        self._remap()
+        offset = 0
+        size = len(self._map) if self._map is not None else 0
+        while offset + self._HEADER.size <= size:
+            key_len, value_len, created = self._HEADER.unpack_from(self._map, offset)
+            key_start = offset + self._HEADER.size
+            value_start = key_start + key_len
+            if value_len == self._TOMBSTONE:
+                if value_start > size:
+                    break
+                self._index.pop(self._map[key_start:value_start].decode('utf-8'), None)
+                offset = value_start
+                continue
+            if value_start + value_len > size:
+                # a truncated trailing record from an interrupted write
+                break
+            key = self._map[key_start:value_start].decode('utf-8')
+            self._index[key] = (value_start, value_len, created)
+            self._index.move_to_end(key)
+            offset = value_start + value_len
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.max_size is not None and len(self._index) > self.max_size:
+            self._index.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._index.get(key)
+            if item is not None and self._expired(item[2]):
+                del self._index[key]
+                self.stats.evictions += 1
+                item = None
+            if item is None:
+                self.stats.misses += 1
+                return None
+            start, length, _ = item
+            if self._map is None or start + length > len(self._map):
+                self._remap()
+            self._index.move_to_end(key)
+            self.stats.hits += 1
+            return self._map[start:start + length].decode('utf-8')
+
+    def set(self, key: str, value: str) -> None:
+        key_bytes, value_bytes = key.encode('utf-8'), value.encode('utf-8')
+        created = time.time()
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(self._HEADER.pack(len(key_bytes), len(value_bytes), created) + key_bytes + value_bytes)
+            self._file.flush()
+            self._index[key] = (offset + self._HEADER.size + len(key_bytes), len(value_bytes), created)
+            self._index.move_to_end(key)
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._index.pop(key, None) is None:
+                return
+            key_bytes = key.encode('utf-8')
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(self._HEADER.pack(len(key_bytes), self._TOMBSTONE, time.time()) + key_bytes)
+            self._file.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index.clear()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.truncate(0)
+            self._file.flush()
+
+    def compact(self) -> None:
+        """Rewrite the file with the live records only."""
+        with self._lock:
+            if self._map is None:
+                self._remap()
+            records = []
+            for key, (start, length, created) in self._index.items():
+                records.append((key.encode('utf-8'), self._map[start:start + length], created))
+            self._index.clear()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.truncate(0)
+            offset = 0
+            for key_bytes, value_bytes, created in records:
+                self._file.write(self._HEADER.pack(len(key_bytes), len(value_bytes), created) + key_bytes + value_bytes)
+                value_start = offset + self._HEADER.size + len(key_bytes)
+                self._index[key_bytes.decode('utf-8')] = (value_start, len(value_bytes), created)
+                offset = value_start + len(value_bytes)
+            self._file.flush()
+            self._remap()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from typing import Optional, List, Any, Dict
+
+from openai.types.chat import ChatCompletionMessage
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from .backends import CacheBackend, LRUCacheBackend, CacheStats
+
+# arguments that change how a request is sent, not what the model answers
+_TRANSPORT_ARGS = ('timeout', 'extra_headers', 'extra_query', 'extra_body', 'stream_options')
+
+
+def _to_jsonable(value: Any) -> Any:
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(exclude_none=True)
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+class CompletionCache:
+    """
+    Caches chat completions keyed on a canonical hash of the chat args. Streamed responses are stored as the list
+    of their deltas and replayed as `ChoiceDelta` objects, so callers consume a hit exactly like a live stream.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend if backend is not None else LRUCacheBackend()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    @staticmethod
+    def key(chat_args: Dict[str, Any]) -> str:
+        normalized = {k: v for k, v in chat_args.items() if k not in _TRANSPORT_ARGS and v is not None}
+        canonical = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'),
+                               default=_to_jsonable)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        payload = json.loads(value)
+        item_class = ChoiceDelta if payload['stream'] else ChatCompletionMessage
+        return [item_class.model_validate(item) for item in payload['items']]
+
+    def set(self, key: str, items: List[Any], stream: bool = True) -> None:
+        payload = {'stream': stream, 'items': [item.model_dump(exclude_none=True) for item in items]}
+        self.backend.set(key, json.dumps(payload, ensure_ascii=False))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def close(self) -> None:
+        self.backend.close()
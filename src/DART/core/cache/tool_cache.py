@@ -0,0 +1,84 @@
+import functools
+import hashlib
+import inspect
+import json
+from typing import Any, Callable, Collection, Dict, Optional
+
+from .backends import CacheBackend, LRUCacheBackend, CacheStats
+
+
+class ToolCache:
+    """
+    Memoizes string results of side-effect-free tools, keyed on the tool name plus canonical JSON arguments.
+    Pass it as `Agent(tool_cache=...)` (shared by handoff agents if they get the same instance) or wrap single
+    functions with `cached_tool`. Use a SQLite or mmap backend to keep results across processes.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, tools: Optional[Collection[str]] = None):
+        """
+        Args:
+            backend: storage for cached results, an in-memory LRU if None
+            tools: names of the tools to cache; every tool of the agent is cached if None
+        """
+        self.backend = backend if backend is not None else LRUCacheBackend()
+        self.tools = set(tools) if tools is not None else None
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    def enabled_for(self, name: str) -> bool:
+        return self.tools is None or name in self.tools
+
+    @staticmethod
+    def key(name: str, arguments: str | Dict[str, Any]) -> Optional[str]:
+        """Cache key of a call, or None if the arguments are not valid JSON."""
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments or '{}')
+            except ValueError:
+                return None
+        try:
+            canonical = json.dumps([name, arguments], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        except TypeError:
+            return None
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def cached_tool(cache: Optional[ToolCache] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator that memoizes a tool function returning str. The wrapper keeps the name, doc and signature of
+    the tool, so it can be registered with an Agent like the original function.
+    """
+    cache = cache if cache is not None else ToolCache()
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache.key(func.__name__, dict(bound.arguments))
+            if key is not None:
+                value = cache.get(key)
+                if value is not None:
+                    return value
+            value = func(*args, **kwargs)
+            if key is not None and isinstance(value, str):
+                cache.set(key, value)
+            return value
+
+        wrapper.tool_cache = cache
+        return wrapper
+
+    return decorator
@@ -10,5 +10,27 @@ DEFAULT_WEBSOCKET_BASE_URL = Constant(value=None).value
 DEFAULT_MAX_RETRIES = Constant(value=2).value
 DEFAULT_TIMEOUT = Constant(value=60).value
 DEFAULT_HTTP_CLIENT = Constant(value=None).value
+DEFAULT_MAX_CONNECTIONS = Constant(value=100).value
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = Constant(value=20).value
+DEFAULT_KEEPALIVE_EXPIRY = Constant(value=30.0).value
+DEFAULT_HTTP2 = Constant(value=False).value
+DEFAULT_MAX_IN_FLIGHT = Constant(value=256).value
 
 DEFAULT_MAX_CHAT_TIMES = Constant(value=10).value
+DEFAULT_MAX_TOOL_WORKERS = Constant(value=16).value
+DEFAULT_MAX_HANDOFF_WORKERS = Constant(value=4).value
+
+# memory related
+DEFAULT_EMBEDDING_BATCH_SIZE = Constant(value=64).value
+DEFAULT_HASH_EMBEDDING_DIM = Constant(value=256).value
+DEFAULT_MEMORY_TOP_K = Constant(value=4).value
+DEFAULT_MEMORY_RECENT_MESSAGES = Constant(value=6).value
+DEFAULT_INDEX_CAPACITY = Constant(value=1024).value
+
+# context window related
+DEFAULT_TOKEN_CACHE_SIZE = Constant(value=65536).value
+DEFAULT_RESERVED_TOKENS = Constant(value=1024).value
+DEFAULT_MAX_TOOL_TOKENS = Constant(value=2048).value
+DEFAULT_TOOL_ARCHIVE_SIZE = Constant(value=256).value
+DEFAULT_MESSAGE_OVERHEAD_TOKENS = Constant(value=4).value
+DEFAULT_PREFIX_HISTORY_SIZE = Constant(value=1000).value
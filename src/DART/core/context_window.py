@@ -0,0 +1,191 @@
+import functools
+import itertools
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .constants.configs import (
+    DEFAULT_TOKEN_CACHE_SIZE,
+    DEFAULT_RESERVED_TOKENS,
+    DEFAULT_MAX_TOOL_TOKENS,
+    DEFAULT_TOOL_ARCHIVE_SIZE,
+    DEFAULT_MESSAGE_OVERHEAD_TOKENS,
+)
+from .types.message import SystemMessage
+from .types.role import Role
+from ..utils.logger import logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is optional, fall back to an estimate
+    tiktoken = None
+
+_CJK = re.compile(r'[　-〿一-鿿＀-￯]')
+
+
+class Tokenizer:
+    """
+    计算文本的token数，结果按文本缓存。安装了tiktoken时使用其编码，否则按“每个中日韩字符1个token，
+    其余每4个字符1个token”估算
+    """
+
+    def __init__(self, encoding: Optional[str] = 'o200k_base', cache_size: int = DEFAULT_TOKEN_CACHE_SIZE):
+        self._encoding = tiktoken.get_encoding(encoding) if tiktoken is not None and encoding else None
+        self.count = functools.lru_cache(maxsize=cache_size)(self._count)
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        cjk = len(_CJK.findall(text))
+        return cjk + (len(text) - cjk + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """截取文本开头不超过max_tokens个token的部分"""
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens])
+        # 二分查找满足预算的最长前缀
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self._count(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low]
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(encoding: Optional[str] = 'o200k_base') -> Tokenizer:
+    """进程内共享的tokenizer，编码表只加载一次"""
+    return Tokenizer(encoding)
+
+
+class ContextWindow:
+    """
+    按token预算裁剪每轮发送给模型的消息：
+    1. 超过max_tool_tokens的工具结果只保留开头部分，完整内容保存在archive中，消息里留下引用ID，
+       archive只保留最近使用的archive_size条；
+    2. 仍超过预算时，从最早的对话轮次开始整轮移除（系统消息和最后一轮始终保留），
+       设置了summarizer时，被移除的轮次会被总结为一条系统消息。
+    预算为max_tokens减去为回复预留的reserved_tokens。
+    """
+
+    def __init__(
+            self,
+            max_tokens: int,
+            tokenizer: Optional[Tokenizer] = None,
+            reserved_tokens: int = DEFAULT_RESERVED_TOKENS,
+            max_tool_tokens: Optional[int] = DEFAULT_MAX_TOOL_TOKENS,
+            summarizer: Optional[Callable[[List[Dict]], str]] = None,
+            archive_size: int = DEFAULT_TOOL_ARCHIVE_SIZE,
+    ):
+        """
+        Args:
+            max_tokens: 模型的上下文长度
+            tokenizer: 计算token数的tokenizer，默认为共享的get_tokenizer()
+            reserved_tokens: 为模型回复预留的token数
+            max_tool_tokens: 单条工具结果的最大token数，为None时不截断
+            summarizer: 将被移除的消息总结为一段文本的函数，摘要本身不计入移除时的预算
+            archive_size: archive中保留的完整工具结果条数，超出时移除最久未使用的
+        """
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.reserved_tokens = reserved_tokens
+        self.max_tool_tokens = max_tool_tokens
+        self.summarizer = summarizer
+        self.archive_size = archive_size
+        self.archive: OrderedDict[str, str] = OrderedDict()
+        # 完整内容 -> (引用ID, 截断后的内容)，与archive同步淘汰
+        self._truncated: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+        self._refs = itertools.count()
+        self._summary: Tuple[Tuple[str, ...], Dict[str, Any]] = ((), {})
+        self._lock = threading.Lock()
+
+    @property
+    def budget(self) -> int:
+        return max(0, self.max_tokens - self.reserved_tokens)
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        """单条消息的token数，包括消息格式的固定开销和工具调用参数"""
+        content = message.get('content')
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False) if content else ''
+        tokens = DEFAULT_MESSAGE_OVERHEAD_TOKENS + self.tokenizer.count(content)
+        if message.get('tool_calls'):
+            tokens += self.tokenizer.count(json.dumps(message['tool_calls'], ensure_ascii=False, default=str))
+        return tokens
+
+    def count(self, messages: Sequence[Dict[str, Any]], tools: Optional[List[Dict]] = None) -> int:
+        """消息列表及工具描述的token数"""
+        tokens = sum(self.count_message(message) for message in messages)
+        if tools:
+            tokens += self.tokenizer.count(json.dumps(tools, ensure_ascii=False))
+        return tokens
+
+    def fit(self, messages: Sequence[Dict[str, Any]], tools: Optional[List[Dict]] = None) -> List[Dict[str, Any]]:
+        """返回不超过预算的消息列表，传入的消息不会被修改"""
+        messages = [self._truncate_tool_message(message) for message in messages]
+        budget = self.budget - (self.tokenizer.count(json.dumps(tools, ensure_ascii=False)) if tools else 0)
+        sizes = [self.count_message(message) for message in messages]
+        if sum(sizes) <= budget:
+            return messages
+
+        head = 1 if messages and messages[0].get('role') == Role.SYSTEM.value else 0
+        # 依次移除最早的轮次，直到满足预算；最后一轮始终保留
+        cut = head
+        total = sum(sizes)
+        for start in self._turn_starts(messages, head)[1:]:
+            if total <= budget:
+                break
+            total -= sum(sizes[cut:start])
+            cut = start
+        if total > budget:
+            logger.warning(f'messages still exceed the context budget after eviction: {total} > {budget}')
+        if self.summarizer is not None and cut > head:
+            return messages[:head] + [self._summary_message(messages[head:cut])] + messages[cut:]
+        return messages[:head] + messages[cut:]
+
+    @staticmethod
+    def _turn_starts(messages: List[Dict[str, Any]], head: int) -> List[int]:
+        """每轮对话的起始位置，一轮从一条用户消息开始，保证工具调用和工具结果不会被拆开"""
+        starts = [head]
+        for i in range(head + 1, len(messages)):
+            if messages[i].get('role') == Role.USER.value:
+                starts.append(i)
+        return starts
+
+    def _truncate_tool_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        content = message.get('content')
+        if (self.max_tool_tokens is None or message.get('role') != Role.TOOL.value
+                or not isinstance(content, str) or self.tokenizer.count(content) <= self.max_tool_tokens):
+            return message
+        # 同一工具结果在之后的每一轮都会出现，截断结果只计算一次
+        with self._lock:
+            cached = self._truncated.get(content)
+            if cached is not None:
+                ref, truncated = cached
+                self._truncated.move_to_end(content)
+                self.archive.move_to_end(ref)
+            else:
+                ref = f'tool-result-{next(self._refs)}'
+                head = self.tokenizer.truncate(content, self.max_tool_tokens)
+                total = self.tokenizer.count(content)
+                truncated = f'{head}\n...[工具结果共{total}个token，已截断，完整内容的引用ID：{ref}]'
+                self.archive[ref] = content
+                self._truncated[content] = (ref, truncated)
+                while len(self.archive) > self.archive_size:
+                    self.archive.popitem(last=False)
+                    self._truncated.popitem(last=False)
+        return {**message, 'content': truncated}
+
+    def _summary_message(self, evicted: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # 被移除的轮次不变时复用上一次的摘要，不重复调用summarizer
+        key = tuple(str(message.get('content')) for message in evicted)
+        if self._summary[0] != key:
+            summary = self.summarizer(evicted)
+            self._summary = (key, SystemMessage(content=f'之前对话的摘要：\n{summary}').to_message())
+        return self._summary[1]
@@ -1,38 +1,69 @@
 import asyncio
+import heapq
+import itertools
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Dict, List, Set, Optional, Callable, Any, Generator
+from enum import Enum
+from concurrent.futures import Executor, ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, List, Set, Optional, Callable, Any, Generator, Tuple, Awaitable, AsyncGenerator
 from collections import defaultdict, deque
 
 from .task import Task, TaskStatus
+from ..utils.cancellation import CancelToken
 from ..utils.logger import logger
 
+# 有超时设置但尚未开始执行的任务（在共享线程池中排队）存在时，调度循环检查其是否开始的间隔
+_START_POLL_INTERVAL = 0.01
+
+
+class FailurePolicy(Enum):
+    """任务失败后的处理策略"""
+    FAIL_FAST = "fail_fast"  # 跳过所有尚未开始的任务，只等待正在运行的任务结束
+    CONTINUE = "continue"    # 只跳过失败任务的下游任务，独立的分支继续执行
+
 
 class DAGScheduler:
     """DAG调度器，负责管理和调度任务执行"""
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(
+            self,
+            max_workers: int = 4,
+            executor: Optional[Executor] = None,
+            failure_policy: FailurePolicy = FailurePolicy.FAIL_FAST
+    ):
         """
         初始化DAG调度器
 
         Args:
             max_workers: 最大并行执行的工作线程数
+            executor: 外部传入的长期线程池，由调用方负责关闭；为None时调度器自建线程池
+            failure_policy: 任务失败后的处理策略
         """
         self.tasks: Dict[str, Task] = {}
         self.completed_tasks: Set[str] = set()
         self.running_tasks: Set[str] = set()
         self.failed_tasks: Set[str] = set()
+        self.skipped_tasks: Set[str] = set()
+        self.failure_policy = FailurePolicy(failure_policy)
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
         self._lock = threading.Lock()
-        self._event = threading.Event()
+
+        # validate_dag时预先计算的反向依赖表，compile后instantiate出的调度器共享该结构
+        self._compiled = False
+        self._dependents: Dict[str, List[str]] = {}
+        # 当前运行中每个任务尚未完成的依赖数，任务完成时递减
+        self._in_degree: Dict[str, int] = {}
+        # 每个任务当前这次执行开始运行的时刻（time.monotonic），超时从这一刻开始计算
+        self._started_at: Dict[str, float] = {}
 
     def add_task(self, task: Task) -> None:
         """添加任务到调度器"""
         if task.task_id in self.tasks:
             raise ValueError(f"Task {task.task_id} already exists")
         self.tasks[task.task_id] = task
+        self._compiled = False
         logger.info(f"Added task: {task.task_id}")
 
     def add_tasks(self, tasks: List[Task]) -> None:
@@ -42,13 +73,12 @@ class DAGScheduler:
 
     def get_ready_tasks(self) -> List[Task]:
         """获取准备就绪的任务（所有依赖都已完成且未运行）"""
-        ready_tasks = []
-        for task in self.tasks.values():
-            if (task.status == TaskStatus.PENDING and
-                task.is_ready(list(self.completed_tasks)) and
-                task.task_id not in self.running_tasks):
-                ready_tasks.append(task)
-        return ready_tasks
+        in_degree = self._in_degree or self._pending_in_degree()
+        return [
+            task for task_id, task in self.tasks.items()
+            if task.status == TaskStatus.PENDING and in_degree.get(task_id, 0) == 0
+            and task_id not in self.running_tasks
+        ]
 
     def get_executable_tasks(self) -> List[Task]:
         """获取可以并行执行的任务（准备就绪且没有正在运行的依赖）"""
@@ -56,7 +86,7 @@ class DAGScheduler:
         executable_tasks = []
 
         for task in ready_tasks:
-            if task.can_run_parallel(list(self.running_tasks)):
+            if task.can_run_parallel(self.running_tasks):
                 executable_tasks.append(task)
 
         # 按优先级排序，优先级高的先执行
@@ -64,74 +94,312 @@ class DAGScheduler:
         return executable_tasks
 
     def validate_dag(self) -> bool:
-        """验证DAG是否有效（无环）"""
-        # 使用拓扑排序检测环
-        visited = set()
-        rec_stack = set()
-
-        def has_cycle(task_id: str) -> bool:
-            if task_id in rec_stack:
-                return True
-            if task_id in visited:
-                return False
+        """
+        验证DAG是否有效（无环且依赖都存在）
 
-            visited.add(task_id)
-            rec_stack.add(task_id)
+        使用迭代的Kahn拓扑排序，时间复杂度O(V+E)，深链路也不会触发递归深度限制；
+        校验通过后缓存反向依赖表，供调度时按完成事件递减下游任务的入度。
 
-            task = self.tasks[task_id]
+        Raises:
+            ValueError: 如果某个任务的输入绑定指向不存在的任务
+        """
+        for task in self.tasks.values():
+            task.bind_inputs(self.tasks)
+
+        dependents = defaultdict(list)
+        in_degree = {}
+        for task_id, task in self.tasks.items():
+            in_degree[task_id] = len(task.dependencies)
             for dep in task.dependencies:
                 if dep not in self.tasks:
                     logger.error(f"Dependency {dep} not found for task {task_id}")
-                    return True
-                if has_cycle(dep):
-                    return True
-
-            rec_stack.remove(task_id)
+                    return False
+                dependents[dep].append(task_id)
+
+        queue = deque(task_id for task_id, degree in in_degree.items() if degree == 0)
+        visited = 0
+        while queue:
+            task_id = queue.popleft()
+            visited += 1
+            for dependent_id in dependents[task_id]:
+                in_degree[dependent_id] -= 1
+                if in_degree[dependent_id] == 0:
+                    queue.append(dependent_id)
+
+        if visited != len(self.tasks):
+            logger.error("Cycle detected in DAG")
             return False
 
-        for task_id in self.tasks:
-            if has_cycle(task_id):
-                return False
+        self._dependents = dependents
         return True
 
-    def execute_task(self, task: Task, execute_func: Callable[[Task], Any]) -> Future:
-        """执行单个任务"""
-        def task_wrapper():
-            try:
-                with self._lock:
-                    task.mark_running()
-                    self.running_tasks.add(task.task_id)
+    def _pending_in_degree(self) -> Dict[str, int]:
+        """计算每个任务尚未完成的依赖数（已完成的依赖不计入入度）"""
+        completed = self.completed_tasks
+        return {
+            task_id: sum(1 for dep in task.dependencies if dep not in completed)
+            for task_id, task in self.tasks.items()
+        }
 
-                logger.info(f"Starting task: {task.task_id}")
-                result = execute_func(task)
+    def compile(self) -> 'DAGScheduler':
+        """
+        编译DAG：校验一次并缓存图结构，之后的run以及instantiate出的调度器都不再重复校验
 
-                with self._lock:
-                    task.mark_completed(result)
-                    self.completed_tasks.add(task.task_id)
-                    self.running_tasks.remove(task.task_id)
+        Returns:
+            调度器本身
+
+        Raises:
+            ValueError: 如果DAG有环或缺少依赖
+        """
+        if not self.validate_dag():
+            raise ValueError("Invalid DAG: cycle detected or missing dependencies")
+        self._compiled = True
+        return self
 
-                logger.info(f"Completed task: {task.task_id}")
-                self._event.set()  # 通知调度器有任务完成
-                return result
+    def ensure_valid(self) -> None:
+        """
+        确认DAG可以运行：compile/instantiate得到的调度器已经校验过，直接返回，否则校验一次
 
-            except Exception as e:
-                error_msg = f"Task {task.task_id} failed: {str(e)}"
-                logger.error(error_msg)
+        Raises:
+            ValueError: 如果DAG有环或缺少依赖
+        """
+        if not self._compiled and not self.validate_dag():
+            raise ValueError("Invalid DAG: cycle detected or missing dependencies")
+
+    def instantiate(self, inputs: Optional[Dict[str, Dict[str, Any]]] = None) -> 'DAGScheduler':
+        """
+        基于编译后的DAG模板创建一个新的调度实例，共享图结构与线程池，仅替换各任务的输入
 
+        Args:
+            inputs: 以task_id为键的任务输入，会覆盖模板中对应任务的同名输入
+
+        Returns:
+            可以独立运行的调度器
+        """
+        if not self._compiled:
+            self.compile()
+        inputs = inputs or {}
+        scheduler = DAGScheduler(
+            max_workers=self.max_workers, executor=self.executor, failure_policy=self.failure_policy
+        )
+        scheduler.tasks = {
+            task_id: task.instantiate(inputs.get(task_id)) for task_id, task in self.tasks.items()
+        }
+        scheduler._dependents = self._dependents
+        scheduler._compiled = True
+        return scheduler
+
+    @staticmethod
+    def _push_ready(ready: List, counter: itertools.count, task: Task) -> None:
+        """将任务放入优先级就绪队列，优先级高的先出队，同优先级按入队顺序"""
+        heapq.heappush(ready, (-task.priority, next(counter), task.task_id))
+
+    @staticmethod
+    def _is_stale(task: Task, token: CancelToken) -> bool:
+        """该次执行已超时取消，或者已经有了新的一次执行（重试）"""
+        return token.cancelled or token is not task.cancel_token
+
+    def _mark_running(self, task: Task, token: CancelToken) -> None:
+        with self._lock:
+            if self._is_stale(task, token):
+                raise self._timeout_error(task)
+            task.mark_running()
+            self.running_tasks.add(task.task_id)
+            self._started_at[task.task_id] = time.monotonic()
+        logger.info(f"Starting task: {task.task_id}")
+
+    def _mark_completed(self, task: Task, result: Any, token: CancelToken) -> None:
+        # 已超时取消的任务即使之后返回结果也不再记为完成
+        with self._lock:
+            if self._is_stale(task, token):
+                raise self._timeout_error(task)
+            task.mark_completed(result)
+            self.completed_tasks.add(task.task_id)
+            self.running_tasks.discard(task.task_id)
+        logger.info(f"Completed task: {task.task_id}")
+
+    def _mark_failed(self, task: Task, error: Exception, token: Optional[CancelToken] = None) -> bool:
+        """
+        标记任务失败。传入token时，已超时取消或被重试取代的那次执行抛出的异常会被忽略
+
+        Returns:
+            是否标记为失败
+        """
+        with self._lock:
+            if token is not None and self._is_stale(task, token):
+                return False
+            task.mark_failed(str(error))
+            self.failed_tasks.add(task.task_id)
+            self.running_tasks.discard(task.task_id)
+        logger.error(f"Task {task.task_id} failed: {str(error)}")
+        return True
+
+    @staticmethod
+    def _timeout_error(task: Task) -> TimeoutError:
+        return TimeoutError(f"Task {task.task_id} timed out after {task.timeout}s")
+
+    def _new_attempt(self, task: Task) -> CancelToken:
+        """为任务的一次执行创建新的取消令牌"""
+        with self._lock:
+            task.attempts += 1
+            task.cancel_token = CancelToken()
+            self._started_at.pop(task.task_id, None)
+            return task.cancel_token
+
+    def _expire_task(self, task: Task, future: Future) -> bool:
+        """
+        任务超时：取消令牌（关闭进行中的流式请求），返回False表示任务已在此之前完成或失败。
+        工作函数已记录结果但future尚未完成时，以任务状态为准，不再判为超时。
+        同步任务无法被强制中断，超时只释放调度器中的名额，工作线程会继续运行到执行函数返回，
+        因此大量挂起的任务仍可能占满线程池
+        """
+        with self._lock:
+            if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                return False
+            task.cancel_token.cancel()
+        future.cancel()
+        return True
+
+    def _on_task_error(self, task_id: str, error: Exception, ready: List, counter: itertools.count) -> List[Dict]:
+        """
+        处理任务异常：超时的任务在重试次数内重新进入就绪队列；否则标记为失败，
+        并按失败策略将受影响的任务标记为SKIPPED
+
+        Returns:
+            需要向调用方产出的事件列表
+        """
+        task = self.tasks[task_id]
+        if isinstance(error, TimeoutError):
+            if task.attempts <= task.retries:
+                logger.warning(f"Task {task_id} timed out, retrying ({task.attempts}/{task.retries})")
                 with self._lock:
-                    task.mark_failed(str(e))
-                    self.failed_tasks.add(task.task_id)
-                    if task.task_id in self.running_tasks:
-                        self.running_tasks.remove(task.task_id)
+                    task.status = TaskStatus.PENDING
+                    task.start_time = None
+                    self.running_tasks.discard(task_id)
+                self._push_ready(ready, counter, task)
+                return [{'task_retry': task_id, 'error': str(error), 'attempt': task.attempts}]
+            self._mark_failed(task, error)
+
+        events = [{'task_failed': task_id, 'error': str(error)}]
+        for skipped_id in self._skip_after_failure(task_id, ready):
+            events.append({'task_skipped': skipped_id, 'reason': f'task {task_id} failed'})
+        return events
+
+    def _skip_after_failure(self, task_id: str, ready: List) -> List[str]:
+        """按失败策略将尚未开始的任务标记为SKIPPED，返回被跳过的任务ID"""
+        if self.failure_policy == FailurePolicy.FAIL_FAST:
+            ready.clear()
+            candidates = [tid for tid, task in self.tasks.items() if task.status == TaskStatus.PENDING]
+        else:
+            # 沿反向依赖表找出所有传递下游任务
+            candidates = []
+            visited = {task_id}
+            queue = deque([task_id])
+            while queue:
+                for dependent_id in self._dependents.get(queue.popleft(), ()):
+                    if dependent_id not in visited:
+                        visited.add(dependent_id)
+                        queue.append(dependent_id)
+                        candidates.append(dependent_id)
+
+        skipped = []
+        with self._lock:
+            for candidate_id in candidates:
+                task = self.tasks[candidate_id]
+                if task.status == TaskStatus.PENDING:
+                    task.mark_skipped(f'task {task_id} failed')
+                    self.skipped_tasks.add(candidate_id)
+                    skipped.append(candidate_id)
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} tasks after task {task_id} failed")
+        return skipped
+
+    def _release_dependents(self, task_id: str, ready: List, counter: itertools.count) -> None:
+        """任务完成后递减下游任务的入度，入度归零的任务进入就绪队列"""
+        in_degree = self._in_degree
+        for dependent_id in self._dependents.get(task_id, ()):
+            in_degree[dependent_id] -= 1
+            dependent = self.tasks[dependent_id]
+            if in_degree[dependent_id] == 0 and dependent.status == TaskStatus.PENDING:
+                self._push_ready(ready, counter, dependent)
+
+    def _init_ready_queue(self) -> Tuple[List, itertools.count]:
+        """初始化入度计数和优先级就绪队列"""
+        self._in_degree = self._pending_in_degree()
+        ready: List = []
+        counter = itertools.count()
+        for task_id, degree in self._in_degree.items():
+            task = self.tasks[task_id]
+            if degree == 0 and task.status == TaskStatus.PENDING:
+                self._push_ready(ready, counter, task)
+        return ready, counter
+
+    def _final_status(self) -> Dict[str, Any]:
+        if self.failed_tasks:
+            status = {'dag_status': 'completed_with_errors', 'failed_tasks': list(self.failed_tasks)}
+            if self.skipped_tasks:
+                status['skipped_tasks'] = list(self.skipped_tasks)
+            return status
+        return {'dag_status': 'completed'}
+
+    def execute_task(self, task: Task, execute_func: Callable[[Task], Any]) -> Future:
+        """执行单个任务，超时由调度循环检测并通过task.cancel_token取消"""
+        token = self._new_attempt(task)
 
-                self._event.set()
+        def task_wrapper():
+            try:
+                self._mark_running(task, token)
+                result = execute_func(task)
+            except TimeoutError:
+                raise
+            except Exception as e:
+                # 超时之后才抛出的异常不影响正在进行的重试，调度循环也已不再等待这次执行
+                if not self._mark_failed(task, e, token):
+                    raise self._timeout_error(task) from e
                 raise e
+            self._mark_completed(task, result, token)
+            return result
 
         return self.executor.submit(task_wrapper)
 
+    async def aexecute_task(self, task: Task, execute_func: Callable[[Task], Awaitable[Any]]) -> Any:
+        """以协程方式执行单个任务，超时后取消协程（会关闭进行中的流式请求）"""
+        token = self._new_attempt(task)
+        try:
+            self._mark_running(task, token)
+            result = await asyncio.wait_for(execute_func(task), timeout=task.timeout)
+        except asyncio.TimeoutError:
+            token.cancel()
+            raise self._timeout_error(task)
+        except Exception as e:
+            if not self._mark_failed(task, e, token):
+                raise self._timeout_error(task) from e
+            raise e
+        self._mark_completed(task, result, token)
+        return result
+
+    def _update_deadlines(self, active_futures: Dict[Future, str], deadlines: Dict[Future, float]) -> bool:
+        """
+        为已开始运行的任务设置超时时刻，超时从任务开始运行时计算，不包括在线程池中排队的时间
+
+        Returns:
+            是否还有设置了超时但尚未开始运行的任务
+        """
+        waiting = False
+        for future, task_id in active_futures.items():
+            task = self.tasks[task_id]
+            if task.timeout is None or future in deadlines:
+                continue
+            started_at = self._started_at.get(task_id)
+            if started_at is None:
+                waiting = True
+            else:
+                deadlines[future] = started_at + task.timeout
+        return waiting
+
     def run(self, execute_func: Callable[[Task], Any]) -> Generator[Dict[str, Any], None, None]:
         """
-        运行DAG调度
+        运行DAG调度，任务的超时时间从其开始运行时计算
 
         Args:
             execute_func: 任务执行函数，接收Task对象，返回执行结果
@@ -139,61 +407,111 @@ class DAGScheduler:
         Yields:
             调度状态信息
         """
-        if not self.validate_dag():
-            raise ValueError("Invalid DAG: cycle detected or missing dependencies")
+        self.ensure_valid()
 
         logger.info(f"Starting DAG execution with {len(self.tasks)} tasks")
 
         yield {'dag_status': 'start', 'total_tasks': len(self.tasks)}
 
-        active_futures = []
-        completed_count = 0
-
-        while completed_count < len(self.tasks):
-            # 获取可以执行的任务
-            executable_tasks = self.get_executable_tasks()
+        # 入度计数 + 优先级就绪队列：任务完成时只更新其下游任务，无需轮询全部任务
+        ready, counter = self._init_ready_queue()
+        active_futures: Dict[Future, str] = {}
+        deadlines: Dict[Future, float] = {}
 
+        while ready or active_futures:
             # 提交可执行任务
-            for task in executable_tasks:
-                if len(active_futures) < self.max_workers:
-                    future = self.execute_task(task, execute_func)
-                    active_futures.append((task.task_id, future))
-                    yield {'task_started': task.task_id}
-
-            # 检查已完成的任务
-            still_active = []
-            for task_id, future in active_futures:
-                if future.done():
-                    completed_count += 1
-                    try:
-                        result = future.result()
-                        yield {'task_completed': task_id, 'result': result}
-                    except Exception as e:
-                        yield {'task_failed': task_id, 'error': str(e)}
-                else:
-                    still_active.append((task_id, future))
+            while ready and len(active_futures) < self.max_workers:
+                _, _, task_id = heapq.heappop(ready)
+                task = self.tasks[task_id]
+                future = self.execute_task(task, execute_func)
+                active_futures[future] = task_id
+                yield {'task_started': task_id}
+
+            # 阻塞等待任意一个任务完成或最近的超时时刻到达，完成后立即唤醒调度；
+            # 有设置了超时的任务仍在线程池中排队时，定期醒来为开始运行的任务设置超时时刻
+            waiting = self._update_deadlines(active_futures, deadlines)
+            wait_timeout = max(0.0, min(deadlines.values()) - time.monotonic()) if deadlines else None
+            if waiting:
+                wait_timeout = _START_POLL_INTERVAL if wait_timeout is None else min(wait_timeout, _START_POLL_INTERVAL)
+            done, _ = wait(active_futures, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                task_id = active_futures.pop(future)
+                deadlines.pop(future, None)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield from self._on_task_error(task_id, e, ready, counter)
+                    continue
+                self._release_dependents(task_id, ready, counter)
+                yield {'task_completed': task_id, 'result': result}
+
+            # 取消超时的任务，其占用的名额立即释放给后续任务
+            now = time.monotonic()
+            for future in [future for future, deadline in deadlines.items() if deadline <= now]:
+                task_id = active_futures[future]
+                if not self._expire_task(self.tasks[task_id], future):
+                    # 结果已经记录，等待future完成即可
+                    deadlines.pop(future)
+                    continue
+                active_futures.pop(future)
+                deadlines.pop(future)
+                yield from self._on_task_error(task_id, self._timeout_error(self.tasks[task_id]), ready, counter)
 
-            active_futures = still_active
+        # 检查是否有失败的任务
+        yield self._final_status()
 
-            # 如果没有活跃任务但还有未完成的任务，等待
-            if not active_futures and completed_count < len(self.tasks):
-                logger.info("Waiting for task completion...")
-                self._event.wait(timeout=1.0)
-                self._event.clear()
+        logger.info("DAG execution finished")
 
-            # 小延迟避免忙等待
-            if active_futures:
-                time.sleep(0.1)
+    async def arun(
+            self,
+            execute_func: Callable[[Task], Awaitable[Any]],
+            max_concurrency: Optional[int] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        以asyncio协程的方式运行DAG调度，任务不占用工作线程
 
-        self.executor.shutdown(wait=True)
+        Args:
+            execute_func: 异步任务执行函数，接收Task对象，返回执行结果
+            max_concurrency: 同时运行的最大任务数，None表示不限制
 
-        # 检查是否有失败的任务
-        if self.failed_tasks:
-            yield {'dag_status': 'completed_with_errors', 'failed_tasks': list(self.failed_tasks)}
-        else:
-            yield {'dag_status': 'completed'}
+        Yields:
+            调度状态信息，与run一致
+        """
+        self.ensure_valid()
 
-        logger.info("DAG execution finished")
+        logger.info(f"Starting async DAG execution with {len(self.tasks)} tasks")
+
+        yield {'dag_status': 'start', 'total_tasks': len(self.tasks)}
+
+        ready, counter = self._init_ready_queue()
+        active_tasks: Dict[asyncio.Task, str] = {}
+
+        try:
+            while ready or active_tasks:
+                while ready and (max_concurrency is None or len(active_tasks) < max_concurrency):
+                    _, _, task_id = heapq.heappop(ready)
+                    aio_task = asyncio.ensure_future(self.aexecute_task(self.tasks[task_id], execute_func))
+                    active_tasks[aio_task] = task_id
+                    yield {'task_started': task_id}
+
+                done, _ = await asyncio.wait(active_tasks, return_when=asyncio.FIRST_COMPLETED)
+                for aio_task in done:
+                    task_id = active_tasks.pop(aio_task)
+                    try:
+                        result = aio_task.result()
+                    except Exception as e:
+                        for event in self._on_task_error(task_id, e, ready, counter):
+                            yield event
+                        continue
+                    self._release_dependents(task_id, ready, counter)
+                    yield {'task_completed': task_id, 'result': result}
+        finally:
+            for aio_task in active_tasks:
+                aio_task.cancel()
+
+        yield self._final_status()
+
+        logger.info("Async DAG execution finished")
 
     def get_task_status(self) -> Dict[str, Any]:
         """获取所有任务的状态"""
@@ -202,6 +520,7 @@ class DAGScheduler:
             'completed': len(self.completed_tasks),
             'running': len(self.running_tasks),
             'failed': len(self.failed_tasks),
+            'skipped': len(self.skipped_tasks),
             'pending': len([t for t in self.tasks.values() if t.status == TaskStatus.PENDING]),
             'tasks': {task_id: task.to_dict() for task_id, task in self.tasks.items()}
         }
@@ -211,8 +530,25 @@ class DAGScheduler:
         self.completed_tasks.clear()
         self.running_tasks.clear()
         self.failed_tasks.clear()
+        self.skipped_tasks.clear()
         for task in self.tasks.values():
             task.status = TaskStatus.PENDING
             task.start_time = None
             task.end_time = None
-            task.error_message = None
\ No newline at end of file
+            task.error_message = None
+            task.outputs = {}
+            task.attempts = 0
+            task.cancel_token = None
+        self._in_degree = {}
+        self._started_at = {}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭调度器自建的线程池，外部传入的线程池由调用方管理"""
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'DAGScheduler':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
@@ -0,0 +1,2 @@
+from .embedders import Embedder, HashEmbedder, LLMEmbedder
+from .vector_index import VectorIndex
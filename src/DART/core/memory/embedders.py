@@ -0,0 +1,66 @@
+import re
+import zlib
+from typing import Any, List, Optional
+
+import numpy as np
+
+from ..constants.configs import DEFAULT_EMBEDDING_BATCH_SIZE, DEFAULT_HASH_EMBEDDING_DIM
+
+# latin words and digits, or single CJK characters
+_TOKEN = re.compile(r'[a-z0-9]+|[一-鿿]')
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so that a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class Embedder:
+    """Turns texts into a (len(texts), dim) float32 matrix of L2-normalized embeddings."""
+
+    dim: int = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError()
+
+
+class HashEmbedder(Embedder):
+    """
+    A deterministic, dependency-free embedder for offline use and tests: latin words, CJK characters and CJK
+    character bigrams are hashed (crc32, stable across processes) into `dim` signed buckets.
+    """
+
+    def __init__(self, dim: int = DEFAULT_HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        return normalize(vectors)
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        tokens = _TOKEN.findall(text.lower())
+        bigrams = [a + b for a, b in zip(tokens, tokens[1:]) if len(a) == 1 and len(b) == 1]
+        return tokens + bigrams
+
+
+class LLMEmbedder(Embedder):
+    """Embeds texts with an OpenAI-compatible embedding model through `OpenAIClient.create_embedding`."""
+
+    def __init__(self, client: Any, model: Optional[str] = None, batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.dim = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.client.create_embedding(texts, model=self.model, batch_size=self.batch_size)
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        self.dim = vectors.shape[1]
+        return normalize(vectors)
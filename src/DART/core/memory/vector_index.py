@@ -0,0 +1,72 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..constants.configs import DEFAULT_INDEX_CAPACITY
+
+
+class VectorIndex:
+    """
+    A flat cosine-similarity index over L2-normalized float32 vectors. Rows live in a NumPy array, or in a
+    memory-mapped file when `path` is given, so a large index is paged in by the OS instead of loaded up front.
+    Capacity doubles as rows are added; `size` is the number of valid rows already stored in `path`.
+    """
+
+    def __init__(self, dim: int, path: Optional[str] = None, size: int = 0, capacity: int = DEFAULT_INDEX_CAPACITY):
+        self.dim = dim
+        self.path = path
+        self._size = size
+        if path is not None and os.path.exists(path):
+            capacity = max(capacity, size, os.path.getsize(path) // (dim * 4))
+        self._vectors = self._allocate(max(capacity, size, 1))
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.path is None:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        mode = 'r+' if os.path.exists(self.path) else 'w+'
+        if mode == 'r+' and os.path.getsize(self.path) < capacity * self.dim * 4:
+            with open(self.path, 'r+b') as f:
+                f.truncate(capacity * self.dim * 4)
+        return np.memmap(self.path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        if self.path is None:
+            vectors = self._allocate(capacity)
+            vectors[:self._size] = self._vectors[:self._size]
+            self._vectors = vectors
+        else:
+            self._vectors.flush()
+            del self._vectors
+            self._vectors = self._allocate(capacity)
+
+    def add(self, vectors: np.ndarray) -> List[int]:
+        """Append rows (already normalized) and return their ids."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self._size
+        self._grow(start + len(vectors))
+        self._vectors[start:start + len(vectors)] = vectors
+        self._size += len(vectors)
+        return list(range(start, self._size))
+
+    def search(self, vector: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """The ids and cosine scores of the `top_k` most similar rows, best first."""
+        if self._size == 0 or top_k <= 0:
+            return []
+        scores = self._vectors[:self._size] @ np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        top_k = min(top_k, self._size)
+        ids = np.argpartition(-scores, top_k - 1)[:top_k]
+        ids = ids[np.argsort(-scores[ids])]
+        return [(int(i), float(scores[i])) for i in ids]
+
+    def flush(self) -> None:
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+    def __len__(self) -> int:
+        return self._size
@@ -1,15 +1,21 @@
 import copy
-from typing import List, Dict, Any, Generator, Optional, Callable
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Generator, Optional, Callable, AsyncGenerator
 
 from .art import ART
-from .dag_scheduler import DAGScheduler
+from .async_art import AsyncART
+from .base.llm import RequestLimiter
+from .cache.completion_cache import CompletionCache
+from .dag_scheduler import DAGScheduler, FailurePolicy
 from .base.agent import Agent
 from .constants.configs import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, DEFAULT_MAX_CHAT_TIMES
 from .types.chat_config import ChatConfig
-from .types.message import SystemMessage, AssistantMessage, UserMessage
+from .types.message import Message, SystemMessage, AssistantMessage, UserMessage
 from .types.multi_agent_status import MultiAgentRunTimeStatus
+from .types.role import Role
 from .types.runtime_config import RuntimeConfig
 from .task import Task, TaskStatus
+from ..utils.formatter import to_str_format
 from ..utils.logger import logger
 
 
@@ -20,7 +26,12 @@ class MultiAgentART:
         self,
         runtime_config: RuntimeConfig,
         chat_config: Optional[ChatConfig] = None,
-        max_workers: int = 4
+        max_workers: int = 4,
+        max_concurrent_requests: Optional[int] = None,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        executor: Optional[Executor] = None,
+        failure_policy: FailurePolicy = FailurePolicy.FAIL_FAST,
+        cache: Optional[CompletionCache] = None
     ):
         """
         初始化多Agent运行时环境
@@ -29,6 +40,12 @@ class MultiAgentART:
             runtime_config: 运行时配置
             chat_config: 聊天配置
             max_workers: 最大并行执行的工作线程数
+            max_concurrent_requests: arun模式下全局同时进行的LLM请求上限，None表示不限制
+            model_concurrency: arun模式下每个模型同时进行的LLM请求上限，如 {'qwen3:8b': 8}
+            executor: 长期复用的线程池，多个MultiAgentART可共享同一线程池
+            failure_policy: 任务失败后的处理策略，默认跳过所有未开始的任务；
+                FailurePolicy.CONTINUE只跳过失败任务的下游任务
+            cache: 模型回复缓存，同步和异步模式共用
         """
         if not isinstance(runtime_config, RuntimeConfig):
             raise ValueError("runtime_config must be an instance of RuntimeConfig")
@@ -40,10 +57,15 @@ class MultiAgentART:
             self.chat_config.model = self.runtime_config.default_model
 
         # 创建单Agent ART实例，用于执行单个Agent
-        self.single_agent_art = ART(runtime_config, chat_config)
+        self.cache = cache
+        self.single_agent_art = ART(runtime_config, chat_config, cache=cache)
+
+        # 异步ART实例，在第一次调用arun时创建，所有任务共享同一个LLM请求预算
+        self.limiter = RequestLimiter(max_concurrent_requests, model_concurrency)
+        self._async_art = None
 
         # DAG调度器
-        self.scheduler = DAGScheduler(max_workers=max_workers)
+        self.scheduler = DAGScheduler(max_workers=max_workers, executor=executor, failure_policy=failure_policy)
 
         # 多Agent状态管理
         self.status = MultiAgentRunTimeStatus(runtime_config)
@@ -55,7 +77,9 @@ class MultiAgentART:
         dependencies: Optional[List[str]] = None,
         inputs: Optional[Dict[str, Any]] = None,
         priority: int = 0,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        inputs_from: Optional[Dict[str, str]] = None
     ) -> None:
         """
         添加Agent任务
@@ -66,7 +90,10 @@ class MultiAgentART:
             dependencies: 依赖的任务ID列表
             inputs: 任务输入数据
             priority: 任务优先级
-            timeout: 任务执行超时时间
+            timeout: 任务执行超时时间（秒），超时后取消进行中的LLM请求
+            retries: 任务超时后的最大重试次数
+            inputs_from: 输入绑定，如 {'summary': 'task_a.content'}，上游任务的输出会以引用方式
+                作为消息传给当前Agent，无需手动拼接上游的聊天记录
         """
         task = Task(
             task_id=task_id,
@@ -74,7 +101,9 @@ class MultiAgentART:
             dependencies=dependencies,
             inputs=inputs,
             priority=priority,
-            timeout=timeout
+            timeout=timeout,
+            retries=retries,
+            inputs_from=inputs_from
         )
         self.scheduler.add_task(task)
         self.status.add_task(task)
@@ -98,47 +127,95 @@ class MultiAgentART:
 
         Returns:
             任务执行结果
+
+        Raises:
+            Exception: 任务执行失败时抛出，由调度器标记任务失败并跳过受影响的任务
         """
         try:
             logger.info(f"Executing task: {task.task_id} with agent: {task.agent.name}")
 
-            # 准备消息
-            messages = []
-            if task.inputs and 'messages' in task.inputs:
-                messages = task.inputs['messages']
-            elif task.inputs and 'user_message' in task.inputs:
-                messages = [UserMessage(content=task.inputs['user_message'])]
-
             # 执行Agent
             result_content = ""
-            chat_config = task.inputs.get('chat_config', self.chat_config)
-            max_chat_times = task.inputs.get('max_chat_times', DEFAULT_MAX_CHAT_TIMES)
-
-            for chunk in self.single_agent_art.run(
-                agent=task.agent,
-                messages=messages,
-                chat_config=chat_config,
-                max_chat_times=max_chat_times,
-                stream=False  # 多Agent环境下不使用流式输出
-            ):
+            for chunk in self.single_agent_art.run(**self._task_run_args(task)):
                 if 'content' in chunk and isinstance(chunk['content'], str):
                     result_content += chunk['content']
 
-            return {
-                'task_id': task.task_id,
-                'agent_name': task.agent.name,
-                'content': result_content,
-                'success': True
-            }
+            return self._task_result(task, result_content)
 
         except Exception as e:
             logger.error(f"Task {task.task_id} execution failed: {str(e)}")
-            return {
-                'task_id': task.task_id,
-                'agent_name': task.agent.name,
-                'error': str(e),
-                'success': False
-            }
+            raise
+
+    async def aexecute_task(self, task: Task) -> Dict[str, Any]:
+        """
+        以协程方式执行单个Agent任务
+
+        Args:
+            task: 要执行的任务
+
+        Returns:
+            任务执行结果
+
+        Raises:
+            Exception: 任务执行失败时抛出，由调度器标记任务失败并跳过受影响的任务
+        """
+        try:
+            logger.info(f"Executing task: {task.task_id} with agent: {task.agent.name}")
+
+            result_content = ""
+            async for chunk in self.async_art.run(**self._task_run_args(task)):
+                if 'content' in chunk and isinstance(chunk['content'], str):
+                    result_content += chunk['content']
+
+            return self._task_result(task, result_content)
+
+        except Exception as e:
+            logger.error(f"Task {task.task_id} execution failed: {str(e)}")
+            raise
+
+    @property
+    def async_art(self) -> AsyncART:
+        """arun模式下使用的异步ART实例，其LLM客户端受全局及模型级并发预算约束"""
+        if self._async_art is None:
+            self._async_art = AsyncART(self.runtime_config, self.chat_config, cache=self.cache)
+            self._async_art.client.limiter = self.limiter
+        return self._async_art
+
+    def _task_run_args(self, task: Task) -> Dict[str, Any]:
+        """根据任务输入准备ART.run的参数"""
+        # 准备消息
+        messages = []
+        if task.inputs and 'messages' in task.inputs:
+            messages = task.inputs['messages']
+        elif task.inputs and 'user_message' in task.inputs:
+            messages = [UserMessage(content=task.inputs['user_message'])]
+        messages = [mess.to_message() if isinstance(mess, Message) else mess for mess in messages]
+
+        # 上游任务的输出按绑定名称作为消息放在任务自身消息之前，消息内容直接引用上游输出
+        if task.inputs_from:
+            bound_messages = [
+                {'role': Role.USER.value, 'name': name, 'content': value if isinstance(value, str) else to_str_format(value)}
+                for name, value in task.resolve_inputs(self.scheduler.tasks).items()
+            ]
+            messages = bound_messages + messages
+
+        return {
+            'agent': task.agent,
+            'messages': messages,
+            'chat_config': task.inputs.get('chat_config', self.chat_config),
+            'max_chat_times': task.inputs.get('max_chat_times', DEFAULT_MAX_CHAT_TIMES),
+            'stream': False,  # 多Agent环境下不使用流式输出
+            'cancel_token': task.cancel_token,
+        }
+
+    @staticmethod
+    def _task_result(task: Task, content: str) -> Dict[str, Any]:
+        return {
+            'task_id': task.task_id,
+            'agent_name': task.agent.name,
+            'content': content,
+            'success': True
+        }
 
     def run(
         self,
@@ -158,9 +235,11 @@ class MultiAgentART:
             执行状态和结果
         """
         try:
-            # 验证DAG
-            if not self.scheduler.validate_dag():
-                yield {'error': 'Invalid DAG: cycle detected or missing dependencies'}
+            # 验证DAG，compile/instantiate得到的调度器已经校验过
+            try:
+                self.scheduler.ensure_valid()
+            except ValueError as e:
+                yield {'error': str(e)}
                 return
 
             # 开始执行
@@ -169,45 +248,110 @@ class MultiAgentART:
 
             # 执行DAG调度
             for dag_event in self.scheduler.run(self.execute_task):
-                # 更新状态
-                if 'task_started' in dag_event:
-                    task_id = dag_event['task_started']
-                    self.status.update_task_status(task_id, TaskStatus.RUNNING)
-
-                elif 'task_completed' in dag_event:
-                    task_id = dag_event['task_completed']
-                    result = dag_event['result']
-                    self.status.update_task_status(
-                        task_id,
-                        TaskStatus.COMPLETED,
-                        result=result
-                    )
-
-                elif 'task_failed' in dag_event:
-                    task_id = dag_event['task_failed']
-                    error = dag_event['error']
-                    self.status.update_task_status(
-                        task_id,
-                        TaskStatus.FAILED,
-                        error=error
-                    )
-
+                self._update_status(dag_event)
                 # 传递DAG事件
                 yield dag_event
 
             # 结束执行
-            if self.status.failed_tasks:
-                self.status.end_execution("completed_with_errors")
-                yield {'multi_agent_status': 'completed_with_errors'}
-            else:
-                self.status.end_execution("completed")
-                yield {'multi_agent_status': 'completed'}
+            yield self._end_execution()
 
         except Exception as e:
             logger.error(f"MultiAgent execution failed: {str(e)}")
             self.status.end_execution("failed")
             yield {'error': f'MultiAgent execution failed: {str(e)}'}
 
+    async def arun(
+        self,
+        messages: Optional[List] = None,
+        global_inputs: Optional[Dict[str, Any]] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        以asyncio协程的方式运行多Agent系统，任务作为协程调度，不占用工作线程
+
+        Args:
+            messages: 全局消息列表
+            global_inputs: 全局输入参数
+            max_concurrency: 同时运行的最大任务数，None表示不限制（LLM请求仍受并发预算约束）
+            **kwargs: 额外参数
+
+        Yields:
+            执行状态和结果，与run一致
+        """
+        try:
+            # 验证DAG，compile/instantiate得到的调度器已经校验过
+            try:
+                self.scheduler.ensure_valid()
+            except ValueError as e:
+                yield {'error': str(e)}
+                return
+
+            # 开始执行
+            self.status.start_execution()
+            yield {'multi_agent_status': 'start', 'total_tasks': len(self.scheduler.tasks)}
+
+            # 执行DAG调度
+            async for dag_event in self.scheduler.arun(self.aexecute_task, max_concurrency=max_concurrency):
+                self._update_status(dag_event)
+                yield dag_event
+
+            # 结束执行
+            yield self._end_execution()
+
+        except Exception as e:
+            logger.error(f"MultiAgent execution failed: {str(e)}")
+            self.status.end_execution("failed")
+            yield {'error': f'MultiAgent execution failed: {str(e)}'}
+
+    def _update_status(self, dag_event: Dict[str, Any]) -> None:
+        """根据DAG事件更新状态"""
+        if 'task_started' in dag_event:
+            task_id = dag_event['task_started']
+            self.status.update_task_status(task_id, TaskStatus.RUNNING)
+
+        elif 'task_completed' in dag_event:
+            task_id = dag_event['task_completed']
+            result = dag_event['result']
+            self.status.update_task_status(
+                task_id,
+                TaskStatus.COMPLETED,
+                result=result
+            )
+
+        elif 'task_failed' in dag_event:
+            task_id = dag_event['task_failed']
+            error = dag_event['error']
+            self.status.update_task_status(
+                task_id,
+                TaskStatus.FAILED,
+                error=error
+            )
+
+        elif 'task_skipped' in dag_event:
+            self.status.update_task_status(
+                dag_event['task_skipped'],
+                TaskStatus.SKIPPED,
+                reason=dag_event['reason']
+            )
+
+        elif 'task_retry' in dag_event:
+            task_id = dag_event['task_retry']
+            self.status.update_task_status(
+                task_id,
+                TaskStatus.PENDING,
+                error=dag_event['error'],
+                attempt=dag_event['attempt']
+            )
+
+    def _end_execution(self) -> Dict[str, Any]:
+        """结束执行并返回最终状态事件"""
+        if self.status.failed_tasks or self.status.skipped_tasks:
+            self.status.end_execution("completed_with_errors")
+            return {'multi_agent_status': 'completed_with_errors'}
+        self.status.end_execution("completed")
+        return {'multi_agent_status': 'completed'}
+
     def get_status(self) -> Dict[str, Any]:
         """获取当前运行状态"""
         return {
@@ -216,9 +360,39 @@ class MultiAgentART:
         }
 
     def reset(self) -> None:
-        """重置运行环境"""
+        """重置运行环境，调度器的线程池被保留，可以再次调用run"""
         self.scheduler.reset()
-        self.status = MultiAgentRunTimeStatus(self.runtime_config)
+        self.status = self._new_status()
+
+    def compile(self) -> 'MultiAgentART':
+        """编译任务DAG作为模板，之后通过instantiate为每个请求创建运行实例"""
+        self.scheduler.compile()
+        return self
+
+    def instantiate(self, inputs: Optional[Dict[str, Dict[str, Any]]] = None) -> 'MultiAgentART':
+        """
+        基于编译后的DAG模板创建新的运行实例，共享ART、LLM客户端与线程池，不重复校验和复制任务图
+
+        Args:
+            inputs: 以task_id为键的任务输入，覆盖模板中对应任务的输入
+
+        Returns:
+            可以独立运行的MultiAgentART实例
+        """
+        instance = copy.copy(self)
+        instance.scheduler = self.scheduler.instantiate(inputs)
+        instance.status = instance._new_status()
+        return instance
+
+    def shutdown(self, wait: bool = True) -> None:
+        """释放调度器的线程池"""
+        self.scheduler.shutdown(wait=wait)
+
+    def _new_status(self) -> MultiAgentRunTimeStatus:
+        status = MultiAgentRunTimeStatus(self.runtime_config)
+        for task in self.scheduler.tasks.values():
+            status.add_task(task)
+        return status
 
     def get_task_results(self) -> Dict[str, Any]:
         """获取所有任务的执行结果"""
@@ -1,6 +1,8 @@
+import copy
 from enum import Enum
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from typing import List, Dict, Any, Optional, Collection, Container, Tuple, TYPE_CHECKING
 from .base.data_class import DataClass
+from ..utils.cancellation import CancelToken
 
 if TYPE_CHECKING:
     from .base.agent import Agent
@@ -27,6 +29,8 @@ class Task(DataClass):
         outputs: Optional[Dict[str, Any]] = None,
         priority: int = 0,
         timeout: Optional[float] = None,
+        retries: int = 0,
+        inputs_from: Optional[Dict[str, str]] = None,
         **kwargs
     ):
         """
@@ -39,28 +43,104 @@ class Task(DataClass):
             inputs: 任务输入数据
             outputs: 任务输出数据
             priority: 任务优先级，数字越大优先级越高
-            timeout: 任务执行超时时间（秒）
+            timeout: 任务执行超时时间（秒），超时的任务会被取消；同步执行的任务无法被强制中断，
+                超时后其工作线程仍会运行到执行函数返回
+            retries: 任务超时后的最大重试次数
+            inputs_from: 输入绑定，键为输入名称，值为"<上游task_id>.<输出字段>"（省略字段时为content），
+                如 {'summary': 'task_a.content'}；上游任务会被自动加入依赖列表。
+                task_id本身含"."时，绑定值与某个task_id完全相同则视为省略了字段，调度器校验时按已有任务重新解析
             **kwargs: 其他参数
         """
         super().__init__()
         self.task_id = task_id
         self.agent = agent
-        self.dependencies = dependencies or []
+        self._declared_dependencies = list(dependencies or [])
+        self.dependencies = list(self._declared_dependencies)
+        self.inputs_from = inputs_from or {}
+        for source_id, _ in map(parse_binding, self.inputs_from.values()):
+            if source_id not in self.dependencies:
+                self.dependencies.append(source_id)
         self.inputs = inputs or {}
         self.outputs = outputs or {}
         self.priority = priority
         self.timeout = timeout
+        self.retries = retries
+        self.attempts = 0
+        self.cancel_token: Optional[CancelToken] = None
         self.status = TaskStatus.PENDING
         self.start_time = None
         self.end_time = None
         self.error_message = None
         self.kwargs = kwargs
 
-    def is_ready(self, completed_tasks: List[str]) -> bool:
+    def instantiate(self, inputs: Optional[Dict[str, Any]] = None) -> 'Task':
+        """
+        基于当前任务创建一个新的运行实例，共享Agent与依赖列表等静态结构，只替换输入并重置运行状态
+
+        Args:
+            inputs: 覆盖到当前任务输入上的新输入
+
+        Returns:
+            新的任务实例
+        """
+        task = copy.copy(self)
+        task.inputs = {**self.inputs, **inputs} if inputs else dict(self.inputs)
+        task.outputs = {}
+        task.status = TaskStatus.PENDING
+        task.start_time = None
+        task.end_time = None
+        task.error_message = None
+        task.attempts = 0
+        task.cancel_token = None
+        return task
+
+    def bind_inputs(self, task_ids: Container[str]) -> None:
+        """
+        按已有的任务重新解析输入绑定，并据此更新依赖列表
+
+        Args:
+            task_ids: 调度器中全部任务的ID
+
+        Raises:
+            ValueError: 如果绑定的上游任务不存在
+        """
+        dependencies = list(self._declared_dependencies)
+        for name, binding in self.inputs_from.items():
+            source_id, _ = self._parse_input(name, binding, task_ids)
+            if source_id not in dependencies:
+                dependencies.append(source_id)
+        self.dependencies = dependencies
+
+    def resolve_inputs(self, tasks: Dict[str, 'Task']) -> Dict[str, Any]:
+        """
+        按inputs_from从上游任务的输出中解析输入，返回的是上游输出对象本身的引用，不做复制
+
+        Args:
+            tasks: 以task_id为键的任务字典
+
+        Returns:
+            以输入名称为键的输入值
+        """
+        resolved = {}
+        for name, binding in self.inputs_from.items():
+            source_id, key = self._parse_input(name, binding, tasks)
+            source = tasks[source_id]
+            if key not in source.outputs:
+                raise ValueError(f"Task {self.task_id} binds input '{name}' to missing output '{binding}'")
+            resolved[name] = source.outputs[key]
+        return resolved
+
+    def _parse_input(self, name: str, binding: str, task_ids: Container[str]) -> Tuple[str, str]:
+        try:
+            return parse_binding(binding, task_ids)
+        except ValueError as e:
+            raise ValueError(f"Task {self.task_id} binds input '{name}' to '{binding}': {e}") from e
+
+    def is_ready(self, completed_tasks: Collection[str]) -> bool:
         """检查任务是否准备就绪（所有依赖任务都已完成）"""
         return all(dep in completed_tasks for dep in self.dependencies)
 
-    def can_run_parallel(self, running_tasks: List[str]) -> bool:
+    def can_run_parallel(self, running_tasks: Collection[str]) -> bool:
         """检查任务是否可以并行运行（没有正在运行的依赖任务）"""
         return not any(dep in running_tasks for dep in self.dependencies)
 
@@ -85,19 +165,52 @@ class Task(DataClass):
         self.end_time = datetime.now()
         self.error_message = error_message
 
+    def mark_skipped(self, reason: str):
+        """标记任务为跳过状态（上游任务失败）"""
+        from datetime import datetime
+        self.status = TaskStatus.SKIPPED
+        self.end_time = datetime.now()
+        self.error_message = reason
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
             "task_id": self.task_id,
             "agent_name": self.agent.name if self.agent else None,
             "dependencies": self.dependencies,
+            "inputs_from": self.inputs_from,
             "inputs": self.inputs,
             "outputs": self.outputs,
             "priority": self.priority,
             "timeout": self.timeout,
+            "retries": self.retries,
+            "attempts": self.attempts,
             "status": self.status.value,
             "start_time": self.start_time.isoformat() if self.start_time else None,
             "end_time": self.end_time.isoformat() if self.end_time else None,
             "error_message": self.error_message,
             **self.kwargs
-        }
\ No newline at end of file
+        }
+
+
+def parse_binding(binding: str, task_ids: Optional[Container[str]] = None) -> Tuple[str, str]:
+    """
+    解析输入绑定"<task_id>.<输出字段>"，省略字段时默认为content
+
+    Args:
+        binding: 输入绑定
+        task_ids: 已有的任务ID，传入时绑定值与某个task_id完全相同则视为省略了字段，并检查上游任务是否存在
+
+    Raises:
+        ValueError: 如果输出字段为空，或传入了task_ids而上游任务不存在
+    """
+    if task_ids is not None and binding in task_ids:
+        return binding, 'content'
+    source_id, dot, key = binding.rpartition('.')
+    if not source_id:
+        source_id, key = binding, 'content'
+    if dot and not key:
+        raise ValueError('empty output field')
+    if task_ids is not None and source_id not in task_ids:
+        raise ValueError(f'unknown task {source_id}')
+    return source_id, key
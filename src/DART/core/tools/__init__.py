@@ -0,0 +1,3 @@
+from .executor import ToolExecutor, ToolLimits, ToolExecutionError, ToolTimeoutError, default_tool_executor
+from .handoff import HandoffTool
+from .registry import ToolRegistry
@@ -0,0 +1,303 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..constants.configs import DEFAULT_MAX_TOOL_WORKERS
+
+EXECUTOR_MODES = ('thread', 'process', 'async')
+
+
+class ToolExecutionError(Exception):
+    """A tool call failed. `cause` is the exception raised by the tool, if any."""
+
+    def __init__(self, name: str, arguments: Any = None, cause: Optional[BaseException] = None,
+                 message: Optional[str] = None):
+        super().__init__(message or str(cause))
+        self.name = name
+        self.arguments = arguments
+        self.cause = cause
+
+
+class ToolTimeoutError(ToolExecutionError):
+    """A tool call did not finish within its timeout."""
+
+    def __init__(self, name: str, arguments: Any = None, timeout: Optional[float] = None):
+        super().__init__(name, arguments, message=f"Tool '{name}' timed out after {timeout}s")
+        self.timeout = timeout
+
+
+class ToolLimits:
+    """
+    Per-tool limits: at most `max_concurrency` calls in flight, at most `rate_limit` calls started per second,
+    and a `timeout` in seconds for each call (measured from submission, so queueing counts).
+
+    Limits are applied before a call is handed to the pool, so a throttled tool waits in its own queue instead
+    of holding a worker thread. A call that times out gives its slot back at once; a sync tool cannot be
+    interrupted, so its thread keeps running until the tool returns and the pool has one worker less until then.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.timeout = timeout
+        self._slot_lock = threading.Lock()
+        self._running = 0
+        self._waiting = deque()
+        self._rate_lock = threading.Lock()
+        self._next_start = 0.0
+        self._async_semaphore = None
+
+    def acquire(self, start: Callable[[], bool]) -> None:
+        """
+        Call `start` now if a slot is free, otherwise queue it until a running call releases its slot.
+        `start` returns False if the call will not run (e.g. it was cancelled while queued), and the slot
+        passes on to the next queued call.
+        """
+        with self._slot_lock:
+            if self.max_concurrency and self._running >= self.max_concurrency:
+                self._waiting.append(start)
+                return
+            self._running += 1
+        if not start():
+            self.release()
+
+    def release(self) -> None:
+        """Give a slot back, handing it straight to the next queued call that starts, if there is one."""
+        # a loop rather than recursion, so a long run of cancelled calls cannot exhaust the stack
+        while True:
+            with self._slot_lock:
+                if not self._waiting:
+                    self._running -= 1
+                    return
+                start = self._waiting.popleft()
+            if start():
+                return
+
+    def reserve(self) -> float:
+        """Reserve the next start slot under the rate limit and return how long to wait for it."""
+        if not self.rate_limit:
+            return 0.0
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 1.0 / self.rate_limit
+            return start - now
+
+    def async_semaphore(self) -> Optional[asyncio.Semaphore]:
+        # only used on the executor's own event loop, so it is created once
+        if self.max_concurrency and self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._async_semaphore
+
+
+class ToolExecutor:
+    """
+    A long-lived executor for tool calls, shared across agents and turns so that small tool calls do not pay
+    for pool start-up.
+
+    Modes:
+        thread: tools run on a persistent thread pool; coroutine tools are run to completion on the worker.
+        process: sync tools run on a persistent process pool (they must be picklable); limits are applied
+            on the dispatching thread.
+        async: a background event loop awaits coroutine tools natively; sync tools are offloaded to the
+            thread pool.
+    """
+
+    def __init__(
+            self,
+            mode: str = 'thread',
+            max_workers: int = DEFAULT_MAX_TOOL_WORKERS,
+            default_timeout: Optional[float] = None,
+            limits: Optional[Dict[str, ToolLimits]] = None,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f'mode must be one of {EXECUTOR_MODES}, but got {mode}')
+        self.mode = mode
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.limits: Dict[str, ToolLimits] = dict(limits or {})
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tool')
+        self._processes = ProcessPoolExecutor(max_workers=max_workers) if mode == 'process' else None
+        self._loop = None
+        self._loop_thread = None
+        if mode == 'async':
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name='tool-loop', daemon=True)
+            self._loop_thread.start()
+
+    def set_limits(self, name: str, max_concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                   timeout: Optional[float] = None) -> None:
+        self.limits[name] = ToolLimits(max_concurrency=max_concurrency, rate_limit=rate_limit, timeout=timeout)
+
+    def _timeout_of(self, name: str) -> Optional[float]:
+        limits = self.limits.get(name)
+        if limits is not None and limits.timeout is not None:
+            return limits.timeout
+        return self.default_timeout
+
+    def submit(self, name: str, func: Callable, kwargs: Dict[str, Any]) -> Future:
+        """Schedule one tool call. The future raises ToolExecutionError if the tool raises."""
+        if self.mode == 'async':
+            return asyncio.run_coroutine_threadsafe(self._acall(name, func, kwargs), self._loop)
+        limits = self.limits.get(name)
+        if limits is None:
+            return self._threads.submit(self._call, name, func, kwargs)
+        future = _LimitedFuture(limits)
+        limits.acquire(lambda: self._start_limited(future, name, func, kwargs))
+        return future
+
+    def _start_limited(self, future: '_LimitedFuture', name: str, func: Callable, kwargs: Dict[str, Any]) -> bool:
+        # the call has its slot; returns False to pass the slot on when the call was cancelled while queued
+        # or cannot be submitted
+        if not future.set_running_or_notify_cancel():
+            return False
+        delay = future.limits.reserve()
+        if delay > 0:
+            timer = threading.Timer(delay, self._submit_delayed, (future, name, func, kwargs))
+            timer.daemon = True
+            timer.start()
+            return True
+        return self._submit_limited(future, name, func, kwargs)
+
+    def _submit_delayed(self, future: '_LimitedFuture', name: str, func: Callable, kwargs: Dict[str, Any]) -> None:
+        if not self._submit_limited(future, name, func, kwargs):
+            future.release_slot()
+
+    def _submit_limited(self, future: '_LimitedFuture', name: str, func: Callable, kwargs: Dict[str, Any]) -> bool:
+        try:
+            inner = self._threads.submit(self._call, name, func, kwargs)
+        except RuntimeError as e:
+            # the pool has been shut down
+            future.set_exception(ToolExecutionError(name, kwargs, e))
+            return False
+        inner.add_done_callback(future.copy_from)
+        return True
+
+    def run_calls(self, calls: List[Tuple[str, Callable, Dict[str, Any]]]) -> List[Any]:
+        """
+        Run (name, func, kwargs) calls concurrently and return their results in order. A failed or timed-out
+        call yields a ToolExecutionError instance instead of raising, so one bad tool does not hide the others.
+        """
+        submitted = [
+            (name, kwargs, self.submit(name, func, kwargs), time.monotonic()) for name, func, kwargs in calls
+        ]
+        results = []
+        for name, kwargs, future, start in submitted:
+            timeout = self._timeout_of(name)
+            try:
+                remaining = None if timeout is None else max(0.0, start + timeout - time.monotonic())
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                if not future.cancel() and isinstance(future, _LimitedFuture):
+                    future.release_slot()
+                results.append(ToolTimeoutError(name, kwargs, timeout))
+            except ToolExecutionError as e:
+                results.append(e)
+            except Exception as e:
+                results.append(ToolExecutionError(name, kwargs, e))
+        return results
+
+    def _call(self, name: str, func: Callable, kwargs: Dict[str, Any]) -> Any:
+        try:
+            if inspect.iscoroutinefunction(func):
+                return asyncio.run(func(**kwargs))
+            if self._processes is not None:
+                return self._processes.submit(func, **kwargs).result()
+            return func(**kwargs)
+        except Exception as e:
+            raise ToolExecutionError(name, kwargs, e) from e
+
+    async def _acall(self, name: str, func: Callable, kwargs: Dict[str, Any]) -> Any:
+        limits = self.limits.get(name)
+        semaphore = limits.async_semaphore() if limits is not None else None
+        timeout = self._timeout_of(name)
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                if limits is not None:
+                    delay = limits.reserve()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if inspect.iscoroutinefunction(func):
+                    # cancel the coroutine itself on timeout instead of leaving it running
+                    return await asyncio.wait_for(func(**kwargs), timeout)
+                return await self._loop.run_in_executor(self._threads, lambda: func(**kwargs))
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+        except asyncio.TimeoutError:
+            raise ToolTimeoutError(name, kwargs, timeout)
+        except Exception as e:
+            raise ToolExecutionError(name, kwargs, e) from e
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._loop is not None:
+            # let cancelled or still running coroutine tools unwind before the loop stops
+            stopped = asyncio.run_coroutine_threadsafe(self._cancel_pending(), self._loop)
+            if wait:
+                stopped.result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if wait:
+                self._loop_thread.join()
+                self._loop.close()
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+
+    @staticmethod
+    async def _cancel_pending() -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class _LimitedFuture(Future):
+    """The future of a call under ToolLimits. It holds one slot of the limits until the call ends or times out."""
+
+    def __init__(self, limits: ToolLimits):
+        super().__init__()
+        self.limits = limits
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def release_slot(self) -> None:
+        with self._release_lock:
+            if self._released:
+                return
+            self._released = True
+        self.limits.release()
+
+    def copy_from(self, inner: Future) -> None:
+        self.release_slot()
+        error = inner.exception()
+        if error is not None:
+            self.set_exception(error)
+        else:
+            self.set_result(inner.result())
+
+
+_default_executor: Optional[ToolExecutor] = None
+_default_lock = threading.Lock()
+
+
+def default_tool_executor() -> ToolExecutor:
+    """The process-wide thread-mode executor used by agents that do not set their own."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = ToolExecutor()
+        return _default_executor
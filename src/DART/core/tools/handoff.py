@@ -0,0 +1,27 @@
+from typing import Any
+
+
+class HandoffTool:
+    """
+    The tool form of a handoff agent: calling it returns the agent. It carries `__name__` and `__doc__` like
+    a function, so it is described and dispatched like any other tool, but it is a plain object created once
+    per agent instead of source code compiled with exec.
+    """
+
+    def __init__(self, agent: Any):
+        self.agent = agent
+        self.__name__ = agent.name
+        self.__qualname__ = agent.name
+        self.__doc__ = ''.join(
+            [
+                '调用该工具将返回一个Agent智能体，该智能体对应的角色定位和任务描述如下：\n',
+                f'**角色定位**：\n{agent.persona}\n\n\n',
+                f'**任务描述**：\n{agent.description}',
+            ]
+        )
+
+    def __call__(self) -> Any:
+        return self.agent
+
+    def __repr__(self) -> str:
+        return f'HandoffTool({self.__name__})'
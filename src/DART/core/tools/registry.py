@@ -0,0 +1,31 @@
+from typing import Callable, List, Optional, Tuple
+
+from ...utils.tool_utils import compile_tool_desc
+
+
+class ToolRegistry:
+    """
+    Caches the tool payload of one agent. The payload is rebuilt only when the agent's tool list changes
+    (compared by identity), so repeated runs send byte-identical tools and providers can reuse cached prefixes.
+    """
+
+    def __init__(self):
+        self._tools: Optional[Tuple[Callable, ...]] = None
+        self._descs: List[dict] = []
+
+    def tool_descs(self, tools: List[Callable]) -> List[dict]:
+        """The compiled tool descriptions; the returned list is shared and must not be mutated."""
+        tools = tuple(tool for tool in tools if callable(tool))
+        if not self._is_current(tools):
+            self._descs = [compile_tool_desc(tool, index) for index, tool in enumerate(tools)]
+            self._tools = tools
+        return self._descs
+
+    def _is_current(self, tools: Tuple[Callable, ...]) -> bool:
+        if self._tools is None or len(self._tools) != len(tools):
+            return False
+        return all(cached is tool for cached, tool in zip(self._tools, tools))
+
+    def invalidate(self) -> None:
+        self._tools = None
+        self._descs = []
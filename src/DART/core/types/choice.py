@@ -1,18 +1,169 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
 from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
 
 from .role import Role
 from ..base.data_class import DataClass, valid_str
 
+_ROLES = frozenset(Role.values())
+
+
+class ThinkTagParser:
+    """
+    增量解析流式文本中的<think>...</think>标签的状态机，把每个分片路由为思考内容或回复内容。
+    标签可能被拆分在相邻的分片中，无法确定是否为标签的尾部字符会暂存到下一个分片。
+    流结束时<think>仍未闭合（回复被max_tokens截断，或模型只输出了开始标签），标签之后的文本改为回复内容：
+    先输出一个RETRACTED分片撤回已经作为思考内容输出的这部分文本，再将其作为回复内容输出
+    """
+
+    __slots__ = ('thinking', 'started', '_pending', '_strip', '_unclosed')
+
+    OPEN_TAG = '<think>'
+    CLOSE_TAG = '</think>'
+    # 撤回分片的类型，文本为之前输出的思考内容的末尾部分
+    RETRACTED = 'thinking_retracted'
+
+    def __init__(self):
+        self.thinking = False
+        self.started = False
+        self._pending = ''
+        self._strip = False
+        # 当前未闭合的<think>之后已输出的思考内容
+        self._unclosed = []
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        解析一个分片
+
+        Returns:
+            (类型, 文本)的列表，类型为'thinking'或'content'
+        """
+        self.started = True
+        segments = []
+        if not self._pending and '<' not in text:
+            # 绝大多数分片不含标签字符，直接路由
+            self._emit(segments, text)
+            return segments
+        buf = self._pending + text
+        self._pending = ''
+        while buf:
+            tag = self.CLOSE_TAG if self.thinking else self.OPEN_TAG
+            index = buf.find(tag)
+            if index >= 0:
+                self._emit(segments, buf[:index])
+                buf = buf[index + len(tag):]
+                self.thinking = not self.thinking
+                self._unclosed = []
+                # 标签后的换行不属于正文
+                self._strip = True
+                continue
+            keep = self._partial_tag_len(buf, tag)
+            self._emit(segments, buf[:len(buf) - keep])
+            self._pending = buf[len(buf) - keep:]
+            break
+        return segments
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """流结束时输出暂存的字符；<think>未闭合时，撤回其后已输出的思考内容，并将全部文本作为回复内容输出"""
+        if self.thinking:
+            retracted = ''.join(self._unclosed)
+            text = (retracted + self._pending).strip()
+            self.thinking = False
+            self._unclosed = []
+            self._pending = ''
+            segments = [(self.RETRACTED, retracted)] if retracted else []
+            if text:
+                segments.append(('content', text))
+            return segments
+        segments = []
+        self._emit(segments, self._pending)
+        self._pending = ''
+        return segments
+
+    def _emit(self, segments: List[Tuple[str, str]], text: str) -> None:
+        if self._strip:
+            text = text.lstrip()
+            if text:
+                self._strip = False
+        if text:
+            if self.thinking:
+                self._unclosed.append(text)
+            segments.append(('thinking' if self.thinking else 'content', text))
+
+    @staticmethod
+    def _partial_tag_len(text: str, tag: str) -> int:
+        """text末尾与tag前缀重合的最大长度"""
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+
+class ChunkedText:
+    """
+    以分片列表累积流式文本的属性。追加只记录分片，读取时才一次性拼接，
+    避免长文本逐块 += 带来的平方级复制；拼接结果保存在名为“_属性名”的slot中，to_dict等仍可正常使用
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = f'_{name}'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        chunks = obj._chunks.pop(self.name, None)
+        if chunks is not None:
+            setattr(obj, self.slot, ''.join(chunks))
+        return getattr(obj, self.slot, None)
+
+    def __set__(self, obj, value):
+        obj._chunks.pop(self.name, None)
+        setattr(obj, self.slot, value)
+
+
+class StreamAccumulator(DataClass):
+    """
+    带有ChunkedText属性的数据类的基类，未拼接的分片保存在__slots__中，不会出现在to_dict的结果里。
+    子类需要在__slots__中声明每个ChunkedText属性的“_属性名”存储位置，并在_fields中列出to_dict的字段顺序
+    """
+
+    __slots__ = ('_chunks',)
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = {}
+
+    def _append(self, name: str, text: str) -> None:
+        chunks = self._chunks.get(name)
+        if chunks is None:
+            chunks = self._chunks[name] = [valid_str(getattr(self, name))]
+        chunks.append(text)
+
+    def _finalize(self) -> None:
+        for name in list(self._chunks):
+            getattr(self, name)
+
+    def to_dict(self, include_none: bool = True) -> Dict:
+        self._finalize()
+        return super().to_dict(include_none=include_none)
+
+
+class ToolCallFunction(StreamAccumulator):
+    __slots__ = ('name', '_arguments')
+    _fields = ('name', 'arguments')
+
+    arguments = ChunkedText()
 
-class ToolCallFunction(DataClass):
     def __init__(self, name: str = None, arguments: str = None):
+        super().__init__()
         self.name = name
         self.arguments = arguments
 
 
 class ToolCall(DataClass):
+    __slots__ = ('index', 'id', 'type', 'function')
+
     def __init__(self, index: int = None, id: str = None, type: str = None, function: ToolCallFunction = None):
         self.index = index
         self.id = id
@@ -20,7 +171,14 @@ class ToolCall(DataClass):
         self.function = function
 
 
-class Choice(DataClass):
+class Choice(StreamAccumulator):
+    __slots__ = ('role', 'tool_calls', '_content', '_refusal', '_thinking', '_think_parser')
+    _fields = ('role', 'content', 'tool_calls', 'refusal', 'thinking')
+
+    content = ChunkedText()
+    refusal = ChunkedText()
+    thinking = ChunkedText()
+
     def __init__(
             self,
             role: Optional[str] = None,
@@ -35,60 +193,76 @@ class Choice(DataClass):
         self.tool_calls = tool_calls or {}
         self.refusal = refusal or ''
         self.thinking = thinking or ''
+        self._think_parser = ThinkTagParser()
+
+    def merge_delta(self, delta: ChoiceDelta) -> List[Tuple[str, str]]:
+        """
+        合并一个流式分片，content中<think>标签内的文本随分片到达直接路由到thinking
 
-    def merge_delta(self, delta: ChoiceDelta):
+        Returns:
+            本分片新增的(类型, 文本)列表，类型为'thinking'或'content'
+        """
         if not isinstance(delta, ChoiceDelta):
-            return
+            return []
 
-        if delta.role and delta.role in Role.values():
+        segments = []
+        if delta.role and delta.role in _ROLES:
             self.role = delta.role
+        # thinking是部分服务返回的扩展字段，从model_extra中读取以避开pydantic缺失属性时的异常开销
+        thinking = delta.model_extra.get('thinking') if delta.model_extra else None
+        if isinstance(thinking, str) and thinking:
+            segments.append(('thinking', thinking))
         if isinstance(delta.content, str):
-            self.content += delta.content
+            segments.extend(self._think_parser.feed(delta.content))
+        self._merge_segments(segments)
         if isinstance(delta.refusal, str):
-            self.refusal += delta.refusal
-        if hasattr(delta, 'thinking') and isinstance(delta.thinking, str):
-            self.thinking += delta.thinking
+            self._append('refusal', delta.refusal)
         if delta.tool_calls:
-            tool_calls = {
-                self._key_of_tool(tool): tool
-                for tool in delta.tool_calls if isinstance(tool, ChoiceDeltaToolCall)
-            }
-            for key, tool in tool_calls.items():
-                if key in self.tool_calls:
+            for tool in delta.tool_calls:
+                if not isinstance(tool, ChoiceDeltaToolCall):
+                    continue
+                key = self._key_of_tool(tool)
+                current = self.tool_calls.get(key)
+                if current is not None:
                     if isinstance(tool.id, str) and tool.id:
-                        self.tool_calls[key].id += tool.id
+                        current.id += tool.id
                     if isinstance(tool.function, ChoiceDeltaToolCallFunction):
                         if isinstance(tool.function.name, str):
-                            self.tool_calls[key].function.name += tool.function.name
+                            current.function.name += tool.function.name
                         if isinstance(tool.function.arguments, str):
-                            self.tool_calls[key].function.arguments += tool.function.arguments
+                            current.function._append('arguments', tool.function.arguments)
                     if isinstance(tool.type, str) and tool.type:
-                        self.tool_calls[key].type += tool.type
+                        current.type += tool.type
                 else:
                     new_tool = ToolCall(index=tool.index, id=tool.id, type=tool.type)
                     new_tool.function = ToolCallFunction(name='', arguments='')
                     if isinstance(tool.function, ChoiceDeltaToolCallFunction):
                         new_tool.function.name = valid_str(tool.function.name)
                         new_tool.function.arguments = valid_str(tool.function.arguments)
-                    self.tool_calls[self._key_of_tool(tool)] = new_tool
-
-    def split_thinking_from_content(self):
-        if '<think>' in self.content and '</think>' in self.content:
-            is_content = False
-        else:
-            is_content = True
-        thinking = []
-        content = []
-        for line in self.content.split('\n'):
-            line = line.strip()
-            if is_content:
-                content.append(line)
+                    self.tool_calls[key] = new_tool
+        return segments
+
+    def _merge_segments(self, segments: List[Tuple[str, str]]) -> None:
+        for kind, text in segments:
+            if kind == ThinkTagParser.RETRACTED:
+                thinking = self.thinking
+                if thinking.endswith(text):
+                    self.thinking = thinking[:len(thinking) - len(text)]
             else:
-                thinking.append(line)
-            if '</think>' in line and len(line) < 10:
-                is_content = True
-        self.thinking = '\n'.join(thinking)
-        self.content = '\n'.join(content)
+                self._append(kind, text)
+
+    def split_thinking_from_content(self) -> List[Tuple[str, str]]:
+        """
+        结束<think>标签的流式解析，返回暂存字符产生的分片。
+        content若是直接赋值而非通过merge_delta合并的，则在此处整体解析一次
+        """
+        segments = []
+        if not self._think_parser.started and self.content:
+            content, self.content = self.content, ''
+            segments.extend(self._think_parser.feed(content))
+        segments.extend(self._think_parser.finish())
+        self._merge_segments(segments)
+        return segments
 
     @staticmethod
     def _key_of_tool(tool: ChoiceDeltaToolCall):
@@ -0,0 +1,94 @@
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+
+class MessageLog:
+    """
+    append-only的消息日志。已追加的消息不会被修改或移动，因此视图只需记录边界，
+    所有视图共享同一份存储，追加消息不会复制之前轮次的消息
+    """
+
+    __slots__ = ('_messages',)
+
+    def __init__(self, messages: Optional[Iterable[Any]] = None):
+        self._messages: List[Any] = []
+        if messages is not None:
+            self.extend(messages)
+
+    def append(self, message: Any) -> None:
+        self._messages.append(message)
+
+    def extend(self, messages: Iterable[Any]) -> None:
+        self._messages.extend(messages)
+
+    def view(self, start: int = 0, end: Optional[int] = None, tail: Sequence[Any] = ()) -> 'MessageView':
+        """
+        返回[start, end)范围内消息的只读视图
+
+        Args:
+            start: 起始位置
+            end: 结束位置，默认为当前日志长度；之后追加的消息不会出现在视图中
+            tail: 附加在视图末尾、不写入日志的临时消息，如本轮的工具错误提示
+        """
+        end = len(self._messages) if end is None else min(end, len(self._messages))
+        return MessageView(self._messages, start, end, tuple(tail))
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._messages)
+
+
+class MessageView(Sequence):
+    """MessageLog的只读视图，创建和切片的开销与消息数量无关"""
+
+    __slots__ = ('_messages', '_start', '_end', '_tail')
+
+    def __init__(self, messages: List[Any], start: int, end: int, tail: tuple = ()):
+        self._messages = messages
+        self._start = start
+        self._end = max(start, end)
+        self._tail = tail
+
+    def __len__(self) -> int:
+        return self._end - self._start + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1 and stop <= self._end - self._start:
+                return MessageView(self._messages, self._start + start, self._start + max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('MessageView index out of range')
+        logged = self._end - self._start
+        if index < logged:
+            return self._messages[self._start + index]
+        return self._tail[index - logged]
+
+    def __iter__(self) -> Iterator[Any]:
+        messages = self._messages
+        for i in range(self._start, self._end):
+            yield messages[i]
+        yield from self._tail
+
+    def to_list(self) -> List[Any]:
+        """转换为发送给模型的消息列表，列表中是消息本身的引用"""
+        messages = self._messages[self._start:self._end]
+        messages.extend(self._tail)
+        return messages
+
+    def __repr__(self) -> str:
+        return f'MessageView({self.to_list()!r})'
+
+
+def shared_prefix(previous: Sequence[Any], current: Sequence[Any]) -> int:
+    """两个消息列表开头相同的消息数，即后一个请求可以复用前一个请求KV缓存的消息数"""
+    shared = 0
+    for old, new in zip(previous, current):
+        if old is not new and old != new:
+            break
+        shared += 1
+    return shared
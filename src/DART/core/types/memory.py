@@ -1,6 +1,161 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .message import SystemMessage
+from .role import Role
 from ..base.data_class import DataClass
+from ..constants.configs import DEFAULT_MEMORY_TOP_K, DEFAULT_MEMORY_RECENT_MESSAGES
+
+_SPEAKERS = {Role.USER.value: '用户', Role.ASSISTANT.value: '助手'}
 
 
 class Memory(DataClass):
-    def __init__(self):
+    """
+    代理的长期记忆：保存过去的对话轮次和工具结果及其向量。
+    运行时只保留最近的recent_messages条历史消息，更早的内容按与当前问题的余弦相似度召回top_k条片段注入提示词，
+    提示词长度不再随对话轮数无限增长。调用方传入的较早的历史消息在被移出提示词前先写入记忆，之后仍可召回。
+    """
+
+    def __init__(
+            self,
+            embedder: Any = None,
+            path: Optional[str] = None,
+            top_k: int = DEFAULT_MEMORY_TOP_K,
+            recent_messages: int = DEFAULT_MEMORY_RECENT_MESSAGES,
+            min_score: float = 0.0,
+    ):
+        """
+        Args:
+            embedder: 向量化模型（memory.Embedder），默认为本地的HashEmbedder
+            path: 持久化路径，记录保存在path.jsonl，向量以内存映射文件保存在path.vec
+            top_k: 每次召回的片段数
+            recent_messages: 原样保留的最近历史消息数，为0时保留全部历史消息
+            min_score: 召回片段的最低相似度
+        """
         super().__init__()
+        self.top_k = top_k
+        self.recent_messages = recent_messages
+        self.min_score = min_score
+        self.path = path
+        self.records: List[Dict[str, Any]] = []
+        # 已保存的记忆内容，写入历史消息时用于去重
+        self._contents = set()
+        self._embedder = embedder
+        self._index = None
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(f'{path}.jsonl'):
+            with open(f'{path}.jsonl', encoding='utf-8') as f:
+                self.records = [json.loads(line) for line in f if line.strip()]
+        self._contents = {record['content'] for record in self.records}
+
+    def _embed(self, texts: List[str]):
+        if self._embedder is None:
+            from ..memory import HashEmbedder
+            self._embedder = HashEmbedder()
+        vectors = self._embedder.embed(texts)
+        if self._index is None:
+            from ..memory import VectorIndex
+            path = f'{self.path}.vec' if self.path is not None else None
+            self._index = VectorIndex(vectors.shape[1], path=path, size=len(self.records))
+        return vectors
+
+    def add(self, content: str, kind: str = 'turn', metadata: Optional[Dict] = None) -> None:
+        """添加一条记忆"""
+        self.add_many([{'content': content, 'kind': kind, 'metadata': metadata or {}}])
+
+    def add_many(self, records: List[Dict[str, Any]]) -> None:
+        """批量添加记忆，每条记录包含content、kind和metadata，向量化只调用一次"""
+        records = [record for record in records if record.get('content')]
+        if not records:
+            return
+        with self._lock:
+            vectors = self._embed([record['content'] for record in records])
+            self._index.add(vectors)
+            self.records.extend(records)
+            self._contents.update(record['content'] for record in records)
+            if self.path is not None:
+                self._index.flush()
+                with open(f'{self.path}.jsonl', 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """召回与query最相关的记忆，按相似度从高到低返回(相似度, 记录)"""
+        if not query or not self.records:
+            return []
+        with self._lock:
+            vector = self._embed([query])[0]
+            hits = self._index.search(vector, self.top_k if top_k is None else top_k)
+        return [(score, self.records[i]) for i, score in hits if score >= self.min_score]
+
+    def recall_message(self, query: str) -> Optional[Dict[str, Any]]:
+        """将召回的记忆片段组织为一条系统消息，没有相关记忆时返回None"""
+        hits = self.search(query)
+        if not hits:
+            return None
+        snippets = '\n'.join(f'- {record["content"]}' for _, record in hits)
+        return SystemMessage(content=f'以下是与当前对话相关的历史记忆：\n{snippets}').to_message()
+
+    def select_messages(self, messages: Sequence[Dict], query: Optional[str]) -> List[Dict]:
+        """只保留最近的历史消息，并在其前面加上召回的记忆；移出的历史消息先写入记忆"""
+        messages = list(messages)
+        if self.recent_messages and len(messages) > self.recent_messages:
+            self.add_history(messages[:-self.recent_messages])
+            messages = messages[-self.recent_messages:]
+        recalled = self.recall_message(query) if query else None
+        return [recalled] + messages if recalled else messages
+
+    def add_history(self, messages: Iterable[Dict]) -> None:
+        """将历史消息写入记忆，已经保存过的内容（包括之前的运行中写入的）不会重复写入"""
+        records = []
+        for message in messages:
+            record = self._history_record(message)
+            if record is not None and record['content'] not in self._contents:
+                records.append(record)
+                self._contents.add(record['content'])
+        self.add_many(records)
+
+    @staticmethod
+    def _history_record(message: Dict) -> Optional[Dict[str, Any]]:
+        content = message.get('content')
+        if not isinstance(content, str) or not content:
+            return None
+        role = message.get('role')
+        if role == Role.TOOL.value:
+            return {'content': content, 'kind': 'tool', 'metadata': {'name': message.get('name')}}
+        if role in _SPEAKERS:
+            return {'content': f'{_SPEAKERS[role]}：{content}', 'kind': 'history', 'metadata': {}}
+        # 系统消息每轮都会重新加入提示词，不需要保存
+        return None
+
+    def remember(self, query: Optional[str], answer: str, tool_messages: Iterable[Dict]) -> None:
+        """保存一轮对话：本轮的工具结果，以及问题和最终回复"""
+        records = [
+            {'content': message['content'], 'kind': 'tool', 'metadata': {'name': message.get('name')}}
+            for message in tool_messages
+            if message.get('role') == Role.TOOL.value and isinstance(message.get('content'), str)
+        ]
+        if query or answer:
+            records.append({'content': f'用户：{query or ""}\n助手：{answer}', 'kind': 'turn', 'metadata': {}})
+        self.add_many(records)
+
+    @staticmethod
+    def last_user_content(messages: Sequence[Dict]) -> Optional[str]:
+        """最后一条用户消息的文本内容"""
+        for message in reversed(messages):
+            if message.get('role') == Role.USER.value and isinstance(message.get('content'), str):
+                return message['content']
+        return None
+
+    def to_dict(self, include_none: bool = True) -> Dict:
+        return {
+            'top_k': self.top_k,
+            'recent_messages': self.recent_messages,
+            'min_score': self.min_score,
+            'path': self.path,
+            'records': list(self.records),
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
@@ -5,6 +5,8 @@ from ..base.data_class import DataClass
 
 
 class Message(DataClass):
+    __slots__ = ('role', 'name', 'persona', 'description', 'content', 'refusal', 'thinking')
+
     def __init__(
             self,
             role: str,
@@ -59,22 +61,30 @@ class Message(DataClass):
 
 
 class SystemMessage(Message):
+    __slots__ = ()
+
     def __init__(self, content: str):
         super().__init__(role=Role.SYSTEM.value, content=content)
 
 
 class UserMessage(Message):
+    __slots__ = ()
+
     def __init__(self, content: str, name: str = None, persona: str = None, description: str = None):
         super().__init__(role=Role.USER.value, name=name, persona=persona, description=description, content=content)
 
 
 class AssistantMessage(Message):
+    __slots__ = ()
+
     def __init__(self, content: str, name: str = None, persona: str = None, description: str = None):
         super().__init__(role=Role.ASSISTANT.value, name=name, persona=persona, description=description,
                          content=content)
 
 
 class ToolMessage(Message):
+    __slots__ = ()
+
     def __init__(self, content: str, name: str = None, description: str = None):
         super().__init__(role=Role.TOOL.value, name=name, description=description, content=content)
 
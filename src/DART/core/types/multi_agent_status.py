@@ -20,6 +20,7 @@ class MultiAgentRunTimeStatus(DataClass):
         self.active_tasks: List[str] = []
         self.completed_tasks: List[str] = []
         self.failed_tasks: List[str] = []
+        self.skipped_tasks: List[str] = []
 
     def add_task(self, task: Task) -> None:
         """添加任务"""
@@ -59,6 +60,12 @@ class MultiAgentRunTimeStatus(DataClass):
                 self.active_tasks.remove(task_id)
             if task_id not in self.failed_tasks:
                 self.failed_tasks.append(task_id)
+        elif status == TaskStatus.SKIPPED:
+            if task_id not in self.skipped_tasks:
+                self.skipped_tasks.append(task_id)
+        elif status == TaskStatus.PENDING:
+            if task_id in self.active_tasks:
+                self.active_tasks.remove(task_id)
 
     def start_execution(self) -> None:
         """开始执行"""
@@ -76,13 +83,15 @@ class MultiAgentRunTimeStatus(DataClass):
         completed = len(self.completed_tasks)
         failed = len(self.failed_tasks)
         active = len(self.active_tasks)
-        pending = total - completed - failed - active
+        skipped = len(self.skipped_tasks)
+        pending = total - completed - failed - active - skipped
 
         return {
             "total": total,
             "completed": completed,
             "failed": failed,
             "active": active,
+            "skipped": skipped,
             "pending": pending,
             "completion_rate": completed / total if total > 0 else 0
         }
@@ -107,6 +116,7 @@ class MultiAgentRunTimeStatus(DataClass):
             "active_tasks": self.active_tasks,
             "completed_tasks": self.completed_tasks,
             "failed_tasks": self.failed_tasks,
+            "skipped_tasks": self.skipped_tasks,
             "tasks": {task_id: task.to_dict() for task_id, task in self.tasks.items()},
             "task_history": self.task_history
         }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Any
 
 from ..base.data_class import DataClass
 from ..constants.configs import (
@@ -23,9 +23,10 @@ class RuntimeConfig(DataClass):
             max_retries: int = DEFAULT_MAX_RETRIES,
             default_headers: Dict[str, str] | None = None,
             default_query: Dict[str, object] | None = None,
-            http_client: str | None = DEFAULT_HTTP_CLIENT,
+            http_client: Any | None = DEFAULT_HTTP_CLIENT,
             models: List[str] | None = None,
             default_model: str | None = None,
+            context_windows: Dict[str, int] | None = None,
     ):
         super().__init__()
         self.api_key = api_key
@@ -41,5 +42,8 @@ class RuntimeConfig(DataClass):
         self.models = models or []
         self.default_model = default_model
 
+        '''context length of each model in models, in tokens; requests to these models are trimmed to fit'''
+        self.context_windows = context_windows or {}
+
     def to_dict(self, include_none=False) -> Dict:
         return super().to_dict(include_none=False)
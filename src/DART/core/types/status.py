@@ -1,10 +1,13 @@
+import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 
 from .choice import Choice, ToolCall
+from .conversation import shared_prefix
 from .runtime_config import RuntimeConfig
 from .tool_result import ToolResult, ToolResultType
 from ..base.data_class import DataClass
+from ..constants.configs import DEFAULT_PREFIX_HISTORY_SIZE
 from ...utils.formatter import to_str_format
 
 
@@ -18,6 +21,11 @@ class AgentRunTimeStatus(DataClass):
         self.current_agent = None
         self.tool_calls_history = []
         self.tool_error_history = []
+        self.tool_cache_hits = 0
+        self.tool_cache_misses = 0
+        # 最近的前缀统计，只保留DEFAULT_PREFIX_HISTORY_SIZE条；汇总值单独累计
+        self.prefix_history = []
+        self.prefix_totals = {'requests': 0, 'shared_chars': 0, 'total_chars': 0}
 
     def add_chat_history(self, chat_args: Dict, choice: Choice) -> None:
         """记录代理执行信息"""
@@ -47,6 +55,70 @@ class AgentRunTimeStatus(DataClass):
             "timestamp": datetime.now().isoformat()
         })
 
+    def add_tool_cache_result(self, tool_result: ToolResult) -> None:
+        """记录工具缓存的命中情况"""
+        if tool_result.cached is True:
+            self.tool_cache_hits += 1
+        elif tool_result.cached is False:
+            self.tool_cache_misses += 1
+
+    def get_tool_cache_stats(self) -> Dict[str, Any]:
+        """获取工具缓存的命中统计"""
+        total = self.tool_cache_hits + self.tool_cache_misses
+        return {
+            'hits': self.tool_cache_hits,
+            'misses': self.tool_cache_misses,
+            'hit_rate': self.tool_cache_hits / total if total else 0.0,
+        }
+
+    def add_prefix_stats(self, previous: Optional[Sequence[Dict]], messages: Sequence[Dict]) -> Dict[str, Any]:
+        """记录同一次运行中相邻两次请求共享的前缀长度（消息数和字符数），返回本次的统计"""
+        sizes = [len(json.dumps(message, ensure_ascii=False, default=str)) for message in messages]
+        shared = shared_prefix(previous, messages) if previous is not None else 0
+        stats = {
+            'agent': self.current_agent.name if self.current_agent is not None else None,
+            'shared_messages': shared,
+            'total_messages': len(messages),
+            'shared_chars': sum(sizes[:shared]),
+            'total_chars': sum(sizes),
+        }
+        if previous is not None:
+            self.prefix_totals['requests'] += 1
+            self.prefix_totals['shared_chars'] += stats['shared_chars']
+            self.prefix_totals['total_chars'] += stats['total_chars']
+            self.prefix_history.append(stats)
+            if len(self.prefix_history) > 2 * DEFAULT_PREFIX_HISTORY_SIZE:
+                del self.prefix_history[:-DEFAULT_PREFIX_HISTORY_SIZE]
+        return stats
+
+    def get_prefix_stats(self) -> Dict[str, Any]:
+        """
+        汇总的前缀复用情况：shared_ratio为后续请求中可复用前缀的字符占比，
+        recomputed_chars为前缀之后需要重新prefill的字符数
+        """
+        shared = self.prefix_totals['shared_chars']
+        total = self.prefix_totals['total_chars']
+        return {
+            'requests': self.prefix_totals['requests'],
+            'shared_chars': shared,
+            'total_chars': total,
+            'recomputed_chars': total - shared,
+            'shared_ratio': shared / total if total else 0.0,
+        }
+
+    def merge(self, other: 'AgentRunTimeStatus') -> None:
+        """并入另一个状态（例如handoff代理独立运行时的状态）中的记录和统计"""
+        self.chat_history.extend(other.chat_history)
+        self.tool_calls_history.extend(other.tool_calls_history)
+        self.tool_error_history.extend(other.tool_error_history)
+        self.tool_cache_hits += other.tool_cache_hits
+        self.tool_cache_misses += other.tool_cache_misses
+        for key, value in other.prefix_totals.items():
+            self.prefix_totals[key] += value
+        self.prefix_history.extend(other.prefix_history)
+        if len(self.prefix_history) > 2 * DEFAULT_PREFIX_HISTORY_SIZE:
+            del self.prefix_history[:-DEFAULT_PREFIX_HISTORY_SIZE]
+
     def get_chat_history(self) -> List[Dict[str, Any]]:
         """获取执行历史"""
         return self.chat_history
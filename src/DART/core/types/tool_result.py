@@ -19,6 +19,8 @@ class ToolResult(DataClass):
     The Result returned by a tool.
     """
 
+    __slots__ = ('name', 'description', 'result_type', 'result_value', 'success', 'cached')
+
     """The name of the tool."""
     name: str
 
@@ -34,11 +36,15 @@ class ToolResult(DataClass):
     """While True means the tool is executed successfully, False means the tool is not executed."""
     success: bool
 
+    """True if the result was served by a tool cache, False on a cache miss, None if no cache was consulted."""
+    cached: bool | None
+
     def __init__(self, name=None, description=None, result_value=None, result_type=ToolResultType.NONE.value,
-                 success: bool = False):
+                 success: bool = False, cached: bool | None = None):
         super().__init__()
         self.set_value(name=name, description=description, result_value=result_value, result_type=result_type)
         self.success = success
+        self.cached = cached
 
     def set_value(self, name, description, result_value, result_type):
         if result_type not in ToolResultType.values():
@@ -0,0 +1,52 @@
+import threading
+from typing import Callable, List
+
+from .logger import logger
+
+
+class CancelToken:
+    """
+    A thread-safe cancellation signal. Callbacks registered with `add_callback` run once when the token is
+    cancelled, e.g. to close an in-flight HTTP stream from the scheduler thread. Code that registers a callback
+    on a long-lived token for a shorter task should `remove_callback` it when the task ends.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Unregister a callback that has not run yet; unknown callbacks are ignored."""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run_callback(callback)
+
+    @staticmethod
+    def _run_callback(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f'Error in cancel callback: {e}')
@@ -1,10 +1,50 @@
+import hashlib
 import inspect
 import random
 import uuid
+import weakref
 from typing import Callable
 
+# compiled function schemas, dropped together with the tool function
+_schema_cache = weakref.WeakKeyDictionary()
+
 
 def create_tool_desc(func: Callable, index: int = None, id: str = None) -> dict:
+    return {
+        "index": index or random.randint(0, 1024000),
+        "id": id or uuid.uuid4().hex,
+        "function": function_schema(func),
+        "type": "function",
+    }
+
+
+def compile_tool_desc(func: Callable, index: int) -> dict:
+    """
+    Deterministic tool description: the function schema is reflected once per tool and cached, and `index`/`id`
+    are derived from the tool's position and name, so the same tools always serialize to the same bytes.
+    The returned schema is shared and must not be mutated.
+    """
+    try:
+        schema = _schema_cache[func]
+    except (KeyError, TypeError):
+        schema = function_schema(func)
+        try:
+            _schema_cache[func] = schema
+        except TypeError:
+            pass
+    return {
+        "index": index,
+        "id": stable_tool_id(func.__name__),
+        "function": schema,
+        "type": "function",
+    }
+
+
+def stable_tool_id(name: str) -> str:
+    return hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+
+
+def function_schema(func: Callable) -> dict:
     type_map = {
         str: "string",
         int: "integer",
@@ -45,16 +85,11 @@ def create_tool_desc(func: Callable, index: int = None, id: str = None) -> dict:
             }
 
     return {
-        "index": index or random.randint(0, 1024000),
-        "id": id or uuid.uuid4().hex,
-        "function": {
-            "name": func.__name__,
-            "description": func.__doc__ or "",
-            "parameters": {
-                "type": "object",
-                "properties": parameters,
-                "required": required,
-            },
+        "name": func.__name__,
+        "description": func.__doc__ or "",
+        "parameters": {
+            "type": "object",
+            "properties": parameters,
+            "required": required,
         },
-        "type": "function",
     }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试目录没有__init__.py，把它加入路径以便各测试文件导入共享的fake_clients
+sys.path.insert(0, os.path.dirname(__file__))
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from DART.core.agents.auto_label_generator.batch_labeler import BatchLabeler, parse_label_values
+from DART.core.art import ART
+from DART.core.types.runtime_config import RuntimeConfig
+from fake_clients import FakeClient
+
+REPLY = """分析过程：
+- 属性信息提取：纯棉，5
+- 属性信息总结：*******
+
+最终属性值：
+- 纯棉，5
+- 棉麻, 3
+"""
+
+
+class LabelClient(FakeClient):
+    """对每个请求返回固定回复，并记录请求的商品"""
+
+    def __init__(self):
+        super().__init__()
+        self.items = []
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def reply(self, **kwargs):
+        item_id = json.loads(kwargs['messages'][-1]['content'])['id']
+        with self.lock:
+            self.items.append(item_id)
+        # 请求出错时OpenAIClient只记录日志，不返回任何分片
+        if item_id in self.failing:
+            return []
+        return [ChoiceDelta(role='assistant', content=REPLY)]
+
+
+class TestBatchLabeler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'items.jsonl')
+        self.output_path = os.path.join(self.tmp.name, 'labels.jsonl')
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            for i in range(10):
+                f.write(json.dumps({'id': i, 'title': f'商品{i}'}, ensure_ascii=False) + '\n')
+
+        runtime_config = RuntimeConfig(api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'],
+                                       default_model='fake-model')
+        self.art = ART(runtime_config)
+        self.art.client = LabelClient()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _labeler(self):
+        return BatchLabeler(self.art, {'材质': '商品的材质', '颜色': '商品的颜色'}, self.output_path, chunk_size=4,
+                            max_concurrency=4)
+
+    def _records(self):
+        with open(self.output_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_parse_label_values(self):
+        self.assertEqual(parse_label_values(REPLY), [('纯棉', 5), ('棉麻', 3)])
+        self.assertEqual(parse_label_values('- 红色，4\n无关内容'), [('红色', 4)])
+
+    def test_run(self):
+        history = [{'agent': 'caller', 'content': 'kept'}]
+        self.art.status.chat_history.extend(history)
+        stats = self._labeler().run(self.input_path)
+        self.assertEqual(stats, {'items': 10, 'runs': 20, 'failed': 0})
+        # 调用方的ART状态既不被清空，也不记录打标运行
+        self.assertEqual(self.art.status.chat_history, history)
+        self.assertIsNone(self.art.status.current_agent)
+
+        records = self._records()
+        self.assertEqual([record['id'] for record in records], list(range(10)))
+        self.assertEqual(records[0]['labels']['材质'], [{'value': '纯棉', 'score': 5}, {'value': '棉麻', 'score': 3}])
+
+    def test_resume_after_crash(self):
+        labeler = self._labeler()
+        save_checkpoint = labeler._save_checkpoint
+        saved = []
+
+        def crash_on_second_chunk(checkpoint):
+            if saved:
+                raise KeyboardInterrupt
+            saved.append(checkpoint['items'])
+            save_checkpoint(checkpoint)
+
+        labeler._save_checkpoint = crash_on_second_chunk
+        with self.assertRaises(KeyboardInterrupt):
+            labeler.run(self.input_path)
+        # 第二块已写入输出但没有提交检查点
+        self.assertEqual(len(self._records()), 8)
+
+        self.art.client.items.clear()
+        stats = self._labeler().run(self.input_path)
+        self.assertEqual(stats['items'], 6)
+        self.assertEqual(sorted(set(self.art.client.items)), list(range(4, 10)))
+        self.assertEqual([record['id'] for record in self._records()], list(range(10)))
+
+    def test_failed_items_are_retried(self):
+        self.art.client.failing = {2, 7}
+        stats = self._labeler().run(self.input_path)
+        self.assertEqual(stats, {'items': 10, 'runs': 20, 'failed': 4})
+        self.assertEqual([record['id'] for record in self._records()], [0, 1, 3, 4, 5, 6, 8, 9])
+        with open(self.output_path + '.ckpt', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['failed'], [2, 7])
+
+        self.art.client.failing = set()
+        self.art.client.items.clear()
+        stats = self._labeler().run(self.input_path)
+        self.assertEqual(stats, {'items': 2, 'runs': 4, 'failed': 0})
+        self.assertEqual(sorted(set(self.art.client.items)), [2, 7])
+        self.assertEqual(sorted(record['id'] for record in self._records()), list(range(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
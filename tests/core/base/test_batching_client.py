@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from DART.core.base.batching_client import BatchingClient, _PendingRequest, _END
+from DART.core.cache import CompletionCache, LRUCacheBackend
+from DART.utils.cancellation import CancelToken
+from fake_clients import FakeAsyncStream
+
+
+class ClosingStream(FakeAsyncStream):
+    """关闭时减少测试中记录的在途请求数"""
+
+    def __init__(self, test, deltas, delay):
+        super().__init__(deltas, delay)
+        self.test = test
+
+    async def close(self):
+        await super().close()
+        self.test.open -= 1
+
+
+class TestBatchingClient(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = BatchingClient(api_key='fake', base_url='http://localhost:1/v1', models=['m'], default_model='m',
+                                  max_in_flight=4)
+        self.calls = []
+        self.delay = 0.0
+        self.open = 0
+        self.peak = 0
+
+        async def create(**kwargs):
+            self.calls.append(kwargs)
+            self.open += 1
+            self.peak = max(self.peak, self.open)
+            prompt = kwargs['messages'][0]['content']
+            if prompt == 'error':
+                raise RuntimeError('server error')
+            return ClosingStream(self, [ChoiceDelta(content=prompt), ChoiceDelta(content=' done')], self.delay)
+
+        self.llm.client.chat.completions.create = create
+
+    def tearDown(self):
+        self.llm.close()
+
+    def _ask(self, prompt, **kwargs):
+        deltas = self.llm.create_chat_completion(messages=[{'role': 'user', 'content': prompt}], **kwargs)
+        return ''.join(delta.content for delta in deltas)
+
+    def test_concurrent_requests(self):
+        self.delay = 0.01
+        prompts = [f'q{i}' for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            answers = list(pool.map(self._ask, prompts))
+
+        # 每个调用方拿到自己的回复，同时打开的请求不超过max_in_flight
+        self.assertEqual(answers, [f'{prompt} done' for prompt in prompts])
+        self.assertEqual(self.llm.requests, 20)
+        self.assertEqual(self.peak, 4)
+
+    def test_error_returns_empty(self):
+        self.assertEqual(self._ask('error'), '')
+        self.assertEqual(self._ask('ok'), 'ok done')
+
+    def test_cancel(self):
+        self.delay = 0.5
+        token = CancelToken()
+        threading.Timer(0.1, token.cancel).start()
+        start = time.perf_counter()
+        self.assertEqual(self._ask('slow', cancel_token=token), '')
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_cancel_before_sending(self):
+        token = CancelToken()
+        token.cancel()
+        start = time.perf_counter()
+        self.assertEqual(self._ask('q', cancel_token=token), '')
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(token._callbacks, [])
+
+    def test_cancel_before_task_starts(self):
+        request = _PendingRequest({'messages': [{'role': 'user', 'content': 'q'}], 'stream': True})
+
+        def start_and_cancel():
+            self.llm._start(request)
+            self.llm._cancel(request)
+
+        self.llm._ensure_loop().call_soon_threadsafe(start_and_cancel)
+        self.assertIs(request.results.get(timeout=1), _END)
+        self.assertEqual(self.calls, [])
+
+    def test_close_releases_waiting_requests(self):
+        self.delay = 5
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            answer = pool.submit(self._ask, 'q')
+            time.sleep(0.1)
+            self.llm.close()
+            self.assertEqual(answer.result(timeout=1), '')
+
+    def test_cache(self):
+        self.llm.cache = CompletionCache(LRUCacheBackend())
+        self.assertEqual(self._ask('q'), 'q done')
+        self.assertEqual(self._ask('q'), 'q done')
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from DART.core.art import ART
+from DART.core.base import client_registry as registry_module
+from DART.core.base.client_registry import ClientRegistry
+from DART.core.types.runtime_config import RuntimeConfig
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ClientRegistry(max_connections=8, max_keepalive_connections=4)
+
+    def tearDown(self):
+        self.registry.close()
+
+    def test_configure(self):
+        self.registry.configure(max_connections=16, http2=True)
+        self.assertEqual(self.registry.max_connections, 16)
+        self.assertTrue(self.registry.http2)
+        with self.assertRaises(ValueError):
+            self.registry.configure(pool_size=1)
+
+    @unittest.skipIf(registry_module.httpx is None, 'httpx is not installed')
+    def test_shared_per_endpoint(self):
+        client = self.registry.get('http://localhost:1/v1', 'key')
+        self.assertIs(self.registry.get('http://localhost:1/v1', 'key'), client)
+        self.assertIsNot(self.registry.get('http://localhost:2/v1', 'key'), client)
+        self.assertIsNot(self.registry.get('http://localhost:1/v1', 'other'), client)
+        self.assertEqual(len(self.registry), 3)
+
+        # 关闭后的连接池会被重新创建
+        client.close()
+        self.assertIsNot(self.registry.get('http://localhost:1/v1', 'key'), client)
+
+    @unittest.skipIf(registry_module.httpx is None, 'httpx is not installed')
+    def test_arts_share_pool(self):
+        runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model'
+        )
+        art_a, art_b = ART(runtime_config), ART(runtime_config)
+        self.assertIs(art_a.client.client._client, art_b.client.client._client)
+
+    @unittest.skipIf(registry_module.httpx is None, 'httpx is not installed')
+    def test_runtime_http_client(self):
+        http_client = registry_module.httpx.Client()
+        runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model',
+            http_client=http_client
+        )
+        self.assertIs(ART(runtime_config).client.client._client, http_client)
+        http_client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
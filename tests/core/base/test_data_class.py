@@ -1,7 +1,12 @@
 import json
 import unittest
 
-from DART.core.base.data_class import valid_str, valid_list, valid_dict, DataClass, dict_to_dataclass
+from DART.core.base import data_class
+from DART.core.base.data_class import valid_str, valid_list, valid_dict, DataClass, dict_to_dataclass, slot_fields, \
+    to_jsonable, encode, decode
+from DART.core.types.choice import Choice, ToolCall, ToolCallFunction
+from DART.core.types.message import UserMessage
+from DART.core.types.tool_result import ToolResult
 from DART.utils.formatter import to_str_format
 
 
@@ -105,5 +110,115 @@ class TestUtilities(unittest.TestCase):
         self.assertEqual(dc.get('key2').get('nested_key'), 'nested_value')
 
 
+class Point(DataClass):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=None, y=None):
+        self.x = x
+        self.y = y
+
+
+class TestSlottedDataClass(unittest.TestCase):
+
+    def test_hot_path_types_have_no_dict(self):
+        objects = [Choice(), ToolCall(), ToolCallFunction(), UserMessage(content='hi'), ToolResult()]
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj).__name__)
+            self.assertIsInstance(obj, DataClass)
+
+    def test_slot_fields(self):
+        self.assertEqual(slot_fields(Point), ('x', 'y'))
+        self.assertEqual(slot_fields(Choice), ('role', 'content', 'tool_calls', 'refusal', 'thinking'))
+        self.assertEqual(slot_fields(ToolCallFunction), ('name', 'arguments'))
+
+    def test_to_dict_and_keys(self):
+        point = Point(x=1)
+        self.assertEqual(point.to_dict(), {'x': 1, 'y': None})
+        self.assertEqual(point.to_dict(include_none=False), {'x': 1})
+        self.assertEqual(point.keys(include_none=False), ['x'])
+        self.assertTrue(point.has('y'))
+
+    def test_unset_slot_is_skipped(self):
+        point = Point.__new__(Point)
+        point.y = 2
+        self.assertEqual(point.to_dict(), {'y': 2})
+
+    def test_update(self):
+        point = Point(x=1, y=2)
+        point.update(Point(x=3))
+        self.assertEqual(point.to_dict(), {'x': 3, 'y': 2})
+
+    def test_nested_to_dict(self):
+        choice = Choice(role='assistant', content='a')
+        choice._append('content', 'b')
+        choice.tool_calls[0] = ToolCall(index=0, id='call', type='function',
+                                        function=ToolCallFunction(name='f', arguments='{}'))
+        self.assertEqual(choice.to_dict(), {
+            'role': 'assistant',
+            'content': 'ab',
+            'tool_calls': {0: {'index': 0, 'id': 'call', 'type': 'function',
+                               'function': {'name': 'f', 'arguments': '{}'}}},
+            'refusal': '',
+            'thinking': '',
+        })
+
+    def test_bare_data_class_is_dict_backed(self):
+        data = DataClass()
+        data.set('anything', 1)
+        self.assertEqual(data.to_dict(), {'anything': 1})
+
+
+class TestSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.choice = Choice(role='assistant', content='你好')
+        self.choice.tool_calls[0] = ToolCall(index=0, id='call', type='function',
+                                             function=ToolCallFunction(name='f', arguments='{}'))
+
+    def test_to_json_matches_json_round_trip(self):
+        self.assertEqual(self.choice.to_json(), json.loads(json.dumps(self.choice.to_dict())))
+        value = {1: (1, 2), 1.5: [None], True: 'a', None: {'x': 1}, 'y': 2.0}
+        self.assertEqual(to_jsonable(value), json.loads(json.dumps(value)))
+
+    def test_to_json_rejects_unserializable_values(self):
+        with self.assertRaises(TypeError):
+            to_jsonable({'value': object()})
+
+    def test_clone_keeps_non_string_keys(self):
+        clone = self.choice.clone()
+        self.assertIsInstance(clone, DataClass)
+        self.assertEqual(clone.to_dict(), self.choice.to_dict())
+        self.assertEqual(clone.get('tool_calls').to_dict()[0]['function']['name'], 'f')
+
+    def test_to_dict_include_none(self):
+        message = UserMessage(content='hi')
+        self.assertEqual(message.to_dict(), {'role': 'user', 'content': 'hi'})
+        self.assertEqual(len(message.to_dict(include_none=True)), 7)
+        data = DataClass()
+        data.set('nested', UserMessage(content='hi'))
+        data.set('items', [UserMessage(content='hi')])
+        self.assertEqual(data.to_dict(include_none=False)['nested'], {'role': 'user', 'content': 'hi'})
+        # DataClasses inside a list always keep their None fields
+        self.assertEqual(len(data.to_dict(include_none=False)['items'][0]), 7)
+
+    def test_encode_and_decode(self):
+        expected = self.choice.to_json()
+        self.assertEqual(decode(self.choice.to_bytes()), expected)
+        for format, module in (('orjson', data_class.orjson), ('msgpack', data_class.msgpack)):
+            with self.subTest(format=format):
+                if module is None:
+                    with self.assertRaises(ImportError):
+                        self.choice.to_bytes(format=format)
+                    continue
+                decoded = decode(self.choice.to_bytes(format=format), format=format)
+                self.assertEqual(to_jsonable(decoded), expected)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            encode({}, format='xml')
+        with self.assertRaises(ValueError):
+            decode(b'{}', format='xml')
+
+
 if __name__ == '__main__':
     unittest.main()
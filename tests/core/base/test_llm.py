@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from types import SimpleNamespace
+
+from DART.core.base.llm import OpenAIClient
+from DART.utils.cancellation import CancelToken
+
+
+class StalledStream:
+    """模拟一个在首个分片后卡住的流式响应，close后才会结束"""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        self.closed.wait(10)
+        return iter(())
+
+    def close(self):
+        self.closed.set()
+
+
+class TestOpenAIClient(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = OpenAIClient(api_key='fake', base_url='http://localhost:1/v1', models=['m'], default_model='m')
+        self.stream = StalledStream()
+        self.llm.client.chat.completions.create = lambda **kwargs: self.stream
+
+    def test_cancel_closes_stream(self):
+        token = CancelToken()
+        threading.Timer(0.05, token.cancel).start()
+
+        start = time.perf_counter()
+        deltas = list(self.llm.create_chat_completion(messages=[{'role': 'user', 'content': 'hi'}],
+                                                      cancel_token=token))
+        self.assertEqual(deltas, [])
+        self.assertTrue(self.stream.closed.is_set())
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_finished_stream_unregisters_callback(self):
+        token = CancelToken()
+        self.stream.close()
+        list(self.llm.create_chat_completion(messages=[{'role': 'user', 'content': 'hi'}], cancel_token=token))
+        self.assertEqual(token._callbacks, [])
+
+    def test_cancel_callback_after_cancel(self):
+        token = CancelToken()
+        token.cancel()
+        called = []
+        token.add_callback(lambda: called.append(True))
+        self.assertTrue(token.cancelled)
+        self.assertEqual(called, [True])
+
+
+class TestCreateEmbedding(unittest.TestCase):
+
+    def test_batched(self):
+        llm = OpenAIClient(api_key='fake', base_url='http://localhost:1/v1', models=['m'], default_model='m')
+        batches = []
+
+        def create(model, input):
+            batches.append(list(input))
+            # 乱序返回，结果仍按输入顺序排列
+            data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+            return SimpleNamespace(data=list(reversed(data)))
+
+        llm.client.embeddings.create = create
+        texts = ['a' * i for i in range(1, 6)]
+        self.assertEqual(llm.create_embedding(texts, batch_size=2), [[1.0], [2.0], [3.0], [4.0], [5.0]])
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(llm.create_embedding('abc'), [[3.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
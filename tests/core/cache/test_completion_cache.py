@@ -0,0 +1,148 @@
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletionMessage
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from DART.core.base.llm import OpenAIClient
+from DART.core.cache import CompletionCache, LRUCacheBackend, SQLiteCacheBackend, MmapCacheBackend
+from DART.core.types.choice import Choice
+from fake_clients import FakeStream
+
+
+class TestCacheBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _check_backend(self, backend):
+        self.assertIsNone(backend.get('a'))
+        backend.set('a', '1')
+        backend.set('b', '2')
+        self.assertEqual(backend.get('a'), '1')
+        # 'b'最久未被访问，超出容量时被淘汰
+        backend.set('c', '3')
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), '3')
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.stats.hits, 2)
+        self.assertEqual(backend.stats.misses, 2)
+        self.assertEqual(backend.stats.evictions, 1)
+        self.assertEqual(backend.stats.hit_rate, 0.5)
+
+    def test_lru(self):
+        self._check_backend(LRUCacheBackend(max_size=2))
+
+    def test_sqlite(self):
+        path = os.path.join(self.tmp_dir.name, 'cache.db')
+        backend = SQLiteCacheBackend(path, max_size=2)
+        self._check_backend(backend)
+        backend.close()
+
+        reopened = SQLiteCacheBackend(path)
+        self.assertEqual(reopened.get('c'), '3')
+        reopened.close()
+
+    def test_mmap(self):
+        path = os.path.join(self.tmp_dir.name, 'cache.bin')
+        backend = MmapCacheBackend(path, max_size=2)
+        self._check_backend(backend)
+        backend.compact()
+        self.assertEqual(backend.get('a'), '1')
+        backend.close()
+
+        reopened = MmapCacheBackend(path)
+        self.assertEqual(reopened.get('c'), '3')
+        self.assertIsNone(reopened.get('b'))
+        reopened.close()
+
+    def test_mmap_deletions_survive_reopen(self):
+        path = os.path.join(self.tmp_dir.name, 'cache.bin')
+        backend = MmapCacheBackend(path)
+        backend.set('k', 'v')
+        backend.set('other', 'x')
+        backend.delete('k')
+        backend.close()
+
+        reopened = MmapCacheBackend(path)
+        self.assertIsNone(reopened.get('k'))
+        self.assertEqual(reopened.get('other'), 'x')
+        # 删除后重新写入的值仍然有效
+        reopened.set('k', 'v2')
+        reopened.close()
+        reopened = MmapCacheBackend(path)
+        self.assertEqual(reopened.get('k'), 'v2')
+        reopened.clear()
+        reopened.close()
+
+        cleared = MmapCacheBackend(path)
+        self.assertEqual(len(cleared), 0)
+        self.assertIsNone(cleared.get('other'))
+        cleared.close()
+
+    def test_ttl(self):
+        backend = LRUCacheBackend(ttl=0.01)
+        backend.set('a', '1')
+        time.sleep(0.02)
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(len(backend), 0)
+
+
+class TestCompletionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = CompletionCache()
+        self.llm = OpenAIClient(api_key='fake', base_url='http://localhost:1/v1', models=['m'], default_model='m',
+                                cache=self.cache)
+        self.calls = 0
+
+        def create(**kwargs):
+            self.calls += 1
+            if kwargs['stream']:
+                return FakeStream([ChoiceDelta(role='assistant', content='hel'), ChoiceDelta(content='lo')])
+            return SimpleNamespace(choices=[SimpleNamespace(message=ChatCompletionMessage(role='assistant',
+                                                                                          content='hello'))])
+
+        self.llm.client.chat.completions.create = create
+        self.messages = [{'role': 'user', 'content': 'hi'}]
+
+    def test_key_is_canonical(self):
+        key = self.cache.key({'model': 'm', 'messages': self.messages, 'temperature': 0})
+        self.assertEqual(key, self.cache.key({'temperature': 0, 'messages': self.messages, 'model': 'm',
+                                              'timeout': 5}))
+        self.assertNotEqual(key, self.cache.key({'model': 'm', 'messages': self.messages, 'temperature': 1}))
+
+    def test_stream_replay(self):
+        first = list(self.llm.create_chat_completion(messages=self.messages))
+        second = list(self.llm.create_chat_completion(messages=self.messages))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+        self.assertIsInstance(second[0], ChoiceDelta)
+
+        choice = Choice(role='assistant', content='')
+        for delta in second:
+            choice.merge_delta(delta)
+        self.assertEqual(choice.content, 'hello')
+        self.assertEqual(self.cache.stats.to_dict()['hit_rate'], 0.5)
+
+    def test_no_stream_replay(self):
+        list(self.llm.create_chat_completion(messages=self.messages, stream=False))
+        message = list(self.llm.create_chat_completion(messages=self.messages, stream=False))[0]
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(message.content, 'hello')
+
+    def test_partial_stream_not_cached(self):
+        stream = self.llm.create_chat_completion(messages=self.messages)
+        next(stream)
+        stream.close()
+        self.assertEqual(len(self.cache.backend), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+
+from DART.core.art import ART
+from DART.core.base.agent import Agent
+from DART.core.cache import ToolCache, SQLiteCacheBackend, cached_tool
+from DART.core.types.choice import ToolCall, ToolCallFunction
+from DART.core.types.runtime_config import RuntimeConfig
+
+
+def tool_call(name: str, arguments: str):
+    return ToolCall(function=ToolCallFunction(name=name, arguments=arguments))
+
+
+class TestToolCache(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def lookup(city: str, day: int = 0):
+            """lookup"""
+            self.calls.append(city)
+            return f'{city}: sunny'
+
+        def side_effect(text: str):
+            """side effect"""
+            self.calls.append(text)
+            return text
+
+        self.lookup = lookup
+        self.side_effect = side_effect
+
+    def test_key_is_canonical(self):
+        key = ToolCache.key('lookup', '{"city": "a", "day": 1}')
+        self.assertEqual(key, ToolCache.key('lookup', '{"day":1,"city":"a"}'))
+        self.assertNotEqual(key, ToolCache.key('other', '{"day":1,"city":"a"}'))
+        self.assertIsNone(ToolCache.key('lookup', '{not json'))
+
+    def test_agent_tool_cache(self):
+        cache = ToolCache(tools=['lookup'])
+        agent = Agent(name='agent', persona='p', description='d', tools=[self.lookup, self.side_effect],
+                      tool_cache=cache)
+        # 不同Agent共享同一个缓存
+        other = Agent(name='other', persona='p', description='d', tools=[self.lookup], tool_cache=cache)
+
+        first = agent.run_tools([tool_call('lookup', '{"city": "a"}'), tool_call('side_effect', '{"text": "x"}')])
+        second = other.run_tools_parallel([tool_call('lookup', '{ "city":"a" }')])
+        agent.run_tools([tool_call('side_effect', '{"text": "x"}')])
+
+        self.assertEqual(self.calls, ['a', 'x', 'x'])
+        self.assertEqual([first[0].cached, first[1].cached, second[0].cached], [False, None, True])
+        self.assertEqual(second[0].result_value, 'a: sunny')
+        self.assertEqual(cache.stats.hits, 1)
+
+    def test_status_counters(self):
+        runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model'
+        )
+        art = ART(runtime_config)
+        agent = Agent(name='agent', persona='p', description='d', tools=[self.lookup], tool_cache=ToolCache())
+        art.status.current_agent = agent
+        for _ in range(3):
+            calls = [tool_call('lookup', json.dumps({'city': 'a'}))]
+            art._record_tool_calls(calls, agent.run_tools(calls))
+        self.assertEqual(art.status.get_tool_cache_stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+
+    def test_decorator_with_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backend = SQLiteCacheBackend(os.path.join(tmp_dir, 'tools.db'))
+            lookup = cached_tool(ToolCache(backend))(self.lookup)
+            self.assertEqual(lookup.__name__, 'lookup')
+            self.assertEqual(lookup('a'), lookup(city='a', day=0))
+            self.assertEqual(self.calls, ['a'])
+            backend.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
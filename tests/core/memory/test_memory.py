@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from DART.core.art import ART
+from DART.core.base.agent import Agent
+from DART.core.types.memory import Memory
+from DART.core.types.message import UserMessage
+from DART.core.types.runtime_config import RuntimeConfig
+from fake_clients import FakeClient
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+@unittest.skipUnless(HAS_NUMPY, 'numpy is not installed')
+class TestMemory(unittest.TestCase):
+
+    def test_hash_embedder_is_deterministic(self):
+        from DART.core.memory import HashEmbedder
+
+        embedder = HashEmbedder(dim=64)
+        first, second = embedder.embed(['红色连衣裙', 'red dress'])
+        self.assertEqual(embedder.embed(['红色连衣裙'])[0].tolist(), first.tolist())
+        self.assertAlmostEqual(float(first @ first), 1.0, places=5)
+        self.assertLess(float(first @ second), 0.5)
+
+    def test_vector_index_memmap(self):
+        import numpy as np
+        from DART.core.memory import VectorIndex
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.vec')
+            index = VectorIndex(2, path=path, capacity=1)
+            index.add(np.array([[1, 0], [0, 1], [0.6, 0.8]], dtype=np.float32))
+            index.flush()
+            self.assertEqual(index.search(np.array([1, 0]), 2), [(0, 1.0), (2, 0.6000000238418579)])
+
+            reopened = VectorIndex(2, path=path, size=3)
+            self.assertEqual([i for i, _ in reopened.search(np.array([0, 1]), 1)], [1])
+
+    def test_recall(self):
+        memory = Memory(top_k=1)
+        memory.add('用户喜欢红色的连衣裙')
+        memory.add('订单号是12345')
+        self.assertEqual(memory.search('连衣裙要什么颜色')[0][1]['content'], '用户喜欢红色的连衣裙')
+
+    def test_truncated_history_is_remembered(self):
+        memory = Memory(top_k=1, recent_messages=2)
+        history = [
+            {'role': 'system', 'content': '你是客服'},
+            {'role': 'user', 'content': '我的订单号是12345'},
+            {'role': 'assistant', 'content': '好的，已记录'},
+            {'role': 'user', 'content': '今天天气怎么样'},
+            {'role': 'assistant', 'content': '晴天'},
+        ]
+        selected = memory.select_messages(history + [{'role': 'user', 'content': '我的订单号是多少'}], '订单号是多少')
+        self.assertEqual(len(memory), 3)
+        self.assertIn('用户：我的订单号是12345', selected[0]['content'])
+        self.assertEqual(selected[1:], history[-1:] + [{'role': 'user', 'content': '我的订单号是多少'}])
+
+        # 再次传入同样的历史不会重复写入
+        memory.select_messages(history, None)
+        self.assertEqual(len(memory), 3)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'memory')
+            Memory(path=path).add('订单号是12345')
+            memory = Memory(path=path)
+            self.assertEqual(len(memory), 1)
+            self.assertEqual(memory.search('订单号')[0][1]['content'], '订单号是12345')
+
+    def test_art_injects_recalled_memory(self):
+        runtime_config = RuntimeConfig(api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'],
+                                       default_model='fake-model')
+        art = ART(runtime_config)
+        art.client = FakeClient(['好的，记住了', '红色'])
+        memory = Memory(top_k=1, recent_messages=1)
+        agent = Agent(name='agent', persona='p', description='d', memory=memory)
+
+        list(art.run(agent, messages=[UserMessage(content='我喜欢红色的连衣裙').to_message()]))
+        self.assertEqual(len(memory), 1)
+
+        history = [UserMessage(content=f'无关的问题{i}').to_message() for i in range(5)]
+        list(art.run(agent, messages=history + [UserMessage(content='我喜欢什么颜色的连衣裙').to_message()]))
+        request = art.client.requests[-1]
+        # 系统提示词、召回的记忆、最近一条消息
+        self.assertEqual(len(request), 3)
+        self.assertIn('我喜欢红色的连衣裙', request[1]['content'])
+        self.assertEqual(request[2]['content'], '我喜欢什么颜色的连衣裙')
+
+    def test_to_dict(self):
+        memory = Memory()
+        memory.add('订单号是12345', kind='tool')
+        self.assertEqual(memory.to_dict()['records'], [{'content': '订单号是12345', 'kind': 'tool', 'metadata': {}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
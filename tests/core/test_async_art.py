@@ -0,0 +1,127 @@
+import asyncio
+import json
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from DART.core.async_art import AsyncART
+from DART.core.base.agent import Agent
+from DART.core.base.llm import AsyncOpenAIClient
+from DART.core.types.message import UserMessage
+from DART.core.types.runtime_config import RuntimeConfig
+from fake_clients import FakeAsyncClient
+
+
+def tool_call_delta(name: str, arguments: dict, index: int = 0):
+    return ChoiceDelta(
+        role='assistant',
+        tool_calls=[
+            ChoiceDeltaToolCall(
+                index=index, id=f'call_{index}', type='function',
+                function=ChoiceDeltaToolCallFunction(name=name, arguments=json.dumps(arguments)),
+            )
+        ],
+    )
+
+
+class TestAsyncART(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model'
+        )
+
+    def _collect(self, art, agent, messages):
+        async def collect():
+            return [event async for event in art.run(agent, messages=messages)]
+
+        return asyncio.run(collect())
+
+    def test_client_type(self):
+        art = AsyncART(self.runtime_config)
+        self.assertIsInstance(art.client, AsyncOpenAIClient)
+        art.shutdown()
+
+    def test_run_with_tools(self):
+        async def async_tool(city: str):
+            """async tool"""
+            await asyncio.sleep(0)
+            return f'async {city}'
+
+        def sync_tool(city: str):
+            """sync tool"""
+            return f'sync {city}'
+
+        agent = Agent(name='agent', persona='p', description='d', tools=[async_tool, sync_tool],
+                      parallel_execute=True)
+        art = AsyncART(self.runtime_config)
+        art.client = FakeAsyncClient([
+            [tool_call_delta('async_tool', {'city': 'a'}, 0), tool_call_delta('sync_tool', {'city': 'b'}, 1)],
+            [ChoiceDelta(role='assistant', content='done')],
+        ])
+
+        events = self._collect(art, agent, [UserMessage(content='hi').to_message()])
+        self.assertEqual(events[0], {'runtime_status': 'start'})
+        self.assertEqual(events[-1], {'runtime_status': 'end'})
+        self.assertIn({'content': 'done'}, events)
+        self.assertTrue(any('delta' in event for event in events))
+
+        tool_calls = art.status.get_tool_calls_history()
+        self.assertEqual(len(tool_calls), 2)
+        self.assertIn('async a', tool_calls[0]['result'])
+        self.assertIn('sync b', tool_calls[1]['result'])
+        art.shutdown()
+
+    def test_thinking_events(self):
+        agent = Agent(name='agent', persona='p', description='d')
+        art = AsyncART(self.runtime_config)
+        art.client = FakeAsyncClient([[ChoiceDelta(content=c) for c in ['<think>', 'hmm', '</think>', 'hi']]])
+
+        events = self._collect(art, agent, [])
+        deltas = [event for event in events if 'thinking_delta' in event or 'content_delta' in event]
+        self.assertEqual(deltas, [{'thinking_delta': 'hmm'}, {'content_delta': 'hi'}])
+        self.assertIn({'content': 'hi'}, events)
+        art.shutdown()
+
+    def test_unclosed_think_tag_events(self):
+        agent = Agent(name='agent', persona='p', description='d')
+        art = AsyncART(self.runtime_config)
+        art.client = FakeAsyncClient([[ChoiceDelta(content=c) for c in ['<think>abc', 'def']]])
+
+        events = self._collect(art, agent, [])
+        # 按事件重放显示的文本：撤回的思考内容不会与回复内容重复显示
+        shown = {'thinking': '', 'content': ''}
+        for event in events:
+            if 'thinking_delta' in event:
+                shown['thinking'] += event['thinking_delta']
+            elif 'thinking_retracted' in event:
+                self.assertTrue(shown['thinking'].endswith(event['thinking_retracted']))
+                shown['thinking'] = shown['thinking'][:-len(event['thinking_retracted'])]
+            elif 'content_delta' in event:
+                shown['content'] += event['content_delta']
+        self.assertEqual(shown, {'thinking': '', 'content': 'abcdef'})
+        self.assertIn({'content': 'abcdef'}, events)
+        art.shutdown()
+
+    def test_concurrent_conversations(self):
+        agent = Agent(name='agent', persona='p', description='d')
+        art = AsyncART(self.runtime_config)
+        art.client = FakeAsyncClient([[ChoiceDelta(content=str(i))] for i in range(100)])
+
+        async def run_one():
+            content = ''
+            async for event in art.run(agent, messages=[]):
+                if 'content' in event:
+                    content += event['content']
+            return content
+
+        async def run_all():
+            return await asyncio.gather(*[run_one() for _ in range(100)])
+
+        contents = asyncio.run(run_all())
+        self.assertEqual(sorted(contents, key=int), [str(i) for i in range(100)])
+        art.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
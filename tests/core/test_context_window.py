@@ -0,0 +1,105 @@
+import unittest
+
+from DART.core.art import ART
+from DART.core.base.agent import Agent
+from DART.core.context_window import ContextWindow, Tokenizer
+from DART.core.types.message import SystemMessage, UserMessage, AssistantMessage, ToolMessage
+from DART.core.types.runtime_config import RuntimeConfig
+from fake_clients import FakeClient
+
+
+def conversation(turns: int):
+    messages = [SystemMessage(content='system').to_message()]
+    for i in range(turns):
+        messages.append(UserMessage(content=f'question {i} ' + 'x' * 40).to_message())
+        messages.append(AssistantMessage(content=f'answer {i} ' + 'y' * 40).to_message())
+    return messages
+
+
+class TestContextWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.tokenizer = Tokenizer(encoding=None)
+
+    def test_estimate(self):
+        self.assertEqual(self.tokenizer.count('abcdefgh'), 2)
+        self.assertEqual(self.tokenizer.count('红色连衣裙'), 5)
+        self.assertEqual(self.tokenizer.count(''), 0)
+
+    def test_fits_without_change(self):
+        window = ContextWindow(10000, tokenizer=self.tokenizer, reserved_tokens=0)
+        messages = conversation(3)
+        self.assertEqual(window.fit(messages), messages)
+
+    def test_evicts_oldest_turns(self):
+        messages = conversation(10)
+        window = ContextWindow(100, tokenizer=self.tokenizer, reserved_tokens=0)
+        fitted = window.fit(messages)
+        self.assertLessEqual(window.count(fitted), 100)
+        self.assertEqual(fitted[0], messages[0])
+        self.assertEqual(fitted[-2:], messages[-2:])
+        self.assertEqual(fitted[1]['role'], 'user')
+
+    def test_summarizer(self):
+        calls = []
+
+        def summarizer(evicted):
+            calls.append(len(evicted))
+            return 'summary'
+
+        window = ContextWindow(100, tokenizer=self.tokenizer, reserved_tokens=0, summarizer=summarizer)
+        messages = conversation(10)
+        fitted = window.fit(messages)
+        self.assertIn('summary', fitted[1]['content'])
+        window.fit(messages)
+        self.assertEqual(len(calls), 1)
+
+    def test_truncates_tool_results(self):
+        window = ContextWindow(10000, tokenizer=self.tokenizer, max_tool_tokens=10)
+        long_result = 'z' * 400
+        messages = [UserMessage(content='q').to_message(),
+                    ToolMessage(content=long_result, name='search', description='d').to_message()]
+        fitted = window.fit(messages)
+        self.assertLess(len(fitted[1]['content']), 200)
+        ref = fitted[1]['content'].rsplit('：', 1)[1].rstrip(']')
+        self.assertIn(long_result, window.archive[ref])
+        self.assertNotEqual(messages[1]['content'], fitted[1]['content'])
+        self.assertIs(window.fit(messages)[1]['content'], fitted[1]['content'])
+
+    def test_archive_is_bounded(self):
+        window = ContextWindow(10000, tokenizer=self.tokenizer, max_tool_tokens=10, archive_size=2)
+        results = [ToolMessage(content=f'{i}' * 400, name='search', description='d').to_message() for i in range(3)]
+        window.fit(results[:1])
+        window.fit(results[1:2])
+        window.fit(results[:1])
+        window.fit(results[2:])
+        # 最久未使用的第二条结果被移除，引用ID不会重复
+        self.assertEqual(list(window.archive), ['tool-result-0', 'tool-result-2'])
+        self.assertEqual(len(window._truncated), 2)
+        self.assertIn('tool-result-3', window.fit(results[1:2])[0]['content'])
+
+    def test_art_applies_budget(self):
+        runtime_config = RuntimeConfig(api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'],
+                                       default_model='fake-model', context_windows={'fake-model': 2000})
+        art = ART(runtime_config)
+        art.client = FakeClient()
+        art.context_windows['fake-model'] = ContextWindow(600, tokenizer=self.tokenizer, reserved_tokens=0)
+        agent = Agent(name='agent', persona='p', description='d')
+
+        history = conversation(30)[1:] + [UserMessage(content='latest').to_message()]
+        list(art.run(agent, messages=history))
+        sent = art.client.requests[-1]
+        self.assertLess(len(sent), len(history) + 1)
+        self.assertLessEqual(art.context_windows['fake-model'].count(sent), 600)
+        self.assertEqual(sent[-1]['content'], 'latest')
+
+    def test_window_from_runtime_config(self):
+        runtime_config = RuntimeConfig(api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'],
+                                       default_model='fake-model', context_windows={'fake-model': 2000})
+        art = ART(runtime_config)
+        self.assertEqual(art._context_window('fake-model').max_tokens, 2000)
+        self.assertIsNone(art._context_window('other-model'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from DART.core.dag_scheduler import DAGScheduler, FailurePolicy
+from DART.core.task import Task, TaskStatus
+
+
+class TestDAGScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = DAGScheduler(max_workers=2)
+
+    def _run(self, execute_func):
+        return list(self.scheduler.run(execute_func))
+
+    def test_dependency_order(self):
+        # 菱形依赖：a -> (b, c) -> d
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None),
+            Task(task_id='b', agent=None, dependencies=['a']),
+            Task(task_id='c', agent=None, dependencies=['a']),
+            Task(task_id='d', agent=None, dependencies=['b', 'c']),
+        ])
+        finished = []
+
+        def execute(task):
+            finished.append(task.task_id)
+            return {'content': task.task_id}
+
+        events = self._run(execute)
+        self.assertEqual(finished[0], 'a')
+        self.assertEqual(finished[-1], 'd')
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+        for task in self.scheduler.tasks.values():
+            self.assertEqual(task.status, TaskStatus.COMPLETED)
+
+    def test_priority_order(self):
+        scheduler = DAGScheduler(max_workers=1)
+        scheduler.add_tasks([
+            Task(task_id='low', agent=None, priority=0),
+            Task(task_id='high', agent=None, priority=10),
+            Task(task_id='mid', agent=None, priority=5),
+        ])
+        started = [event['task_started'] for event in scheduler.run(lambda task: {}) if 'task_started' in event]
+        self.assertEqual(started, ['high', 'mid', 'low'])
+
+    def test_no_polling_delay(self):
+        # 长链路上每一跳都不应该再有100ms的轮询延迟
+        tasks = [Task(task_id='t0', agent=None)]
+        for i in range(1, 20):
+            tasks.append(Task(task_id=f't{i}', agent=None, dependencies=[f't{i - 1}']))
+        self.scheduler.add_tasks(tasks)
+
+        start = time.perf_counter()
+        self._run(lambda task: {})
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_failed_task(self):
+        def execute(task):
+            if task.task_id == 'bad':
+                raise ValueError('boom')
+            return {}
+
+        self.scheduler.add_tasks([
+            Task(task_id='good', agent=None),
+            Task(task_id='bad', agent=None),
+        ])
+        events = self._run(execute)
+        self.assertIn({'task_failed': 'bad', 'error': 'boom'}, events)
+        self.assertEqual(events[-1], {'dag_status': 'completed_with_errors', 'failed_tasks': ['bad']})
+
+    def _failing_dag(self, scheduler):
+        # a失败后，b、c是其传递下游任务，x、y是独立分支
+        scheduler.add_tasks([
+            Task(task_id='a', agent=None, priority=10),
+            Task(task_id='b', agent=None, dependencies=['a']),
+            Task(task_id='c', agent=None, dependencies=['b']),
+            Task(task_id='x', agent=None),
+            Task(task_id='y', agent=None, dependencies=['x']),
+        ])
+
+        def execute(task):
+            if task.task_id == 'a':
+                raise ValueError('boom')
+            return {}
+
+        return list(scheduler.run(execute))
+
+    def test_fail_fast(self):
+        scheduler = DAGScheduler(max_workers=1)
+        events = self._failing_dag(scheduler)
+        skipped = {event['task_skipped'] for event in events if 'task_skipped' in event}
+        self.assertEqual(skipped, {'b', 'c', 'x', 'y'})
+        self.assertEqual(scheduler.tasks['c'].status, TaskStatus.SKIPPED)
+        self.assertEqual(events[-1]['dag_status'], 'completed_with_errors')
+        self.assertEqual(set(events[-1]['skipped_tasks']), skipped)
+
+    def test_continue_independent_branches(self):
+        scheduler = DAGScheduler(max_workers=1, failure_policy=FailurePolicy.CONTINUE)
+        events = self._failing_dag(scheduler)
+        skipped = {event['task_skipped'] for event in events if 'task_skipped' in event}
+        self.assertEqual(skipped, {'b', 'c'})
+        self.assertEqual(scheduler.tasks['y'].status, TaskStatus.COMPLETED)
+        self.assertEqual(scheduler.get_task_status()['skipped'], 2)
+
+    def test_invalid_dag(self):
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None, dependencies=['b']),
+            Task(task_id='b', agent=None, dependencies=['a']),
+        ])
+        self.assertFalse(self.scheduler.validate_dag())
+
+        scheduler = DAGScheduler()
+        scheduler.add_task(Task(task_id='a', agent=None, dependencies=['missing']))
+        self.assertFalse(scheduler.validate_dag())
+        with self.assertRaisesRegex(ValueError, 'Invalid DAG'):
+            scheduler.ensure_valid()
+
+    def test_input_bindings(self):
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None),
+            Task(task_id='a.b', agent=None),
+            Task(task_id='c', agent=None, inputs_from={'x': 'a.b', 'y': 'a.notes'}),
+        ])
+        self.assertTrue(self.scheduler.validate_dag())
+        # 与task_id完全相同的绑定指向该任务本身，而不是任务a的字段b
+        self.assertEqual(self.scheduler.tasks['c'].dependencies, ['a.b', 'a'])
+
+        scheduler = DAGScheduler()
+        scheduler.add_tasks([Task(task_id='a', agent=None),
+                             Task(task_id='b', agent=None, inputs_from={'x': 'missing.content'})])
+        with self.assertRaisesRegex(ValueError, "Task b binds input 'x' to 'missing.content': unknown task missing"):
+            scheduler.validate_dag()
+
+        with self.assertRaisesRegex(ValueError, 'empty output field'):
+            Task(task_id='d', agent=None, inputs_from={'x': 'a.'})
+
+    def test_large_dag(self):
+        # 深链路不应触发递归深度限制，大规模DAG的调度开销应为线性
+        scheduler = DAGScheduler(max_workers=4)
+        tasks = [Task(task_id='c0', agent=None)]
+        tasks.extend(Task(task_id=f'c{i}', agent=None, dependencies=[f'c{i - 1}']) for i in range(1, 5000))
+        tasks.extend(Task(task_id=f'w{i}', agent=None, dependencies=['c0']) for i in range(5000))
+        scheduler.add_tasks(tasks)
+        self.assertTrue(scheduler.validate_dag())
+
+        start = time.perf_counter()
+        events = list(scheduler.run(lambda task: {}))
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+        self.assertEqual(len(scheduler.completed_tasks), 10000)
+
+    def test_ready_tasks(self):
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None),
+            Task(task_id='b', agent=None, dependencies=['a']),
+        ])
+        self.assertEqual([task.task_id for task in self.scheduler.get_executable_tasks()], ['a'])
+        self.scheduler.completed_tasks.add('a')
+        self.scheduler.tasks['a'].status = TaskStatus.COMPLETED
+        self.assertEqual([task.task_id for task in self.scheduler.get_ready_tasks()], ['b'])
+
+    def test_timeout_and_retry(self):
+        attempts = []
+
+        def execute(task):
+            attempts.append(task.task_id)
+            if task.task_id == 'slow':
+                # 模拟卡住的流式请求，只有在被取消时才返回
+                token = task.cancel_token
+                released = threading.Event()
+                token.add_callback(released.set)
+                released.wait(10)
+            return {}
+
+        self.scheduler.add_tasks([
+            Task(task_id='slow', agent=None, timeout=0.05, retries=1),
+            Task(task_id='after_slow', agent=None, dependencies=['slow']),
+            Task(task_id='fast', agent=None),
+        ])
+        start = time.perf_counter()
+        events = self._run(execute)
+        self.assertLess(time.perf_counter() - start, 2)
+
+        self.assertEqual(attempts.count('slow'), 2)
+        self.assertIn('task_retry', {key for event in events for key in event})
+        failed = [event for event in events if 'task_failed' in event]
+        self.assertEqual(failed[0]['task_failed'], 'slow')
+        self.assertIn('timed out', failed[0]['error'])
+        self.assertEqual(self.scheduler.tasks['slow'].status, TaskStatus.FAILED)
+        self.assertEqual(self.scheduler.tasks['fast'].status, TaskStatus.COMPLETED)
+
+    def test_late_error_of_timed_out_attempt_is_ignored(self):
+        def execute(task):
+            if task.attempts == 1:
+                time.sleep(0.3)
+                raise RuntimeError('stream closed')
+            return {'content': 'ok'}
+
+        self.scheduler.add_task(Task(task_id='a', agent=None, timeout=0.1, retries=1))
+        events = self._run(execute)
+        time.sleep(0.4)
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+        self.assertEqual(self.scheduler.tasks['a'].status, TaskStatus.COMPLETED)
+        self.assertEqual(self.scheduler.failed_tasks, set())
+
+    def test_completed_task_is_not_expired(self):
+        class SlowReturnScheduler(DAGScheduler):
+            def _mark_completed(self, task, result, token):
+                super()._mark_completed(task, result, token)
+                # 结果已记录，但工作函数返回前超时时刻已到
+                time.sleep(0.15)
+
+        scheduler = SlowReturnScheduler(max_workers=2)
+        self.addCleanup(scheduler.shutdown)
+        scheduler.add_task(Task(task_id='a', agent=None, timeout=0.05, retries=1))
+        events = list(scheduler.run(lambda task: {'content': 'ok'}))
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+        self.assertNotIn('task_retry', [key for event in events for key in event])
+        self.assertEqual(scheduler.tasks['a'].attempts, 1)
+        self.assertEqual(scheduler.failed_tasks, set())
+
+    def test_timeout_excludes_queueing_time(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        pool.submit(time.sleep, 0.3)
+        scheduler = DAGScheduler(max_workers=2, executor=pool)
+        scheduler.add_task(Task(task_id='a', agent=None, timeout=0.2))
+        events = list(scheduler.run(lambda task: time.sleep(0.05) or {}))
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+
+    def test_async_timeout(self):
+        async def execute(task):
+            if task.task_id == 'slow':
+                await asyncio.sleep(10)
+            return {}
+
+        self.scheduler.add_tasks([
+            Task(task_id='slow', agent=None, timeout=0.05),
+            Task(task_id='fast', agent=None),
+        ])
+
+        async def collect():
+            return [event async for event in self.scheduler.arun(execute)]
+
+        events = asyncio.run(collect())
+        self.assertIn('timed out', [event for event in events if 'task_failed' in event][0]['error'])
+        self.assertEqual(self.scheduler.tasks['fast'].status, TaskStatus.COMPLETED)
+
+    def test_repeated_runs(self):
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None),
+            Task(task_id='b', agent=None, dependencies=['a']),
+        ])
+        executor = self.scheduler.executor
+        for _ in range(3):
+            self.scheduler.reset()
+            events = self._run(lambda task: {'content': task.task_id})
+            self.assertEqual(events[-1], {'dag_status': 'completed'})
+        self.assertIs(self.scheduler.executor, executor)
+        self.scheduler.shutdown()
+
+    def test_template_instantiate(self):
+        self.scheduler.add_tasks([
+            Task(task_id='a', agent=None, inputs={'user_message': 'template', 'max_chat_times': 1}),
+            Task(task_id='b', agent=None, dependencies=['a']),
+        ])
+        self.scheduler.compile()
+
+        def execute(task):
+            return {'content': task.inputs.get('user_message')}
+
+        for request in ('r1', 'r2'):
+            instance = self.scheduler.instantiate({'a': {'user_message': request}})
+            events = list(instance.run(execute))
+            self.assertEqual(events[-1], {'dag_status': 'completed'})
+            self.assertEqual(instance.tasks['a'].outputs['content'], request)
+            self.assertEqual(instance.tasks['a'].inputs['max_chat_times'], 1)
+            self.assertIs(instance.tasks['b'].dependencies, self.scheduler.tasks['b'].dependencies)
+            self.assertIs(instance.executor, self.scheduler.executor)
+
+        # 模板本身的任务状态不受实例运行的影响
+        self.assertEqual(self.scheduler.tasks['a'].status, TaskStatus.PENDING)
+        self.assertEqual(self.scheduler.tasks['a'].inputs['user_message'], 'template')
+
+    def test_instances_do_not_share_inputs(self):
+        self.scheduler.add_task(Task(task_id='a', agent=None, inputs={'user_message': 'template'}))
+        first, second = self.scheduler.instantiate(), self.scheduler.instantiate()
+        first.tasks['a'].inputs['user_message'] = 'changed'
+        self.assertEqual(second.tasks['a'].inputs['user_message'], 'template')
+        self.assertEqual(self.scheduler.tasks['a'].inputs['user_message'], 'template')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from DART.core.art import ART
+from DART.core.async_art import AsyncART
+from DART.core.base.agent import Agent
+from DART.core.types.runtime_config import RuntimeConfig
+from DART.utils.cancellation import CancelToken
+from fake_clients import FakeClient, FakeAsyncClient
+
+
+class RoutingClient(FakeClient):
+    """按系统提示中的代理名称回复：root先调用两个handoff再结束，其他代理执行work后回复“名称 done”"""
+
+    def __init__(self, work):
+        super().__init__()
+        self.work = work
+
+    def reply(self, **kwargs):
+        messages = kwargs['messages']
+        if '**【智能体名称】**\nroot' in messages[0]['content']:
+            if any(mess['role'] == 'tool' for mess in messages):
+                yield ChoiceDelta(content='final')
+            else:
+                yield from handoff_calls('beta', 'alpha')
+            return
+        name = 'alpha' if '**【智能体名称】**\nalpha' in messages[0]['content'] else 'beta'
+        yield from self.work(name, kwargs.get('cancel_token'))
+        yield ChoiceDelta(content=f'{name} done')
+
+
+def handoff_calls(*names):
+    return [
+        ChoiceDelta(
+            role='assistant',
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=index, id=f'call_{index}', type='function',
+                    function=ChoiceDeltaToolCallFunction(name=name, arguments=json.dumps({})),
+                )
+            ],
+        )
+        for index, name in enumerate(names)
+    ]
+
+
+class TestConcurrentHandoffs(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model'
+        )
+
+    def _agents(self, art_class, client_class, before_reply):
+        helpers = []
+        for name in ['alpha', 'beta']:
+            art = art_class(self.runtime_config)
+            art.client = client_class([[ChoiceDelta(role='assistant', content=f'{name} done')]], before_reply)
+            helpers.append(Agent(name=name, persona=f'{name} persona', description='d', art=art))
+        root = Agent(name='root', persona='p', description='d', handoffs=helpers, parallel_execute=True)
+        root_art = art_class(self.runtime_config)
+        root_art.client = client_class([handoff_calls('beta', 'alpha'), [ChoiceDelta(content='final')]])
+        return root, root_art
+
+    def _check(self, events, root_art):
+        handoff_events = [event for event in events if 'handoff' in event]
+        self.assertEqual({event['handoff'] for event in handoff_events}, {'alpha', 'beta'})
+        self.assertIn({'handoff': 'alpha', 'event': {'content': 'alpha done'}}, handoff_events)
+        self.assertIn({'content': 'final'}, events)
+
+        # 工具消息按模型调用的顺序追加，与完成顺序无关
+        tool_messages = [mess for mess in root_art.client.requests[1] if mess['role'] == 'tool']
+        self.assertEqual(len(tool_messages), 2)
+        self.assertTrue(tool_messages[0]['content'].endswith('beta done'))
+        self.assertTrue(tool_messages[1]['content'].endswith('alpha done'))
+
+    def test_sync_handoffs_run_concurrently(self):
+        # 两个handoff都开始回复后才能通过屏障，串行执行会超时
+        barrier = threading.Barrier(2, timeout=5)
+        root, root_art = self._agents(ART, FakeClient, barrier.wait)
+
+        cancel_token = CancelToken()
+        events = list(root_art.run(root, messages=[], cancel_token=cancel_token))
+        self._check(events, root_art)
+        # 本轮的取消令牌在结束后从调用方的令牌上注销
+        self.assertEqual(cancel_token._callbacks, [])
+
+    def test_sync_bounded_parallelism(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def before_reply():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            threading.Event().wait(0.05)
+            with lock:
+                running.pop()
+
+        root, root_art = self._agents(ART, FakeClient, before_reply)
+        root_art.max_handoff_workers = 1
+        events = list(root_art.run(root, messages=[]))
+        self._check(events, root_art)
+        self.assertEqual(max(peak), 1)
+
+    def _shared_art(self, before_reply):
+        helpers = [Agent(name=name, persona=f'{name} persona', description='d') for name in ['alpha', 'beta']]
+        root = Agent(name='root', persona='p', description='d', handoffs=helpers, parallel_execute=True)
+        root_art = ART(self.runtime_config)
+        root_art.client = RoutingClient(before_reply)
+        return root, root_art
+
+    def test_handoffs_sharing_an_art_have_separate_status(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def before_reply(name, cancel_token):
+            barrier.wait()
+            return []
+
+        root, root_art = self._shared_art(before_reply)
+        events = list(root_art.run(root, messages=[]))
+        self.assertIn({'content': 'final'}, events)
+        # 两个handoff同时运行时各自记录自己的名称，之后并入root_art的状态
+        self.assertEqual(sorted(record['agent'] for record in root_art.status.chat_history),
+                         ['alpha', 'beta', 'root', 'root'])
+        self.assertIs(root_art.status.current_agent, root)
+
+    def test_closing_the_run_cancels_handoffs(self):
+        cancelled = []
+
+        def before_reply(name, cancel_token):
+            yield ChoiceDelta(content=f'{name} started')
+            released = threading.Event()
+            cancel_token.add_callback(released.set)
+            cancelled.append(released.wait(5))
+
+        root, root_art = self._shared_art(before_reply)
+        events = root_art.run(root, messages=[])
+        for event in events:
+            if 'handoff' in event:
+                break
+        start = time.perf_counter()
+        events.close()
+        self.assertLess(time.perf_counter() - start, 1)
+        for _ in range(50):
+            if len(cancelled) == 2:
+                break
+            time.sleep(0.05)
+        self.assertEqual(cancelled, [True, True])
+
+    def test_async_handoffs_run_concurrently(self):
+        async def run():
+            started = asyncio.Event()
+            count = []
+
+            async def before_reply():
+                count.append(1)
+                if len(count) == 2:
+                    started.set()
+                await asyncio.wait_for(started.wait(), 5)
+
+            root, root_art = self._agents(AsyncART, FakeAsyncClient, before_reply)
+            events = [event async for event in root_art.run(root, messages=[])]
+            return events, root_art
+
+        events, root_art = asyncio.run(run())
+        self._check(events, root_art)
+        root_art.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from DART.core.base.agent import Agent
+from DART.core.base.llm import RequestLimiter
+from DART.core.multi_agent_art import MultiAgentART
+from DART.core.types.runtime_config import RuntimeConfig
+
+
+class FakeLimitedClient:
+    """使用RequestLimiter并记录最大在途请求数的异步客户端"""
+
+    def __init__(self, limiter: RequestLimiter):
+        self.models = ['fake-model']
+        self.limiter = limiter
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_chat_completion(self, model=None, **kwargs):
+        async with self.limiter.acquire(model):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            yield ChoiceDelta(content=model)
+
+
+class TestMultiAgentART(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime_config = RuntimeConfig(
+            api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'], default_model='fake-model'
+        )
+
+    def _collect(self, multi_art, **kwargs):
+        async def collect():
+            return [event async for event in multi_art.arun(**kwargs)]
+
+        return asyncio.run(collect())
+
+    def test_arun_with_request_budget(self):
+        multi_art = MultiAgentART(self.runtime_config, max_concurrent_requests=5)
+        client = FakeLimitedClient(multi_art.limiter)
+        multi_art.async_art.client = client
+
+        agent = Agent(name='agent', persona='p', description='d')
+        for i in range(50):
+            multi_art.add_task(task_id=f'branch_{i}', agent=agent, inputs={'user_message': str(i)})
+        multi_art.add_task(task_id='join', agent=agent, dependencies=[f'branch_{i}' for i in range(50)])
+
+        events = self._collect(multi_art)
+        self.assertEqual(events[-1], {'multi_agent_status': 'completed'})
+        self.assertEqual(len(multi_art.status.completed_tasks), 51)
+        self.assertEqual(client.max_in_flight, 5)
+        self.assertEqual(multi_art.get_task_results()['join']['outputs']['content'], 'fake-model')
+
+    def test_compiled_scheduler_is_not_validated_again(self):
+        multi_art = MultiAgentART(self.runtime_config)
+        client = FakeLimitedClient(multi_art.limiter)
+        multi_art.async_art.client = client
+        multi_art.add_task(task_id='a', agent=Agent(name='agent', persona='p', description='d'))
+        multi_art.scheduler.compile()
+
+        def validate_dag():
+            raise AssertionError('validate_dag called on a compiled scheduler')
+
+        multi_art.scheduler.validate_dag = validate_dag
+        events = self._collect(multi_art)
+        self.assertEqual(events[-1], {'multi_agent_status': 'completed'})
+
+    def test_inputs_from(self):
+        multi_art = MultiAgentART(self.runtime_config)
+        agent = Agent(name='agent', persona='p', description='d')
+        multi_art.add_task(task_id='task_a', agent=agent, inputs={'user_message': 'summarise'})
+        multi_art.add_task(task_id='task_b', agent=agent, inputs={'user_message': 'translate'},
+                           inputs_from={'summary': 'task_a.content'})
+        task_a, task_b = multi_art.scheduler.tasks['task_a'], multi_art.scheduler.tasks['task_b']
+        self.assertEqual(task_b.dependencies, ['task_a'])
+
+        seen = {}
+
+        def execute(task):
+            args = multi_art._task_run_args(task)
+            seen[task.task_id] = args['messages']
+            return multi_art._task_result(task, f'{task.task_id} output')
+
+        events = list(multi_art.scheduler.run(execute))
+        self.assertEqual(events[-1], {'dag_status': 'completed'})
+
+        bound, own = seen['task_b']
+        self.assertEqual(bound['name'], 'summary')
+        # 下游消息直接引用上游输出，没有复制
+        self.assertIs(bound['content'], task_a.outputs['content'])
+        self.assertEqual(own['content'], 'translate')
+        self.assertEqual(task_b.resolve_inputs(multi_art.scheduler.tasks), {'summary': 'task_a output'})
+
+    def test_inputs_from_missing_output(self):
+        multi_art = MultiAgentART(self.runtime_config)
+        agent = Agent(name='agent', persona='p', description='d')
+        multi_art.add_task(task_id='task_a', agent=agent)
+        multi_art.add_task(task_id='task_b', agent=agent, inputs_from={'notes': 'task_a.notes'})
+        with self.assertRaises(ValueError):
+            multi_art._task_run_args(multi_art.scheduler.tasks['task_b'])
+
+    def test_model_budget(self):
+        limiter = RequestLimiter(model_concurrency={'fake-model': 2})
+        client = FakeLimitedClient(limiter)
+
+        async def consume():
+            async for _ in client.create_chat_completion(model='fake-model'):
+                pass
+
+        async def run_all():
+            await asyncio.gather(*[consume() for _ in range(10)])
+
+        asyncio.run(run_all())
+        self.assertEqual(client.max_in_flight, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
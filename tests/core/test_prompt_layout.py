@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+from DART.core.art import ART
+from DART.core.base.agent import Agent
+from DART.core.constants.configs import DEFAULT_PREFIX_HISTORY_SIZE
+from DART.core.types.conversation import shared_prefix
+from DART.core.types.message import UserMessage
+from DART.core.types.runtime_config import RuntimeConfig
+from DART.core.types.status import AgentRunTimeStatus
+from fake_clients import FakeClient
+
+
+def get_weather(city: str):
+    """weather"""
+    if city == 'nowhere':
+        raise ValueError('unknown city')
+    return f'{city}: sunny'
+
+
+def reply(content: str, city: str = None):
+    deltas = [ChoiceDelta(role='assistant', content=content)]
+    if city is not None:
+        deltas.append(ChoiceDelta(tool_calls=[ChoiceDeltaToolCall(
+            index=0, id='call_0', type='function',
+            function=ChoiceDeltaToolCallFunction(name='get_weather', arguments=json.dumps({'city': city})),
+        )]))
+    return deltas
+
+
+class TestPromptLayout(unittest.TestCase):
+
+    def _run(self, append_only_prompt: bool, prefix_stats: bool = True):
+        runtime_config = RuntimeConfig(api_key='fake', base_url='http://localhost:1/v1', models=['fake-model'],
+                                       default_model='fake-model')
+        art = ART(runtime_config, append_only_prompt=append_only_prompt, prefix_stats=prefix_stats)
+        art.client = FakeClient([reply('step 1', 'nowhere'), reply('step 2', 'beijing'), reply('step 3', 'shanghai'),
+                                 reply('done')])
+        agent = Agent(name='agent', persona='p', description='d', tools=[get_weather])
+        events = list(art.run(agent, messages=[UserMessage(content='weather?').to_message()]))
+        return art, events
+
+    def test_append_only_keeps_prefix(self):
+        art, events = self._run(True)
+        requests = art.client.requests
+        self.assertEqual(len(requests), 4)
+        for previous, current in zip(requests, requests[1:]):
+            self.assertEqual(shared_prefix(previous, current), len(previous))
+        # 工具错误提示和每轮的回复都留在日志中
+        self.assertTrue(any(message['role'] == 'assistant' and message['content'] == 'step 1'
+                            for message in requests[-1]))
+        self.assertIn({'content': 'done'}, events)
+        self.assertEqual(art.status.get_prefix_stats()['requests'], 3)
+
+    def test_default_layout_rewrites_tail(self):
+        art, events = self._run(False)
+        requests = art.client.requests
+        # 上一轮的工具错误提示只是临时消息，下一轮被移除
+        self.assertLess(shared_prefix(requests[1], requests[2]), len(requests[1]))
+        self.assertIn({'content': 'done'}, events)
+
+        append_art, _ = self._run(True)
+        self.assertGreater(append_art.status.get_prefix_stats()['shared_ratio'],
+                           art.status.get_prefix_stats()['shared_ratio'])
+
+    def test_prefix_stats_are_opt_in(self):
+        art, _ = self._run(True, prefix_stats=False)
+        self.assertEqual(art.status.get_prefix_stats()['requests'], 0)
+        self.assertEqual(art.status.prefix_history, [])
+
+    def test_prefix_history_is_bounded(self):
+        status = AgentRunTimeStatus()
+        messages = [UserMessage(content='hi').to_message()]
+        for _ in range(3 * DEFAULT_PREFIX_HISTORY_SIZE):
+            status.add_prefix_stats(messages, messages)
+        self.assertLessEqual(len(status.prefix_history), 2 * DEFAULT_PREFIX_HISTORY_SIZE)
+        stats = status.get_prefix_stats()
+        self.assertEqual(stats['requests'], 3 * DEFAULT_PREFIX_HISTORY_SIZE)
+        self.assertEqual(stats['shared_ratio'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from DART.core.base.agent import Agent
+from DART.core.tools.executor import ToolExecutor, ToolExecutionError, ToolTimeoutError
+from DART.core.types.choice import ToolCall, ToolCallFunction
+
+
+def square(x: int):
+    """square"""
+    return str(x * x)
+
+
+def tool_call(name: str, **arguments):
+    return ToolCall(function=ToolCallFunction(name=name, arguments=json.dumps(arguments)))
+
+
+class TestToolExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ToolExecutor(max_workers=8)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_max_concurrency(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def slow(i: int):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return str(i)
+
+        self.executor.set_limits('slow', max_concurrency=2)
+        results = self.executor.run_calls([('slow', slow, {'i': i}) for i in range(8)])
+        self.assertEqual(results, [str(i) for i in range(8)])
+        self.assertEqual(state['max'], 2)
+
+    def test_throttled_tool_does_not_hold_workers(self):
+        executor = ToolExecutor(max_workers=2)
+        executor.set_limits('slow', max_concurrency=1)
+        slow = [executor.submit('slow', lambda seconds: time.sleep(seconds), {'seconds': 0.1}) for _ in range(4)]
+        start = time.perf_counter()
+        # 排队等待的slow调用不占用线程，另一个工具不需要等它们执行完
+        self.assertEqual(executor.submit('square', square, {'x': 3}).result(), '9')
+        self.assertLess(time.perf_counter() - start, 0.2)
+        for future in slow:
+            future.result()
+        executor.shutdown()
+
+    def test_timeout_releases_slot(self):
+        release = threading.Event()
+        self.executor.set_limits('square', max_concurrency=1, timeout=0.05)
+        results = self.executor.run_calls([('square', lambda x: release.wait(1) and square(x), {'x': 2})])
+        self.assertIsInstance(results[0], ToolTimeoutError)
+        # 超时的调用仍在运行，但已经归还了并发名额
+        self.assertEqual(self.executor.run_calls([('square', square, {'x': 3})]), ['9'])
+        release.set()
+
+    def test_cancelled_queued_calls(self):
+        release = threading.Event()
+        self.executor.set_limits('square', max_concurrency=1)
+        running = self.executor.submit('square', lambda x: release.wait(1) and square(x), {'x': 2})
+        queued = [self.executor.submit('square', square, {'x': i}) for i in range(5000)]
+        for future in queued[:-1]:
+            self.assertTrue(future.cancel())
+        # 名额依次跳过已取消的调用交给最后一个，不会逐个递归
+        release.set()
+        self.assertEqual(running.result(timeout=1), '4')
+        self.assertEqual(queued[-1].result(timeout=1), str(4999 * 4999))
+        self.assertEqual(self.executor.run_calls([('square', square, {'x': 3})]), ['9'])
+
+    def test_rate_limit(self):
+        self.executor.set_limits('square', rate_limit=50)
+        start = time.perf_counter()
+        self.executor.run_calls([('square', square, {'x': i}) for i in range(6)])
+        # 6次调用至少需要5个间隔
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_errors_and_timeouts(self):
+        def fail():
+            raise KeyError('missing')
+
+        self.executor.set_limits('sleep', timeout=0.05)
+        results = self.executor.run_calls([
+            ('fail', fail, {}),
+            ('sleep', lambda: time.sleep(1), {}),
+            ('square', square, {'x': 3}),
+        ])
+        self.assertIsInstance(results[0], ToolExecutionError)
+        self.assertIsInstance(results[0].cause, KeyError)
+        self.assertIsInstance(results[1], ToolTimeoutError)
+        self.assertEqual(results[2], '9')
+
+    def test_async_mode(self):
+        executor = ToolExecutor(mode='async', default_timeout=0.1)
+
+        async def fetch(x: int):
+            await asyncio.sleep(0.01)
+            return f'fetched {x}'
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        results = executor.run_calls([('fetch', fetch, {'x': 1}), ('square', square, {'x': 2}), ('hang', hang, {})])
+        self.assertEqual(results[:2], ['fetched 1', '4'])
+        self.assertIsInstance(results[2], ToolTimeoutError)
+        executor.shutdown()
+
+    def test_process_mode(self):
+        with ToolExecutor(mode='process', max_workers=2) as executor:
+            self.assertEqual(executor.run_calls([('square', square, {'x': i}) for i in range(4)]),
+                             ['0', '1', '4', '9'])
+
+    def test_agent_run_tools_parallel(self):
+        def broken(x: int):
+            """broken"""
+            raise ValueError('bad input')
+
+        agent = Agent(name='agent', persona='p', description='d', tools=[square, broken],
+                      tool_executor=self.executor)
+        results = agent.run_tools_parallel([
+            tool_call('square', x=4), tool_call('broken', x=1), tool_call('unknown'),
+        ])
+        self.assertEqual([result.success for result in results], [True, False, False])
+        self.assertEqual(results[0].result_value, '16')
+        self.assertIn('bad input', results[1].result_value)
+
+        # 线程池在多次调用之间复用
+        threads = self.executor._threads
+        agent.run_tools_parallel([tool_call('square', x=1)])
+        self.assertIs(self.executor._threads, threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+
+from DART.core.base.agent import Agent
+from DART.core.tools.handoff import HandoffTool
+
+
+def get_weather(city: str, day: int = 0):
+    """weather"""
+    return city
+
+
+def get_hotel(city: str):
+    """hotel"""
+    return city
+
+
+class TestToolRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.handoff = Agent(name='helper', persona='p', description='d')
+        self.agent = Agent(name='agent', persona='p', description='d', tools=[get_weather],
+                           handoffs=[self.handoff])
+
+    def test_stable_payload(self):
+        first = self.agent.tool_descs()
+        second = self.agent.tool_descs()
+        # 工具未变化时直接复用缓存，序列化结果逐字节一致
+        self.assertIs(first, second)
+        self.assertEqual([desc['index'] for desc in first], [0, 1])
+        self.assertEqual([desc['function']['name'] for desc in first], ['get_weather', 'helper'])
+
+        other = Agent(name='other', persona='p', description='d', tools=[get_weather], handoffs=[self.handoff])
+        self.assertEqual(json.dumps(other.tool_descs()), json.dumps(first))
+
+    def test_invalidate_on_change(self):
+        first = self.agent.tool_descs()
+        self.agent.add_tool(get_hotel)
+        self.assertEqual([desc['function']['name'] for desc in self.agent.tool_descs()],
+                         ['get_weather', 'get_hotel', 'helper'])
+        self.agent.set_tools([])
+        self.assertEqual(len(self.agent.tool_descs()), 1)
+        self.assertIsNot(self.agent.tool_descs(), first)
+
+    def test_handoff_tool_is_cached(self):
+        tool = self.handoff.to_tool()
+        self.assertIs(self.handoff.to_tool(), tool)
+        self.handoff.description = 'new description'
+        self.assertIn('new description', self.handoff.to_tool().__doc__)
+
+    def test_handoff_tool_object(self):
+        tool = self.handoff.to_tool()
+        self.assertIsInstance(tool, HandoffTool)
+        self.assertEqual(tool.__name__, 'helper')
+        self.assertIs(tool(), self.handoff)
+        self.assertEqual(self.agent.tool_descs()[1]['function']['parameters']['properties'], {})
+        self.assertIs(self.agent.handoffs_mapping['helper'], tool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -88,6 +88,69 @@ class TestChoice(unittest.TestCase):
         self.assertEqual(self.choice.content, 'initial content and more')
         self.assertEqual(self.choice.refusal, 'initial refusal updated')
 
+    def test_merge_delta_chunks(self):
+        from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall, ChoiceDeltaToolCallFunction
+
+        def tool_delta(**function):
+            return ChoiceDelta(tool_calls=[
+                ChoiceDeltaToolCall(index=0, function=ChoiceDeltaToolCallFunction(**function))
+            ])
+
+        self.choice.merge_delta(ChoiceDelta(role='assistant', content='Hel'))
+        self.choice.merge_delta(ChoiceDelta(content='lo'))
+        self.choice.merge_delta(tool_delta(name='get_whether', arguments='{"city": '))
+        self.choice.merge_delta(tool_delta(arguments='"Beijing"}'))
+
+        # 分片在读取时才拼接，to_dict中看到的是拼接后的结果
+        self.assertEqual(self.choice.content, 'Hello')
+        self.assertEqual(self.choice.to_dict()['tool_calls'][0]['function'],
+                         {'name': 'get_whether', 'arguments': '{"city": "Beijing"}'})
+        self.assertNotIn('_chunks', self.choice.to_dict())
+
+        self.choice.merge_delta(ChoiceDelta(content='!'))
+        self.choice.content = 'reset'
+        self.assertEqual(self.choice.content, 'reset')
+
+    def test_think_tags_across_chunks(self):
+        chunks = ['<thi', 'nk>\nlet me ', 'think</th', 'ink>\n\nThe ', 'answer <', 'b>']
+        segments = []
+        for chunk in chunks:
+            segments.extend(self.choice.merge_delta(ChoiceDelta(content=chunk)))
+        segments.extend(self.choice.split_thinking_from_content())
+
+        self.assertEqual(self.choice.thinking, 'let me think')
+        self.assertEqual(self.choice.content, 'The answer <b>')
+        # 第一个正文分片在</think>之后立即产出，而不是等整个回复结束
+        self.assertEqual(segments[:3], [('thinking', 'let me '), ('thinking', 'think'), ('content', 'The ')])
+
+    def test_split_assigned_content(self):
+        self.choice.content = '<think>reasoning</think>\nanswer'
+        self.choice.split_thinking_from_content()
+        self.assertEqual(self.choice.thinking, 'reasoning')
+        self.assertEqual(self.choice.content, 'answer')
+
+    def test_unclosed_think_tag_becomes_content(self):
+        segments = []
+        for chunk in ['<think>\nThe answer', ' is 42', ' </thi']:
+            segments.extend(self.choice.merge_delta(ChoiceDelta(content=chunk)))
+        segments.extend(self.choice.split_thinking_from_content())
+
+        # 回复被截断，没有</think>：标签之后的文本仍是回复内容
+        self.assertEqual(self.choice.content, 'The answer is 42 </thi')
+        self.assertEqual(self.choice.thinking, '')
+        self.assertFalse(self.choice.is_empty())
+        # 已输出的思考内容先被撤回，再作为回复内容输出
+        self.assertEqual(segments, [
+            ('thinking', 'The answer'), ('thinking', ' is 42'), ('thinking', ' '),
+            ('thinking_retracted', 'The answer is 42 '), ('content', 'The answer is 42 </thi'),
+        ])
+
+    def test_unclosed_think_tag_in_assigned_content(self):
+        self.choice.content = '<think>only reasoning'
+        self.choice.split_thinking_from_content()
+        self.assertEqual(self.choice.content, 'only reasoning')
+        self.assertEqual(self.choice.thinking, '')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from DART.core.types.conversation import MessageLog
+
+
+class TestMessageLog(unittest.TestCase):
+
+    def setUp(self):
+        self.history = [{'role': 'user', 'content': str(i)} for i in range(3)]
+        self.log = MessageLog([{'role': 'system', 'content': 'sys'}])
+        self.log.extend(self.history)
+
+    def test_shared_storage(self):
+        # 日志中保存的是原消息的引用
+        self.assertIs(self.log.view()[1], self.history[0])
+        messages = self.log.view().to_list()
+        self.assertEqual(len(messages), 4)
+        self.assertIs(messages[3], self.history[2])
+
+    def test_view_is_snapshot(self):
+        view = self.log.view()
+        self.log.append({'role': 'tool', 'content': 'result'})
+        self.assertEqual(len(view), 4)
+        self.assertEqual(len(self.log.view()), 5)
+        self.assertEqual(self.history, [{'role': 'user', 'content': str(i)} for i in range(3)])
+
+    def test_view_with_tail(self):
+        tail = [{'role': 'assistant', 'content': 'partial'}]
+        view = self.log.view(1, tail=tail)
+        self.assertEqual([m['content'] for m in view], ['0', '1', '2', 'partial'])
+        self.assertEqual(view[-1], tail[0])
+        self.assertEqual(view[1:3].to_list(), self.history[1:3])
+        self.assertEqual(len(self.log), 4)
+        with self.assertRaises(IndexError):
+            view[4]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import copy
+import inspect
+from types import SimpleNamespace
+
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+
+def chunk(delta: ChoiceDelta) -> SimpleNamespace:
+    """openai SDK流式响应中的一个分片"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeStream:
+    """openai SDK的同步流式响应，代替chat.completions.create的返回值"""
+
+    def __init__(self, deltas):
+        self.chunks = [chunk(delta) for delta in deltas]
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncStream(FakeStream):
+    """FakeStream的异步版本，每个分片之前等待delay秒"""
+
+    def __init__(self, deltas, delay=0.0):
+        super().__init__(deltas)
+        self.delay = delay
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for item in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """
+    按顺序返回预置回复的流式客户端，代替ART.client使用。
+    每条回复可以是字符串或ChoiceDelta列表，预置回复用完后回复ok；before_reply在每次回复前调用。
+    子类可以重写reply，按请求内容生成回复
+    """
+
+    def __init__(self, replies=None, before_reply=None):
+        self.models = ['fake-model']
+        self.replies = list(replies or [])
+        self.requests = []
+        self.before_reply = before_reply
+
+    def reply(self, **kwargs):
+        reply = self.replies.pop(0) if self.replies else 'ok'
+        return [ChoiceDelta(role='assistant', content=reply)] if isinstance(reply, str) else reply
+
+    def create_chat_completion(self, **kwargs):
+        # 保存请求时的快照，之后对消息的修改不影响断言
+        self.requests.append(copy.deepcopy(kwargs['messages']))
+        if self.before_reply is not None:
+            self.before_reply()
+        yield from self.reply(**kwargs)
+
+
+class FakeAsyncClient(FakeClient):
+    """FakeClient的异步版本，before_reply可以是协程函数"""
+
+    async def create_chat_completion(self, **kwargs):
+        self.requests.append(copy.deepcopy(kwargs['messages']))
+        if self.before_reply is not None:
+            result = self.before_reply()
+            if inspect.isawaitable(result):
+                await result
+        for delta in self.reply(**kwargs):
+            await asyncio.sleep(0)
+            yield delta